@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AscConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ADM'
+
+    def ready(self):
+        import ADM.signals
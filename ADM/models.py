@@ -27,7 +27,11 @@ class City(models.Model):
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='cities')
 
     def __str__(self):
-        return f"{self.name} ({self.region.name})"
+        # Название области — из справочника в памяти, без запроса за каждым городом
+        from ADM_back.reference import get_reference
+
+        region = get_reference().get('regions', self.region_id)
+        return f"{self.name} ({region.name if region else self.region.name})"
 
 
 
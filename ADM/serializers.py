@@ -6,6 +6,9 @@ from .models import (
 )
 import logging
 
+from ADM_back.reference import ReferenceLabelField, ReferenceRelatedField
+from user.summaries import UserSummaryField
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 # =========================
@@ -50,28 +53,6 @@ class RequestRatingSerializer(serializers.ModelSerializer):
     class Meta:
         model = RequestRating
         fields = ['id', 'rating', 'comment', 'created_at']
-class UserShortSerializer(serializers.ModelSerializer):
-    region = serializers.SerializerMethodField()
-    city = serializers.SerializerMethodField()
-
-    class Meta:
-        model = User
-        fields = ["id", "first_name", "last_name", "email", "phone_number", "region", "city"]
-
-    def get_region(self, obj):
-        # возвращает первый регион из групп пользователя (если есть)
-        first_group = obj.groups.first()
-        if first_group and first_group.regions.exists():
-            return first_group.regions.first().name
-        return None
-
-    def get_city(self, obj):
-        first_group = obj.groups.first()
-        if first_group and first_group.cities.exists():
-            return first_group.cities.first().name
-        return None
-
-
 class UserGroupSerializer(serializers.ModelSerializer):
     regions = serializers.StringRelatedField(many=True)
     cities = serializers.StringRelatedField(many=True)
@@ -93,7 +74,7 @@ class ASCFilesSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "file"]
 
 class RequestHistoryInfoSerializer(serializers.ModelSerializer):
-    user = UserShortSerializer(read_only=True)
+    user = UserSummaryField(shape='short', source='user_id')
 
     class Meta:
         model = RequestHistory
@@ -102,9 +83,9 @@ class RequestHistoryInfoSerializer(serializers.ModelSerializer):
 # Основной сериализатор Request
 # =========================
 class RequestInfoSerializer(serializers.ModelSerializer):
-    user = UserShortSerializer(read_only=True)
-    signatory = UserShortSerializer(read_only=True)
-    executor = UserShortSerializer(read_only=True)
+    user = UserSummaryField(shape='short', source='user_id')
+    signatory = UserSummaryField(shape='short', source='signatory_id')
+    executor = UserSummaryField(shape='short', source='executor_id')
     moderator_group = UserGroupSerializer(read_only=True)
 
     covers = ASCCoverSerializer(many=True, read_only=True)
@@ -112,9 +93,9 @@ class RequestInfoSerializer(serializers.ModelSerializer):
     history = RequestHistoryInfoSerializer(many=True, read_only=True)
     rating = RequestRatingSerializer(read_only=True)
 
-    region = serializers.StringRelatedField(read_only=True)
-    city = serializers.StringRelatedField(read_only=True)
-    category = serializers.StringRelatedField(read_only=True)
+    region = ReferenceLabelField('regions', source='region_id')
+    city = ReferenceLabelField('cities', source='city_id')
+    category = ReferenceLabelField('categories', source='category_id')
 
     class Meta:
         model = Request
@@ -134,9 +115,10 @@ class RequestSerializer(serializers.ModelSerializer):
     rating = RequestRatingSerializer(read_only=True, required=False)
 
     # ForeignKey поля
-    category = serializers.PrimaryKeyRelatedField(queryset=RequestCategory.objects.all())
-    region = serializers.PrimaryKeyRelatedField(queryset=Region.objects.all())
-    city = serializers.PrimaryKeyRelatedField(queryset=City.objects.all())
+    # Проверка id — по справочникам в памяти (ADM_back/reference.py)
+    category = ReferenceRelatedField('categories', queryset=RequestCategory.objects.all())
+    region = ReferenceRelatedField('regions', queryset=Region.objects.all())
+    city = ReferenceRelatedField('cities', queryset=City.objects.all())
 
     class Meta:
         model = Request
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ADM_back.reference import invalidate_reference
+from .models import City, Region, RequestCategory
+
+
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=RequestCategory)
+def invalidate_reference_on_change(sender, **kwargs):
+    # Версия меняется после коммита, иначе другой процесс успеет собрать снимок из старых строк
+    # под новой версией и не исправит его до следующего изменения
+    transaction.on_commit(invalidate_reference)
@@ -9,6 +9,8 @@ from .camunda import start_request_process, complete_latest_task_by_request
 import logging
 from rest_framework.pagination import PageNumberPagination
 
+from ADM_back.reference import ReferenceViewMixin
+
 logger = logging.getLogger(__name__)
 
 class StandardPagination(PageNumberPagination):
@@ -47,7 +49,8 @@ class RequestInfoViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.
             queryset = queryset.filter(executor_id=executor_id)
 
         logger.debug(f"Filtered queryset: {queryset.count()} items")
-        return queryset.distinct()
+        # История загружается заранее, чтобы сводки её участников попали в общую пачку (user/summaries.py)
+        return queryset.distinct().prefetch_related('history')
 
 class RequestViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                      mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
@@ -358,17 +361,20 @@ class RequestViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retr
         return Response({'status': 'rejected_by_customer'})
 
 
-class CityViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class CityViewSet(ReferenceViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                       mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = City.objects.all()
+    reference_table = 'cities'
     serializer_class = CitySerializer
 
-class RegionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class RegionViewSet(ReferenceViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                       mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = Region.objects.all()
+    reference_table = 'regions'
     serializer_class = RegionSerializer
 
-class CategoryViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class CategoryViewSet(ReferenceViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                       mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = RequestCategory.objects.all()
+    reference_table = 'categories'
     serializer_class = RequestCategorySerializer
\ No newline at end of file
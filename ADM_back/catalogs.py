@@ -0,0 +1,126 @@
+"""
+Каталоги тегов и цитат готовым JSON.
+
+Фронтенд загружает оба каталога на каждой странице. Вместо сериализации всех записей с переводами
+на каждый запрос процесс держит снимок: JSON всего каталога (как отдаёт TagSerializer /
+QuoteSerializer) и отдельный JSON на каждый язык — только записи с переводом на этот язык
+и только этот перевод. У каждого JSON свой строгий ETag по содержимому.
+
+Снимок привязан к версии каталога в кеше и к версии справочников (ADM_back/reference.py):
+версию каталога увеличивают сигналы сохранения и удаления записей и переводов
+(tags/signals.py, quote/signals.py), поэтому каждый процесс пересобирает снимок при следующем
+запросе.
+"""
+import hashlib
+import threading
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .reference import get_reference, get_reference_version
+
+# Каталог: (сериализатор полного списка, поле названия записи, поле текста перевода)
+CATALOGS = {
+    'tags': ('tags.serializers.TagSerializer', 'tag_name', 'tag'),
+    'quotes': ('quote.serializers.QuoteSerializer', 'quote_author', 'quote'),
+}
+ALL_LANGUAGES = 'all'
+
+
+def catalog_version_key(name):
+    return f'catalog:{name}:version'
+
+
+def get_catalog_version(name):
+    version = cache.get(catalog_version_key(name))
+    if version is None:
+        version = 1
+        cache.add(catalog_version_key(name), version, None)
+    return version
+
+
+def invalidate_catalog(name):
+    try:
+        cache.incr(catalog_version_key(name))
+    except ValueError:
+        cache.set(catalog_version_key(name), 2, None)
+
+
+class CatalogSnapshot:
+    def __init__(self, name, version):
+        self.version = version
+        serializer_path, title_field, text_field = CATALOGS[name]
+        serializer_class = import_string(serializer_path)
+        queryset = serializer_class.Meta.model.objects.prefetch_related('translations').order_by('pk')
+        data = serializer_class(queryset, many=True).data
+
+        renderer = JSONRenderer()
+        self.blobs = {ALL_LANGUAGES: renderer.render(data)}
+        # Названия записей по ключу языка: {id записи: перевод}; для ALL_LANGUAGES — название записи
+        self.names = {ALL_LANGUAGES: {item['id']: item[title_field] for item in data}}
+        self.languages = {}
+        for language in get_reference().tables['language'].values():
+            self.languages[language.lang] = language.id
+            items = []
+            for item in data:
+                translations = [translation for translation in item['translations']
+                                if translation['lang'] and translation['lang']['id'] == language.id]
+                if translations:
+                    items.append({**item, 'translations': translations})
+            self.blobs[language.id] = renderer.render(items)
+            self.names[language.id] = {item['id']: item['translations'][0][text_field] for item in items}
+        self.etags = {key: '"%s"' % hashlib.sha256(blob).hexdigest() for key, blob in self.blobs.items()}
+
+    def language_key(self, lang):
+        """Ключ JSON по ?lang= — коду или id языка. None, если такого языка нет."""
+        if not lang:
+            return ALL_LANGUAGES
+        if lang in self.languages:
+            return self.languages[lang]
+        if lang.isdigit() and int(lang) in self.blobs:
+            return int(lang)
+        return None
+
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def get_catalog(name):
+    version = (get_catalog_version(name), get_reference_version())
+    snapshot = _snapshots.get(name)
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshots.get(name)
+            if snapshot is None or snapshot.version != version:
+                snapshot = _snapshots[name] = CatalogSnapshot(name, version)
+    return snapshot
+
+
+class CatalogViewMixin:
+    """
+    list без фильтров (допускается только ?lang=) отдаётся из снимка каталога; по If-None-Match — 304.
+    С другими параметрами — обычный список из базы.
+    """
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        if set(request.query_params) - {'lang'}:
+            return super().list(request, *args, **kwargs)
+        snapshot = get_catalog(self.catalog_name)
+        key = snapshot.language_key(request.query_params.get('lang'))
+        if key is None:
+            return Response({"detail": "Неизвестный язык"}, status=status.HTTP_404_NOT_FOUND)
+        etag = snapshot.etags[key]
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot.blobs[key], content_type='application/json')
+        response['ETag'] = etag
+        # Клиент всегда сверяет ETag: каталог меняется сразу после правки в админке
+        response['Cache-Control'] = 'public, no-cache'
+        return response
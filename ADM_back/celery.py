@@ -0,0 +1,28 @@
+import logging
+import os
+
+from celery import Celery
+from django.db import transaction
+from kombu.exceptions import OperationalError
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ADM_back.settings')
+
+app = Celery('ADM_back')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+logger = logging.getLogger(__name__)
+
+
+def delay_on_commit(task, *args):
+    """
+    Ставит задачу в очередь после коммита транзакции.
+    Если брокер недоступен, запрос не падает: задача не ставится, ошибка пишется в лог.
+    """
+    def send():
+        try:
+            task.delay(*args)
+        except OperationalError:
+            logger.exception('Брокер недоступен, задача %s%r не поставлена', task.name, args)
+
+    transaction.on_commit(send)
@@ -0,0 +1,200 @@
+"""
+Справочники в памяти процесса: языки (language.Language), области (ADM.Region), города (ADM.City)
+и категории заявок (ADM.RequestCategory).
+
+Таблицы маленькие и меняются редко, а читаются почти в каждом запросе: язык у каждого перевода,
+область и город у каждой заявки. Поэтому они целиком загружаются в неизменяемый снимок
+ReferenceData — поиск по id, подписи и проверка id в сериализаторах идут без запросов к базе.
+Снимок пересобирается, когда меняется версия в кеше; её увеличивают сигналы при сохранении
+и удалении записей справочников (ADM/signals.py, language/signals.py). Версия сверяется не чаще
+раза в REFERENCE_CHECK_INTERVAL секунд, чтобы подписи для списка из N строк не обращались к кешу
+N раз: процесс, изменивший справочник, видит правку сразу, остальные — с этой задержкой.
+
+Списки справочников отдаются из того же снимка с ETag и Cache-Control (ReferenceViewMixin).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+REFERENCE_VERSION_KEY = 'reference:version'
+REFERENCE_MAX_AGE = 60 * 60
+REFERENCE_CHECK_INTERVAL = 2
+
+LanguageRef = namedtuple('LanguageRef', 'id lang')
+RegionRef = namedtuple('RegionRef', 'id name')
+CityRef = namedtuple('CityRef', 'id name region_id')
+CategoryRef = namedtuple('CategoryRef', 'id code name')
+
+# Таблица: (модель app_label.Model, тип строки)
+TABLES = {
+    'language': ('language.Language', LanguageRef),
+    'regions': ('ADM.Region', RegionRef),
+    'cities': ('ADM.City', CityRef),
+    'categories': ('ADM.RequestCategory', CategoryRef),
+}
+
+
+def get_reference_version():
+    version = cache.get(REFERENCE_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(REFERENCE_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_reference():
+    """Помечает снимок устаревшим: каждый процесс перечитает справочники при следующей сверке версии."""
+    global _checked_at
+    try:
+        cache.incr(REFERENCE_VERSION_KEY)
+    except ValueError:
+        cache.set(REFERENCE_VERSION_KEY, 2, None)
+    _checked_at = None
+
+
+class ReferenceData:
+    def __init__(self, version):
+        from django.apps import apps
+
+        self.version = version
+        self.models = {}
+        tables = {}
+        for name, (label, row_type) in TABLES.items():
+            model = apps.get_model(label)
+            self.models[name] = model
+            rows = model.objects.order_by('pk').values_list(*row_type._fields)
+            tables[name] = MappingProxyType({row[0]: row_type(*row) for row in rows})
+        self.tables = MappingProxyType(tables)
+
+        # Ответы API в том же виде, что у LanguageSerializer, RegionSerializer, CitySerializer
+        # и RequestCategorySerializer
+        self.payloads = MappingProxyType({
+            name: MappingProxyType({pk: self.represent(name, row) for pk, row in table.items()})
+            for name, table in tables.items()
+        })
+        self.etags = MappingProxyType({
+            name: '"%s"' % hashlib.md5(
+                json.dumps(list(payload.values()), ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+            for name, payload in self.payloads.items()
+        })
+
+    def represent(self, table, row):
+        if table == 'cities':
+            region = self.tables['regions'].get(row.region_id)
+            return {'id': row.id, 'name': row.name, 'region': region._asdict() if region else None}
+        return row._asdict()
+
+    def get(self, table, pk):
+        return self.tables[table].get(pk)
+
+    def label(self, table, pk):
+        """Подпись записи, как её __str__."""
+        row = self.get(table, pk)
+        if row is None:
+            return None
+        if table == 'language':
+            return row.lang
+        if table == 'cities':
+            region = self.get('regions', row.region_id)
+            return f"{row.name} ({region.name if region else ''})"
+        return row.name
+
+    def instance(self, table, pk):
+        """Объект модели по снимку — для присваивания внешнему ключу без запроса. None, если id нет."""
+        row = self.get(table, pk)
+        if row is None:
+            return None
+        obj = self.models[table](**row._asdict())
+        obj._state.adding = False
+        obj._state.db = 'default'
+        return obj
+
+
+_reference = None
+# Время последней сверки версии снимка с кешем (time.monotonic()); None — сверить при обращении
+_checked_at = None
+_lock = threading.Lock()
+
+
+def get_reference():
+    global _reference, _checked_at
+    now = time.monotonic()
+    if _reference is not None and _checked_at is not None and now - _checked_at < REFERENCE_CHECK_INTERVAL:
+        return _reference
+    version = get_reference_version()
+    if _reference is None or _reference.version != version:
+        with _lock:
+            if _reference is None or _reference.version != version:
+                _reference = ReferenceData(version)
+    _checked_at = now
+    return _reference
+
+
+class ReferenceRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, который проверяет id по снимку справочника, а не запросом к базе."""
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = get_reference().instance(self.table, pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class ReferenceLabelField(serializers.Field):
+    """Подпись записи справочника по id (вместо StringRelatedField). source — поле с id."""
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return get_reference().label(self.table, value)
+
+
+class ReferenceViewMixin:
+    """
+    list и retrieve справочника из снимка в памяти. Ответ можно кешировать на клиенте
+    REFERENCE_MAX_AGE секунд; по If-None-Match отдаётся 304.
+    """
+    reference_table = None
+
+    def reference_response(self, request, data):
+        etag = get_reference().etags[self.reference_table]
+        headers = {'ETag': etag, 'Cache-Control': f'public, max-age={REFERENCE_MAX_AGE}'}
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        payload = get_reference().payloads[self.reference_table]
+        return self.reference_response(request, list(payload.values()))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404(_('Not found.'))
+        row = get_reference().payloads[self.reference_table].get(pk)
+        if row is None:
+            raise Http404(_('Not found.'))
+        return self.reference_response(request, row)
@@ -1,7 +1,10 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -186,8 +189,9 @@ REST_FRAMEWORK = {
     # Use Django's standard django.contrib.auth permissions,
     # or allow read-only access for unauthenticated users.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Пользователь и токены берутся из кеша, см. user/authentication.py
+        'user.authentication.CachedTokenAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -218,12 +222,6 @@ DJOSER = {
     'SEND_CONFIRMATION_SMS': True,
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
-}
-
 SENDSMS_BACKEND = 'sendsms.backends.http.HttpBackend'
 SENDSMS_HTTP_URL = 'https://smsc.kz/sys/send.php'  # URL SMSC API для отправки SMS
 SENDSMS_HTTP_PARAMS = {
@@ -233,9 +231,26 @@ SENDSMS_HTTP_PARAMS = {
 }
 
 # Redis settings
-REDIS_HOST = 'localhost'
-REDIS_PORT = 6379
+REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
 REDIS_DB = 0
+REDIS_CACHE_DB = 1
+
+# Кеш общий для всех процессов gunicorn и воркеров Celery: через него идут версии лент,
+# справочников и каталогов и блокировка синхронизации с HR. В тестах — память процесса.
+if 'test' in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_CACHE_DB}',
+        }
+    }
 
 # Celery settings
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
@@ -244,6 +259,49 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULE = {
+    'flush-news-views': {
+        'task': 'news.tasks.flush_news_views',
+        'schedule': 60,
+    },
+    'refresh-news-rankings': {
+        'task': 'news.tasks.refresh_news_rankings',
+        'schedule': 60 * 5,
+    },
+    'sync-hr-employees': {
+        'task': 'user.tasks.sync_employees',
+        'schedule': crontab(hour=21, minute=0),  # 02:00 по Алматы
+    },
+    'detect-overdue-repairs': {
+        'task': 'repair_status.tasks.detect_overdue_repairs',
+        'schedule': crontab(hour=19, minute=5),  # 00:05 по Алматы
+    },
+}
+
+# Логи: синхронизация с HR пишет в файл только ход запуска и итоги; строки по отдельным
+# сотрудникам — на уровне DEBUG, подробности запуска хранятся в HRSyncRun/HRSyncCheckpoint
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+        'hr_sync': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'load_employees.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'user.management.commands.load_employees': {'handlers': ['hr_sync'], 'level': 'INFO'},
+        'ADM_back': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
 
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from ADM_back.reference import get_reference
 from .models import Language
 
 
@@ -6,3 +8,14 @@ class LanguageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Language
         fields = '__all__'
+
+
+class LanguageField(serializers.Field):
+    """Язык в том же виде, что LanguageSerializer, но из справочника в памяти. source — поле с id языка."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return get_reference().payloads['language'].get(value)
@@ -1,12 +1,15 @@
 from django.shortcuts import render
 from rest_framework import mixins, viewsets
 from rest_framework import viewsets
+
+from ADM_back.reference import ReferenceViewMixin
 from .serializers import LanguageSerializer
 from .models import Language
 
 
 
-class LanguageViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class LanguageViewSet(ReferenceViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                       mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = Language.objects.all()
+    reference_table = 'language'
     serializer_class = LanguageSerializer
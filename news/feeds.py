@@ -0,0 +1,132 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from language.models import Language
+from .models import News, NewsTranslation
+
+FEED_VERSION_KEY = 'news:feeds:version'
+FEED_CACHE_TIMEOUT = 60 * 10  # отложенные публикации (published_at в будущем) появятся не позже чем через 10 минут
+FEED_ITEMS_LIMIT = 50
+ALL_CATEGORIES = 'all'
+
+
+def get_feed_version():
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(FEED_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_feeds():
+    """Сбрасывает все закешированные ленты: меняется версия, старые ключи больше не читаются."""
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 2, None)
+
+
+class NewsRssFeed(Feed):
+    """RSS-лента опубликованных новостей одной категории на одном языке."""
+
+    def get_object(self, request, lang, category):
+        if category != ALL_CATEGORIES and category not in dict(News.CATEGORYS.CATEGORY_CHOICES):
+            raise Http404('Неизвестная категория')
+        language = get_object_or_404(Language, lang=lang)
+        return {'language': language, 'category': category}
+
+    def title(self, obj):
+        if obj['category'] == ALL_CATEGORIES:
+            return f"Новости ({obj['language'].lang})"
+        return f"{dict(News.CATEGORYS.CATEGORY_CHOICES)[obj['category']]} ({obj['language'].lang})"
+
+    def link(self, obj):
+        return f"/api/news/?lang_id={obj['language'].id}"
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def items(self, obj):
+        queryset = News.objects.filter(
+            is_published=True,
+            published_at__lte=timezone.now(),
+            translations__lang=obj['language'],
+        )
+        if obj['category'] != ALL_CATEGORIES:
+            queryset = queryset.filter(category=obj['category'])
+        return queryset.select_related('author').prefetch_related(
+            Prefetch(
+                'translations',
+                queryset=NewsTranslation.objects.filter(lang=obj['language']),
+                to_attr='feed_translations',
+            )
+        ).order_by('-published_at')[:FEED_ITEMS_LIMIT]
+
+    def item_title(self, item):
+        return item.feed_translations[0].title
+
+    def item_description(self, item):
+        return Truncator(item.feed_translations[0].text).chars(500)
+
+    def item_link(self, item):
+        return item.get_absolute_url()
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return f"{item.author.first_name} {item.author.last_name}".strip() or None
+
+    def item_categories(self, item):
+        return [item.category]
+
+
+class NewsAtomFeed(NewsRssFeed):
+    feed_type = Atom1Feed
+    subtitle = NewsRssFeed.description
+
+
+FEED_CLASSES = {
+    'rss': NewsRssFeed,
+    'atom': NewsAtomFeed,
+}
+
+
+def news_feed(request, lang, category, feed_format):
+    """
+    Отдаёт ленту из кеша в виде готового документа.
+    Сериализация выполняется только при первом запросе после публикации.
+    """
+    feed_class = FEED_CLASSES.get(feed_format)
+    if feed_class is None:
+        raise Http404('Неизвестный формат ленты')
+
+    cache_key = f'news:feed:{get_feed_version()}:{feed_format}:{lang}:{category}'
+    cached = cache.get(cache_key)
+    if cached is None:
+        response = feed_class()(request, lang=lang, category=category)
+        cached = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+        }
+        cache.set(cache_key, cached, FEED_CACHE_TIMEOUT)
+
+    if request.headers.get('If-None-Match') == cached['etag']:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(cached['content'], content_type=cached['content_type'])
+    response['ETag'] = cached['etag']
+    response['Cache-Control'] = f'public, max-age={FEED_CACHE_TIMEOUT}'
+    return response
@@ -9,7 +9,7 @@ class NewsFilter(filters.FilterSet):
     exclusive = filters.BooleanFilter()
     is_published = filters.BooleanFilter()
     tags = django_filters.CharFilter(field_name='tags__name', lookup_expr='icontains')
-    comments = django_filters.CharFilter(field_name='comments__content', lookup_expr='icontains')
+    comments = django_filters.CharFilter(field_name='comments__comment', lookup_expr='icontains')
     translation_title = filters.CharFilter(field_name='translations__title', lookup_expr='icontains')
 
     class Meta:
@@ -18,7 +18,7 @@ class NewsFilter(filters.FilterSet):
 
 
 class CommentFilter(filters.FilterSet):
-    content = django_filters.CharFilter(lookup_expr='icontains')
+    content = django_filters.CharFilter(field_name='comment', lookup_expr='icontains')
 
     class Meta:
         model = Comment
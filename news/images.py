@@ -0,0 +1,96 @@
+"""
+Производные изображения (WebP и JPEG фиксированной ширины) для обложек новостей и аватаров.
+
+Производные строятся фоновой задачей после загрузки и лежат по детерминированным путям
+derivatives/<путь оригинала без расширения>/<ширина>.<формат>. Карта путей сохраняется
+в JSON-поле модели (<поле>_srcset), сериализаторы отдают её в виде URL.
+"""
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from ADM_back.celery import delay_on_commit
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# (app_label, модель, поле изображения) — всё, для чего строятся производные
+IMAGE_FIELDS = (
+    ('news', 'News', 'image'),
+    ('news', 'NewsCover', 'cover'),
+    ('user', 'User', 'avatar'),
+)
+
+
+def derivative_path(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'derivatives/{root}/{width}.{extension}'
+
+
+def generate_derivatives(field_file):
+    """Строит производные для файла изображения и возвращает карту {'source': ..., формат: {ширина: путь}}."""
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    widths = [width for width in DERIVATIVE_WIDTHS if width < image.width] or [image.width]
+    variants = {'source': field_file.name}
+    for extension, (pil_format, options) in DERIVATIVE_FORMATS.items():
+        variants[extension] = {}
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+            if pil_format == 'JPEG' and resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+
+            path = derivative_path(field_file.name, width, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            variants[extension][str(width)] = default_storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def needs_derivatives(instance, field_name):
+    field_file = getattr(instance, field_name)
+    srcset = getattr(instance, f'{field_name}_srcset') or {}
+    return srcset.get('source') != (field_file.name or None)
+
+
+def schedule_derivatives(instance, field_name):
+    """Ставит построение производных в очередь, если файл изменился с прошлой обработки."""
+    if not needs_derivatives(instance, field_name):
+        return
+    from .tasks import build_image_derivatives
+
+    opts = instance._meta
+    delay_on_commit(build_image_derivatives, opts.app_label, opts.object_name, instance.pk, field_name)
+
+
+def srcset_urls(value, request=None):
+    """Карта производных {формат: {ширина: путь}} с путями, заменёнными на URL."""
+    result = {}
+    for extension in DERIVATIVE_FORMATS:
+        paths = (value or {}).get(extension) or {}
+        result[extension] = {}
+        for width, path in paths.items():
+            url = default_storage.url(path)
+            result[extension][width] = request.build_absolute_uri(url) if request else url
+    return result
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """Отдаёт карту производных в виде {'webp': {'320': url, ...}, 'jpeg': {...}}."""
+
+    def to_representation(self, value):
+        return srcset_urls(value, self.context.get('request'))
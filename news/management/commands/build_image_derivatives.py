@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from news.images import IMAGE_FIELDS, needs_derivatives
+from news.tasks import build_image_derivatives
+
+
+class Command(BaseCommand):
+    help = "Строит WebP/JPEG производные для уже загруженных изображений новостей, обложек и аватаров."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true', help='Строить в текущем процессе, без очереди Celery.')
+
+    def handle(self, *args, **options):
+        for app_label, model_name, field_name in IMAGE_FIELDS:
+            model = apps.get_model(app_label, model_name)
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            scheduled = 0
+            for instance in queryset.only('pk', field_name, f'{field_name}_srcset').iterator():
+                if not needs_derivatives(instance, field_name):
+                    continue
+                if options['sync']:
+                    build_image_derivatives(app_label, model_name, instance.pk, field_name)
+                else:
+                    build_image_derivatives.delay(app_label, model_name, instance.pk, field_name)
+                scheduled += 1
+            self.stdout.write(f"{model_name}.{field_name}: {scheduled}")
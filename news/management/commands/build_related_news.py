@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.recommendations import build_related_index, RELATED_LIMIT
+
+
+class Command(BaseCommand):
+    help = "Пересобирает индекс похожих новостей по пересечению тегов и категории."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=RELATED_LIMIT, help='Количество похожих новостей на статью.')
+
+    def handle(self, *args, **options):
+        rows = build_related_index(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Индекс похожих новостей пересобран: {rows} записей"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.tag_usage import recompute_tag_usage
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики использования тегов (TagUsage) по NewsTag."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tags = recompute_tag_usage()
+        self.stdout.write(self.style.SUCCESS(f"Счётчики тегов пересчитаны: {tags} тегов"))
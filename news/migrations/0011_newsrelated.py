@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_remove_news_subcategory_alter_news_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsRelated',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='news.news')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Похожая новость',
+                'verbose_name_plural': 'Похожие новости',
+                'ordering': ['news', 'rank'],
+                'indexes': [models.Index(fields=['news', 'rank'], name='news_newsre_news_id_dbc91d_idx')],
+                'unique_together': {('news', 'related')},
+            },
+        ),
+    ]
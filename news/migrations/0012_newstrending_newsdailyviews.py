@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_newsrelated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsTrending',
+            fields=[
+                ('news', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='news.news')),
+                ('score', models.FloatField(default=0)),
+                ('score_updated_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Рейтинг новости',
+                'verbose_name_plural': 'Рейтинги новостей',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Просмотры новости за день',
+                'verbose_name_plural': 'Просмотры новостей по дням',
+                'ordering': ['-date'],
+                'unique_together': {('news', 'date')},
+            },
+        ),
+    ]
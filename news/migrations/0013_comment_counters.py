@@ -0,0 +1,56 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def deduplicate_votes_and_fill_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    VoteComment = apps.get_model('news', 'VoteComment')
+
+    # Оставляем только последний голос пользователя за комментарий
+    duplicates = (VoteComment.objects.values('user_id', 'comment')
+                  .annotate(last_id=Max('id'), total=Count('id')).filter(total__gt=1))
+    for row in duplicates:
+        VoteComment.objects.filter(user_id=row['user_id'], comment=row['comment']).exclude(id=row['last_id']).delete()
+
+    for comment in Comment.objects.annotate(
+            up=Count('votes', filter=Q(votes__vote_type='upvote')),
+            down=Count('votes', filter=Q(votes__vote_type='downvote'))).filter(Q(up__gt=0) | Q(down__gt=0)):
+        Comment.objects.filter(pk=comment.pk).update(upvotes=comment.up, downvotes=comment.down)
+
+    for news in News.objects.annotate(total=Count('comments')).filter(total__gt=0):
+        News.objects.filter(pk=news.pk).update(comments_count=news.total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_newstrending_newsdailyviews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(deduplicate_votes_and_fill_counters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='votecomment',
+            constraint=models.UniqueConstraint(fields=('user_id', 'comment'), name='unique_vote_per_user_comment'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='newscover',
+            name='cover_srcset',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_tag_usage(apps, schema_editor):
+    NewsTag = apps.get_model('news', 'NewsTag')
+    TagUsage = apps.get_model('news', 'TagUsage')
+    rows = NewsTag.objects.values('tag_id').annotate(
+        total=Count('pk'), published=Count('pk', filter=Q(news__is_published=True))).order_by()
+    TagUsage.objects.bulk_create([TagUsage(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0014_image_srcset'),
+        ('tags', '0002_alter_tagtranslation_tag_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagUsage',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to='tags.tag')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('published', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Использование тега',
+                'verbose_name_plural': 'Использование тегов',
+            },
+        ),
+        migrations.RunPython(fill_tag_usage, migrations.RunPython.noop),
+    ]
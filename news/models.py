@@ -29,6 +29,7 @@ class News(models.Model):
     quote = models.ForeignKey(Quote, on_delete=models.SET_NULL, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(upload_to='news/images/', blank=True, null=True)
+    image_srcset = models.JSONField(default=dict, blank=True)
     tags = models.ManyToManyField(Tag, through='NewsTag', related_name='news_tags')
     category = models.CharField(max_length=50, choices=CATEGORYS.CATEGORY_CHOICES)
     exclusive = models.BooleanField(default=False)
@@ -36,6 +37,7 @@ class News(models.Model):
     is_published = models.BooleanField(default=False)
     published_at = models.DateTimeField(blank=True, null=True)
     views = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     link_to_source = models.TextField(blank=True, null=True)
 
     def __str__(self):
@@ -53,6 +55,7 @@ class News(models.Model):
 class NewsCover(models.Model):
     news = models.ForeignKey(News, on_delete=models.CASCADE, related_name='covers', blank=True, null=True)
     cover = models.ImageField(upload_to='news/covers/', blank=True, null=True)
+    cover_srcset = models.JSONField(default=dict, blank=True)
     order = models.PositiveIntegerField(default=0, blank=True, null=True)
     source_url = models.TextField(blank=True, null=True)
     alt = models.CharField(max_length=255, blank=True, null=True)
@@ -99,10 +102,16 @@ class Comment(models.Model):
     news = models.ForeignKey(News, related_name='comments', on_delete=models.CASCADE)
     user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comment")
     created_at = models.DateTimeField(auto_now_add=True)
+    upvotes = models.PositiveIntegerField(default=0)
+    downvotes = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Коммента́рий {self.id} на новость {self.news.id}"
 
+    @property
+    def score(self):
+        return self.upvotes - self.downvotes
+
     class Meta:
         ordering = ["id"]
         verbose_name = "Коммента́рий"
@@ -121,6 +130,9 @@ class VoteComment(models.Model):
 
     class Meta:
         ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'comment'], name='unique_vote_per_user_comment'),
+        ]
         verbose_name = "Голос за комментарий"
         verbose_name_plural = "Голоса за комментарии"
 
@@ -157,3 +169,62 @@ class Subscriber(models.Model):
         ordering = ["id"]
         verbose_name = "Подписчик"
         verbose_name_plural = "Подписчики"
+
+
+class NewsTrending(models.Model):
+    news = models.OneToOneField(News, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(default=0)
+    score_updated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Рейтинг новости"
+        verbose_name_plural = "Рейтинги новостей"
+
+    def __str__(self):
+        return f"Новость {self.news_id}: {self.score:.2f}"
+
+
+class NewsDailyViews(models.Model):
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField(db_index=True)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('news', 'date')
+        ordering = ['-date']
+        verbose_name = "Просмотры новости за день"
+        verbose_name_plural = "Просмотры новостей по дням"
+
+    def __str__(self):
+        return f"Новость {self.news_id} {self.date}: {self.views}"
+
+
+class NewsRelated(models.Model):
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(News, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('news', 'related')
+        ordering = ['news', 'rank']
+        indexes = [models.Index(fields=['news', 'rank'])]
+        verbose_name = "Похожая новость"
+        verbose_name_plural = "Похожие новости"
+
+    def __str__(self):
+        return f"Новость {self.news_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class TagUsage(models.Model):
+    """Сколько новостей отмечено тегом: всего и опубликованных. Ведётся сигналами (news/tag_usage.py)."""
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='usage')
+    total = models.PositiveIntegerField(default=0)
+    published = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Использование тега"
+        verbose_name_plural = "Использование тегов"
+
+    def __str__(self):
+        return f"Тег {self.tag_id}: {self.published} / {self.total}"
@@ -0,0 +1,143 @@
+"""
+Индекс похожих новостей.
+
+Похожесть считается по пересечению тегов (коэффициент Жаккара) с небольшим бонусом
+за совпадение категории. Результат хранится в NewsRelated: top-k строк на новость,
+поэтому выдача блока «похожие новости» — это одна выборка по индексу (news, rank).
+"""
+import heapq
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .models import News, NewsTag, NewsRelated
+
+RELATED_LIMIT = 6
+CATEGORY_BONUS = 0.1
+
+
+def _load_corpus(news_ids=None):
+    """Возвращает {news_id: set(tag_id)} и {news_id: category} для опубликованных новостей."""
+    news = News.objects.filter(is_published=True)
+    if news_ids is not None:
+        news = news.filter(id__in=news_ids)
+    categories = dict(news.values_list('id', 'category'))
+
+    tag_sets = defaultdict(set)
+    for news_id, tag_id in NewsTag.objects.filter(news_id__in=categories.keys()).values_list('news_id', 'tag_id'):
+        tag_sets[news_id].add(tag_id)
+    return tag_sets, categories
+
+
+def _score(tags, other_tags, overlap, category, other_category):
+    score = overlap / (len(tags) + len(other_tags) - overlap)
+    if category == other_category:
+        score += CATEGORY_BONUS
+    return score
+
+
+def _top_related(news_id, tag_sets, categories, inverted, limit):
+    tags = tag_sets.get(news_id)
+    if not tags:
+        return []
+    overlap = Counter()
+    for tag_id in tags:
+        for other_id in inverted[tag_id]:
+            if other_id != news_id:
+                overlap[other_id] += 1
+    scored = (
+        (_score(tags, tag_sets[other_id], count, categories.get(news_id), categories.get(other_id)), other_id)
+        for other_id, count in overlap.items()
+    )
+    return heapq.nlargest(limit, scored)
+
+
+def _invert(tag_sets):
+    inverted = defaultdict(list)
+    for news_id, tags in tag_sets.items():
+        for tag_id in tags:
+            inverted[tag_id].append(news_id)
+    return inverted
+
+
+def _rows(news_id, top):
+    return [
+        NewsRelated(news_id=news_id, related_id=other_id, score=score, rank=rank)
+        for rank, (score, other_id) in enumerate(top)
+    ]
+
+
+def build_related_index(limit=RELATED_LIMIT):
+    """Полная пересборка индекса. Возвращает количество записанных строк."""
+    tag_sets, categories = _load_corpus()
+    inverted = _invert(tag_sets)
+
+    rows = []
+    for news_id in tag_sets:
+        rows.extend(_rows(news_id, _top_related(news_id, tag_sets, categories, inverted, limit)))
+
+    with transaction.atomic():
+        NewsRelated.objects.all().delete()
+        NewsRelated.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def update_related_for_news(news_id, limit=RELATED_LIMIT):
+    """
+    Инкрементальное обновление после изменения тегов или статуса публикации одной новости.
+    Пересчитывается список самой новости и списки новостей, которые делят с ней теги
+    или уже ссылались на неё.
+    """
+    own_tags, own_categories = _load_corpus([news_id])
+    tags = own_tags.get(news_id, set())
+
+    sharing_ids = set(
+        NewsTag.objects.filter(tag_id__in=tags, news__is_published=True)
+        .exclude(news_id=news_id).values_list('news_id', flat=True)
+    )
+    referencing_ids = set(NewsRelated.objects.filter(related_id=news_id).values_list('news_id', flat=True))
+    affected_ids = sharing_ids | referencing_ids
+
+    # Для списков затронутых новостей нужны их полные наборы тегов и кандидаты
+    tag_sets, categories = _load_corpus(affected_ids)
+    tag_sets.update(own_tags)
+    categories.update(own_categories)
+
+    current = defaultdict(list)
+    for entry in NewsRelated.objects.filter(news_id__in=affected_ids):
+        current[entry.news_id].append((entry.score, entry.related_id))
+
+    new_lists = {news_id: _top_related(news_id, tag_sets, categories, _invert(tag_sets), limit)}
+    needs_rebuild = []
+    for other_id in affected_ids:
+        entries = [item for item in current[other_id] if item[1] != news_id]
+        previous = next((item for item in current[other_id] if item[1] == news_id), None)
+        other_tags = tag_sets.get(other_id, set())
+        overlap = len(other_tags & tags)
+        updated = None
+        if overlap:
+            updated = (_score(other_tags, tags, overlap, categories.get(other_id), categories.get(news_id)), news_id)
+            entries.append(updated)
+        if previous and len(current[other_id]) >= limit and (updated is None or updated < previous):
+            # Новость опустилась в заполненном списке — её место может занять кто-то вне индекса
+            needs_rebuild.append(other_id)
+        else:
+            new_lists[other_id] = heapq.nlargest(limit, entries)
+
+    if needs_rebuild:
+        candidate_ids = set(
+            NewsTag.objects.filter(tag_id__in=set().union(*(tag_sets[i] for i in needs_rebuild)),
+                                   news__is_published=True).values_list('news_id', flat=True)
+        )
+        extra_tags, extra_categories = _load_corpus(candidate_ids)
+        inverted = _invert(extra_tags)
+        for other_id in needs_rebuild:
+            new_lists[other_id] = _top_related(other_id, extra_tags, extra_categories, inverted, limit)
+
+    rows = []
+    for owner_id, top in new_lists.items():
+        rows.extend(_rows(owner_id, top))
+
+    with transaction.atomic():
+        NewsRelated.objects.filter(news_id__in=new_lists.keys()).delete()
+        NewsRelated.objects.bulk_create(rows)
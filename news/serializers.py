@@ -1,7 +1,8 @@
 from rest_framework import serializers
 
-from language.serializers import LanguageSerializer
-from user.serializers import UserSerializer
+from language.serializers import LanguageField
+from user.summaries import UserSummaryField
+from .images import ImageSrcsetField
 from .models import News, NewsTranslation, NewsTag, Comment, VoteComment, Link, NewsCover, NewsFiles
 from tags.serializers import TagSerializer
 from quote.serializers import QuoteSerializer
@@ -18,6 +19,7 @@ class NewsTagSerializer(serializers.ModelSerializer):
 
 
 class NewsCoverSerializer(serializers.ModelSerializer):
+    cover_srcset = ImageSrcsetField()
 
     class Meta:
         model = NewsCover
@@ -33,7 +35,7 @@ class NewsFileSerializer(serializers.ModelSerializer):
 
 
 class NewsTranslationSerializer(serializers.ModelSerializer):
-    lang = LanguageSerializer(read_only=True)
+    lang = LanguageField(source='lang_id')
 
     class Meta:
         model = NewsTranslation
@@ -47,11 +49,24 @@ class LinkSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    user_id = UserSerializer(read_only=True)
+    user_id = UserSummaryField(source='user_id_id')
 
     class Meta:
         model = Comment
-        fields = ['id', 'comment', 'user_id', 'news', 'created_at']
+        fields = ['id', 'comment', 'user_id', 'news', 'created_at', 'upvotes', 'downvotes', 'score']
+
+
+class CommentThreadSerializer(serializers.ModelSerializer):
+    """Комментарий в ветке новости: автор без групп, должности и организации."""
+    user = UserSummaryField(shape='brief', source='user_id_id')
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'comment', 'user', 'created_at', 'upvotes', 'downvotes', 'score']
+
+
+class VoteSerializer(serializers.Serializer):
+    vote_type = serializers.ChoiceField(choices=VoteComment.VOTE_TYPES)
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
@@ -65,6 +80,7 @@ class NewsCoverCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsCover
         fields = '__all__'
+        read_only_fields = ['cover_srcset']
 
 class NewsFilesCreateSerializer(serializers.ModelSerializer):
 
@@ -76,11 +92,11 @@ class NewsSerializer(serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     covers = NewsCoverSerializer(many=True, required=False)
     files = NewsFileSerializer(many=True, required=False)
-    comments = CommentSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     quote = QuoteSerializer(read_only=True)
-    author = UserSerializer(read_only=True)
+    author = UserSummaryField(source='author_id')
     links = LinkSerializer(many=True, read_only=True)
+    image_srcset = ImageSrcsetField()
 
     def get_translations(self, obj):
         request = self.context.get('request')
@@ -210,17 +226,17 @@ class NewsCreateSerializer(serializers.ModelSerializer):
 class NewsShortSerializer(serializers.ModelSerializer):
     translations = NewsTranslationSerializer(many=True, read_only=True)
     covers = NewsCoverSerializer(many=True, read_only=True)
-    author = UserSerializer(read_only=True)
-
+    author = UserSummaryField(source='author_id')
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = News
-        fields = ['id', 'covers', 'announcement', 'author', 'published_at', 'translations', 'category', 'image', 'created_at',
-                  'updated_at']
+        fields = ['id', 'covers', 'announcement', 'author', 'published_at', 'translations', 'category', 'image',
+                  'image_srcset', 'created_at', 'updated_at']
 
 
 class VoteCommentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = UserSummaryField(source='user_id_id')
 
     class Meta:
         model = VoteComment
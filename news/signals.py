@@ -1,7 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
-from .models import News
+from .models import News, NewsTranslation, NewsTag, Comment, VoteComment, NewsCover
+from .tag_usage import apply_links, apply_publish_change
 from .utils import notify_subscribers
+from .feeds import invalidate_feeds
+from .images import schedule_derivatives
+from .recommendations import update_related_for_news
 
 
 @receiver(post_save, sender=News)
@@ -9,3 +15,143 @@ def post_save_handler(sender, instance, created, **kwargs):
     print("рассылка")
     if created:
         notify_subscribers(instance)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=NewsTranslation)
+@receiver(post_delete, sender=NewsTranslation)
+def invalidate_feeds_handler(sender, instance, **kwargs):
+    # Публикация, снятие с публикации и правка текста меняют содержимое лент. Версия меняется
+    # после коммита, иначе другой процесс успеет закешировать ленту из старых строк под новой версией
+    transaction.on_commit(invalidate_feeds)
+
+
+def _schedule_related_update(news_id):
+    transaction.on_commit(lambda: update_related_for_news(news_id))
+
+
+@receiver(pre_save, sender=News)
+def remember_publish_state(sender, instance, **kwargs):
+    if instance.pk:
+        instance._was_published = News.objects.filter(pk=instance.pk).values_list('is_published', flat=True).first()
+    else:
+        instance._was_published = None
+
+
+@receiver(post_save, sender=News)
+def update_related_on_publish(sender, instance, created, **kwargs):
+    if not created and instance._was_published != instance.is_published:
+        _schedule_related_update(instance.pk)
+
+
+@receiver(post_save, sender=NewsTag)
+@receiver(post_delete, sender=NewsTag)
+def update_related_on_news_tag(sender, instance, **kwargs):
+    _schedule_related_update(instance.news_id)
+
+
+@receiver(m2m_changed, sender=News.tags.through)
+def update_related_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    news_ids = (pk_set or []) if reverse else [instance.pk]
+    for news_id in news_ids:
+        _schedule_related_update(news_id)
+
+
+def published_news_ids(news_ids):
+    return set(News.objects.filter(pk__in=news_ids, is_published=True).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=News)
+def update_tag_usage_on_publish(sender, instance, created, **kwargs):
+    if not created and instance._was_published is not None and instance._was_published != instance.is_published:
+        apply_publish_change(instance.pk, instance.is_published)
+
+
+@receiver(pre_save, sender=NewsTag)
+def remember_news_tag(sender, instance, **kwargs):
+    instance._previous_link = None
+    if instance.pk:
+        instance._previous_link = NewsTag.objects.filter(pk=instance.pk).values_list('news_id', 'tag_id').first()
+
+
+@receiver(post_save, sender=NewsTag)
+def update_tag_usage_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_link', None)
+    current = (instance.news_id, instance.tag_id)
+    if previous == current:
+        return
+    links = [previous, current] if previous else [current]
+    published = published_news_ids({news_id for news_id, _ in links})
+    if previous:
+        apply_links([previous], -1, published)
+    apply_links([current], 1, published)
+    instance._previous_link = current
+
+
+@receiver(post_delete, sender=NewsTag)
+def update_tag_usage_on_delete(sender, instance, **kwargs):
+    # remove() и clear() у News.tags удаляют строки NewsTag с сигналами, поэтому учитываются здесь
+    apply_links([(instance.news_id, instance.tag_id)], -1, published_news_ids([instance.news_id]))
+
+
+@receiver(m2m_changed, sender=News.tags.through)
+def update_tag_usage_on_tags_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() и set() создают строки NewsTag через bulk_create, без post_save
+    if action != 'post_add' or not pk_set:
+        return
+    links = [(news_id, instance.pk) for news_id in pk_set] if reverse else [(instance.pk, tag_id) for tag_id in pk_set]
+    apply_links(links, 1, published_news_ids({news_id for news_id, _ in links}))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        News.objects.filter(pk=instance.news_id).update(comments_count=F('comments_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    News.objects.filter(pk=instance.news_id, comments_count__gt=0).update(comments_count=F('comments_count') - 1)
+
+
+VOTE_COUNTERS = {'upvote': 'upvotes', 'downvote': 'downvotes'}
+
+
+@receiver(pre_save, sender=VoteComment)
+def remember_vote_type(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_vote_type = VoteComment.objects.filter(pk=instance.pk).values_list(
+            'vote_type', flat=True).first()
+    else:
+        instance._previous_vote_type = None
+
+
+@receiver(post_save, sender=VoteComment)
+def update_vote_counters(sender, instance, created, **kwargs):
+    previous = instance._previous_vote_type
+    if previous == instance.vote_type:
+        return
+    changes = {VOTE_COUNTERS[instance.vote_type]: F(VOTE_COUNTERS[instance.vote_type]) + 1}
+    if previous in VOTE_COUNTERS:
+        changes[VOTE_COUNTERS[previous]] = F(VOTE_COUNTERS[previous]) - 1
+    Comment.objects.filter(pk=instance.comment_id).update(**changes)
+
+
+@receiver(post_delete, sender=VoteComment)
+def decrement_vote_counter(sender, instance, **kwargs):
+    counter = VOTE_COUNTERS.get(instance.vote_type)
+    if counter:
+        Comment.objects.filter(pk=instance.comment_id, **{f'{counter}__gt': 0}).update(**{counter: F(counter) - 1})
+
+
+@receiver(post_save, sender=News)
+def build_news_image_derivatives(sender, instance, **kwargs):
+    schedule_derivatives(instance, 'image')
+
+
+@receiver(post_save, sender=NewsCover)
+def build_cover_derivatives(sender, instance, **kwargs):
+    schedule_derivatives(instance, 'cover')
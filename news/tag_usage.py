@@ -0,0 +1,96 @@
+"""
+Популярность тегов: счётчики TagUsage и облако тегов.
+
+На каждый тег — строка с числом новостей всего (total) и опубликованных (published, по флагу
+is_published). Счётчики меняются в сигналах (news/signals.py): при добавлении и удалении NewsTag,
+при переносе строки на другую новость или тег и при публикации или снятии новости с публикации.
+Облако и топ тегов читают только TagUsage и переводы из снимка каталога тегов
+(ADM_back/catalogs.py), NewsTag не затрагивается. recompute_tag_usage пересчитывает счётчики
+по NewsTag.
+"""
+import math
+from collections import Counter
+
+from django.db.models import Count, F, Q
+
+from ADM_back.catalogs import ALL_LANGUAGES, get_catalog
+from .models import NewsTag, TagUsage
+
+CLOUD_LIMIT = 50
+MAX_LIMIT = 200
+CLOUD_WEIGHTS = 5
+
+
+def apply_usage(deltas):
+    """deltas — {tag_id: (total, published)}. Одинаковые изменения объединяются в один UPDATE."""
+    groups = {}
+    for tag_id, delta in deltas.items():
+        if any(delta):
+            groups.setdefault(delta, []).append(tag_id)
+    for (total, published), tag_ids in groups.items():
+        changes = {name: F(name) + value for name, value in (('total', total), ('published', published)) if value}
+        if total > 0 or published > 0:
+            # Строки появляются при первом использовании тега; при уменьшении строка уже есть
+            # или тег удаляется вместе с ней
+            TagUsage.objects.bulk_create([TagUsage(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True)
+        TagUsage.objects.filter(tag_id__in=tag_ids).update(**changes)
+
+
+def apply_links(links, sign, published):
+    """links — (news_id, tag_id) добавленных (sign=1) или удалённых (sign=-1) строк NewsTag."""
+    deltas = Counter()
+    published_deltas = Counter()
+    for news_id, tag_id in links:
+        deltas[tag_id] += sign
+        if news_id in published:
+            published_deltas[tag_id] += sign
+    apply_usage({tag_id: (deltas[tag_id], published_deltas[tag_id]) for tag_id in deltas})
+
+
+def apply_publish_change(news_id, is_published):
+    sign = 1 if is_published else -1
+    tag_ids = list(NewsTag.objects.filter(news_id=news_id).values_list('tag_id', flat=True))
+    if tag_ids:
+        TagUsage.objects.filter(tag_id__in=tag_ids).update(published=F('published') + sign)
+
+
+def recompute_tag_usage():
+    """Пересчитывает все счётчики по NewsTag. Возвращает число тегов с использованием."""
+    rows = NewsTag.objects.values('tag_id').annotate(
+        total=Count('pk'), published=Count('pk', filter=Q(news__is_published=True))).order_by()
+    usage = [TagUsage(**row) for row in rows]
+    TagUsage.objects.all().delete()
+    TagUsage.objects.bulk_create(usage, batch_size=1000)
+    return len(usage)
+
+
+def tag_cloud(lang_key, published=True, limit=CLOUD_LIMIT):
+    """
+    Самые используемые теги: [{id, tag_name, name, count, weight}] по убыванию count.
+    lang_key — ключ языка снимка каталога; тегам без перевода на этот язык в облаке не место.
+    weight — от 1 до CLOUD_WEIGHTS по логарифму count, для размера шрифта в облаке.
+    """
+    field = 'published' if published else 'total'
+    counts = TagUsage.objects.filter(**{f'{field}__gt': 0}).values_list('tag_id', field)
+    catalog = get_catalog('tags')
+    names = catalog.names[lang_key]
+    tag_names = catalog.names[ALL_LANGUAGES]
+    ranked = sorted(((count, tag_id) for tag_id, count in counts if tag_id in names),
+                    key=lambda item: (-item[0], item[1]))[:limit]
+    if not ranked:
+        return []
+
+    low, high = math.log(ranked[-1][0]), math.log(ranked[0][0])
+    result = []
+    for count, tag_id in ranked:
+        weight = 1
+        if high > low:
+            weight += round((CLOUD_WEIGHTS - 1) * (math.log(count) - low) / (high - low))
+        result.append({
+            'id': tag_id,
+            'tag_name': tag_names[tag_id],
+            'name': names[tag_id],
+            'count': count,
+            'weight': weight,
+        })
+    return result
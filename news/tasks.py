@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.apps import apps
+
+from .images import generate_derivatives
+from .trending import flush_views, refresh_rankings
+
+
+@shared_task
+def flush_news_views():
+    return flush_views()
+
+
+@shared_task
+def refresh_news_rankings():
+    trending, weekly = refresh_rankings()
+    return {'trending': len(trending), 'week': len(weekly)}
+
+
+@shared_task
+def build_image_derivatives(app_label, model_name, pk, field_name):
+    model = apps.get_model(app_label, model_name)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+
+    field_file = getattr(instance, field_name)
+    variants = generate_derivatives(field_file) if field_file else {}
+    # Если файл успели заменить, карту запишет задача, поставленная для нового файла
+    queryset = model.objects.filter(pk=pk)
+    if field_file:
+        queryset = queryset.filter(**{field_name: field_file.name})
+    queryset.update(**{f'{field_name}_srcset': variants})
+    return variants
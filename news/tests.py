@@ -1,3 +1,60 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from user.models import User
+from .models import News, NewsTrending, NewsDailyViews
+from .trending import VIEW_BUCKET_SECONDS, flush_views, record_view, refresh_rankings
+
+
+class TrendingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@telecom.kz', password='1234')
+        now = timezone.now()
+        self.old, self.fresh = [
+            News.objects.create(author=self.author, category=News.CATEGORYS.NEWS_HR,
+                                is_published=True, published_at=now)
+            for _ in range(2)
+        ]
+
+    def flush_later(self):
+        # Переносятся только закрытые интервалы
+        with mock.patch('news.trending.time.time', return_value=time.time() + 2 * VIEW_BUCKET_SECONDS):
+            return flush_views()
+
+    def test_views_are_counted(self):
+        for _ in range(3):
+            record_view(self.fresh.id)
+        record_view(self.old.id)
+
+        self.assertEqual(flush_views(), 0)
+        self.assertEqual(self.flush_later(), 4)
+        self.assertEqual(self.flush_later(), 0)
+        self.fresh.refresh_from_db()
+        self.assertEqual(self.fresh.views, 3)
+        self.assertEqual(NewsDailyViews.objects.get(news=self.fresh).views, 3)
+        self.assertAlmostEqual(NewsTrending.objects.get(news=self.fresh).score, 3, places=3)
+
+    def test_old_views_decay(self):
+        # 100 просмотров трёхдневной давности весят меньше, чем 20 свежих
+        NewsTrending.objects.create(news=self.old, score=100,
+                                    score_updated_at=timezone.now() - timedelta(days=3))
+        NewsTrending.objects.create(news=self.fresh, score=20, score_updated_at=timezone.now())
+
+        trending, _ = refresh_rankings()
+        self.assertEqual(trending, [self.fresh.id, self.old.id])
+
+    def test_view_rebases_old_score(self):
+        NewsTrending.objects.create(news=self.fresh, score=8, score_updated_at=timezone.now() - timedelta(days=2))
+        record_view(self.fresh.id)
+        self.flush_later()
 
-# Create your tests here.
+        # Просмотр записывается на конец минутного интервала, поэтому затухание чуть больше двух суток
+        trending = NewsTrending.objects.get(news=self.fresh)
+        self.assertAlmostEqual(trending.score, 3, places=2)
+        self.assertLess(abs(timezone.now() - trending.score_updated_at), timedelta(minutes=3))
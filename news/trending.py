@@ -0,0 +1,170 @@
+"""
+Рейтинги «в тренде» и «самое читаемое за неделю».
+
+Просмотр в запросе только увеличивает счётчик в кеше (Redis): просмотры копятся по минутным
+интервалам, и периодическая задача flush_news_views переносит закрытые интервалы в базу
+пачкой — счётчик News.views, дневные счётчики NewsDailyViews и экспоненциально затухающий
+счёт NewsTrending. Буфер общий для всех процессов, поэтому перезапуск веб-процесса просмотры
+не теряет. Ранжированные списки id пересчитываются периодической задачей и лежат в кеше,
+поэтому запрос ленты не сортирует таблицу News.
+"""
+import heapq
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import News, NewsTrending, NewsDailyViews
+
+HALF_LIFE = timedelta(hours=24)
+DECAY_RATE = math.log(2) / HALF_LIFE.total_seconds()
+SCORE_WINDOW = timedelta(days=14)  # за две недели счёт затухает в ~16 000 раз
+VIEW_BUCKET_SECONDS = 60
+VIEW_BUFFER_TIMEOUT = 60 * 60 * 24  # непереданные за сутки просмотры отбрасываются
+VIEWS_FLUSHED_KEY = 'news:views:flushed'
+RANKING_LIMIT = 50
+RANKING_TIMEOUT = 60 * 10
+TRENDING_CACHE_KEY = 'news:ranking:trending'
+WEEKLY_CACHE_KEY = 'news:ranking:week'
+
+
+def decayed_score(score, updated_at, now):
+    return score * math.exp(-DECAY_RATE * (now - updated_at).total_seconds())
+
+
+def view_bucket():
+    return int(time.time() // VIEW_BUCKET_SECONDS)
+
+
+def bucket_key(bucket, name):
+    return f'news:views:{bucket}:{name}'
+
+
+def record_view(news_id):
+    """
+    Учитывает просмотр в буфере кеша. Первый просмотр новости в интервале дописывает её id
+    в список интервала (size — длина списка, slot:N — id), остальные только увеличивают счётчик.
+    """
+    bucket = view_bucket()
+    key = bucket_key(bucket, f'count:{news_id}')
+    if not cache.add(key, 1, VIEW_BUFFER_TIMEOUT):
+        cache.incr(key)
+        return
+    size_key = bucket_key(bucket, 'size')
+    cache.add(size_key, 0, VIEW_BUFFER_TIMEOUT)
+    slot = cache.incr(size_key)
+    cache.set(bucket_key(bucket, f'slot:{slot}'), news_id, VIEW_BUFFER_TIMEOUT)
+
+
+def flush_views():
+    """
+    Переносит в базу просмотры закрытых интервалов. Текущий и предыдущий интервалы не трогаются,
+    чтобы не разойтись с запросами, которые ещё дописывают их. Каждый интервал забирает один
+    процесс. Возвращает число перенесённых просмотров.
+    """
+    current = view_bucket()
+    oldest = current - VIEW_BUFFER_TIMEOUT // VIEW_BUCKET_SECONDS
+    last = cache.get(VIEWS_FLUSHED_KEY)
+    buckets = range(oldest if last is None else max(last + 1, oldest), current - 1)
+    sizes = cache.get_many([bucket_key(bucket, 'size') for bucket in buckets])
+
+    flushed = 0
+    for bucket in buckets:
+        size = sizes.get(bucket_key(bucket, 'size'))
+        if size and cache.add(bucket_key(bucket, 'flushed'), True, VIEW_BUFFER_TIMEOUT):
+            pending = read_bucket(bucket, size)
+            ended_at = datetime.fromtimestamp((bucket + 1) * VIEW_BUCKET_SECONDS, tz=dt_timezone.utc)
+            write_views(pending, ended_at)
+            flushed += sum(pending.values())
+    if buckets:
+        cache.set(VIEWS_FLUSHED_KEY, buckets[-1], None)
+    return flushed
+
+
+def read_bucket(bucket, size):
+    """{id новости: просмотры} интервала; ключи интервала удаляются."""
+    slot_keys = [bucket_key(bucket, f'slot:{slot}') for slot in range(1, size + 1)]
+    news_ids = set(cache.get_many(slot_keys).values())
+    count_keys = {bucket_key(bucket, f'count:{news_id}'): news_id for news_id in news_ids}
+    counts = cache.get_many(count_keys)
+    cache.delete_many([*slot_keys, *count_keys, bucket_key(bucket, 'size')])
+    return {count_keys[key]: count for key, count in counts.items() if count}
+
+
+def write_views(pending, now):
+    """Записывает просмотры {id новости: число} на момент now одной транзакцией."""
+    if not pending:
+        return
+    today = now.date()
+    by_count = defaultdict(list)
+    for news_id, count in pending.items():
+        by_count[count].append(news_id)
+
+    with transaction.atomic():
+        existing_news = set(News.objects.filter(id__in=pending).values_list('id', flat=True))
+        for count, ids in by_count.items():
+            News.objects.filter(id__in=ids).update(views=F('views') + count)
+            NewsDailyViews.objects.filter(news_id__in=ids, date=today).update(views=F('views') + count)
+
+        has_daily = set(NewsDailyViews.objects.filter(news_id__in=existing_news, date=today)
+                        .values_list('news_id', flat=True))
+        NewsDailyViews.objects.bulk_create(
+            [NewsDailyViews(news_id=news_id, date=today, views=pending[news_id])
+             for news_id in existing_news - has_daily],
+            ignore_conflicts=True,
+        )
+
+        scores = NewsTrending.objects.select_for_update().in_bulk(existing_news)
+        for news_id, row in scores.items():
+            row.score = decayed_score(row.score, row.score_updated_at, now) + pending[news_id]
+            row.score_updated_at = now
+        NewsTrending.objects.bulk_update(scores.values(), ['score', 'score_updated_at'])
+        NewsTrending.objects.bulk_create(
+            [NewsTrending(news_id=news_id, score=pending[news_id], score_updated_at=now)
+             for news_id in existing_news - scores.keys()],
+            ignore_conflicts=True,
+        )
+
+
+def refresh_rankings(limit=RANKING_LIMIT):
+    """Пересчитывает оба рейтинга и кладёт списки id в кеш."""
+    now = timezone.now()
+    rows = NewsTrending.objects.filter(
+        score_updated_at__gte=now - SCORE_WINDOW,
+        news__is_published=True,
+        news__published_at__lte=now,
+    ).values_list('news_id', 'score', 'score_updated_at')
+    trending = [news_id for _, news_id in heapq.nlargest(
+        limit, ((decayed_score(score, updated_at, now), news_id) for news_id, score, updated_at in rows)
+    )]
+
+    weekly = list(
+        NewsDailyViews.objects.filter(
+            date__gt=now.date() - timedelta(days=7),
+            news__is_published=True,
+            news__published_at__lte=now,
+        ).values('news_id').annotate(total=Sum('views')).order_by('-total', '-news_id')
+        .values_list('news_id', flat=True)[:limit]
+    )
+
+    cache.set_many({TRENDING_CACHE_KEY: trending, WEEKLY_CACHE_KEY: weekly}, RANKING_TIMEOUT)
+    return trending, weekly
+
+
+def get_trending_ids():
+    ids = cache.get(TRENDING_CACHE_KEY)
+    if ids is None:
+        ids, _ = refresh_rankings()
+    return ids
+
+
+def get_weekly_ids():
+    ids = cache.get(WEEKLY_CACHE_KEY)
+    if ids is None:
+        _, ids = refresh_rankings()
+    return ids
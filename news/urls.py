@@ -1,4 +1,6 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from .feeds import news_feed
 from .views import NewsViewSet, CommentViewSet, NewsShortViewSet, CommentCreateViewSet, NewsCreateViewSet, \
     NewsAdminViewSet
 
@@ -10,3 +12,7 @@ router.register('news_admin', NewsAdminViewSet, basename='NewsAdminViewSet')
 router.register('news_short', NewsShortViewSet, basename='news_short')
 router.register(r'comments', CommentViewSet, basename='comments')
 router.register(r'commentsCreate', CommentCreateViewSet, basename='commentsCreate')
+
+urlpatterns = [
+    path('feeds/<str:lang>/<str:category>/<str:feed_format>/', news_feed, name='news-feed'),
+]
@@ -2,14 +2,18 @@ import logging
 from django.utils import timezone
 from django.shortcuts import render
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import LimitOffsetPagination
+from django.db import transaction
+from rest_framework.pagination import LimitOffsetPagination, CursorPagination
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import viewsets
-from .models import News, Comment
-from .serializers import (NewsSerializer, NewsCreateSerializer,
-                          CommentSerializer, NewsShortSerializer, CommentCreateSerializer)
+from .models import News, Comment, NewsRelated, VoteComment
+from .serializers import (NewsSerializer, NewsCreateSerializer, CommentSerializer, NewsShortSerializer,
+                          CommentCreateSerializer, CommentThreadSerializer, VoteSerializer)
 from .filters import NewsFilter, CommentFilter, SubscriberFilter
+from .trending import record_view, get_trending_ids, get_weekly_ids
 
 logger = logging.getLogger('comments')
 
@@ -25,6 +29,13 @@ class NewsPagination(LimitOffsetPagination):
         return super().paginate_queryset(queryset, request, view)
 
 
+class CommentThreadPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = '-id'
+
+
 class NewsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                   mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = News.objects.all()
@@ -55,11 +66,47 @@ class NewsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.views += 1  # Увеличиваем количество просмотров
-        instance.save()
+        # Просмотр копится в буфере кеша, в базу его переносит задача flush_news_views
+        record_view(instance.pk)
+        instance.views += 1
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def _short_list(self, news_ids):
+        """Сериализует новости в порядке news_ids облегчённым NewsShortSerializer."""
+        news = News.objects.prefetch_related('translations', 'covers').in_bulk(news_ids)
+        serializer = NewsShortSerializer([news[news_id] for news_id in news_ids if news_id in news], many=True,
+                                         context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='trending')
+    def trending(self, request):
+        """Новости с наибольшим затухающим счётом просмотров (период полураспада — сутки)."""
+        return self._short_list(get_trending_ids())
+
+    @action(detail=False, methods=['get'], url_path='most-read-this-week')
+    def most_read_this_week(self, request):
+        return self._short_list(get_weekly_ids())
+
+    @action(detail=True, methods=['get'], url_path='comments')
+    def comments(self, request, pk=None):
+        """Ветка комментариев новости с курсорной пагинацией, новые сверху."""
+        queryset = Comment.objects.filter(news_id=pk)
+        paginator = CommentThreadPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = CommentThreadSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='related')
+    def related(self, request, pk=None):
+        """Похожие новости из предрассчитанного индекса NewsRelated."""
+        related_ids = list(NewsRelated.objects.filter(
+            news_id=pk,
+            related__is_published=True,
+            related__published_at__lte=timezone.now(),
+        ).values_list('related_id', flat=True))
+        return self._short_list(related_ids)
+
 
 class NewsAdminViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                        mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
@@ -121,6 +168,34 @@ class CommentViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retr
                      mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CommentFilter
+    pagination_class = NewsPagination
+
+    @action(detail=True, methods=['post'], url_path='vote', permission_classes=[IsAuthenticated])
+    def vote(self, request, pk=None):
+        """
+        Голос текущего пользователя за комментарий. Повторный голос того же типа снимает его,
+        голос другого типа заменяет предыдущий. Счётчики обновляются сигналами.
+        """
+        comment = self.get_object()
+        serializer = VoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        vote_type = serializer.validated_data['vote_type']
+
+        with transaction.atomic():
+            # get_or_create сам обрабатывает одновременный первый голос (IntegrityError по уникальности)
+            vote, created = VoteComment.objects.select_for_update().get_or_create(
+                user_id=request.user, comment=comment, defaults={'vote_type': vote_type})
+            if not created and vote.vote_type == vote_type:
+                vote.delete()
+            elif not created:
+                vote.vote_type = vote_type
+                vote.save()
+
+        comment.refresh_from_db(fields=['upvotes', 'downvotes'])
+        return Response({'id': comment.id, 'upvotes': comment.upvotes, 'downvotes': comment.downvotes,
+                         'score': comment.score})
 
 
 class CommentCreateViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
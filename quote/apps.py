@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class QuoteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quote'
+
+    def ready(self):
+        import quote.signals
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ADM_back.catalogs import invalidate_catalog
+from .models import Quote, QuoteTranslation
+
+
+@receiver([post_save, post_delete], sender=Quote)
+@receiver([post_save, post_delete], sender=QuoteTranslation)
+def invalidate_catalog_on_change(sender, **kwargs):
+    # Версия меняется после коммита: снимок не соберётся из незакоммиченных строк
+    transaction.on_commit(lambda: invalidate_catalog('quotes'))
@@ -3,6 +3,8 @@ from rest_framework import mixins, viewsets
 from rest_framework import viewsets
 from .models import Quote, QuoteTranslation
 from django_filters.rest_framework import DjangoFilterBackend
+
+from ADM_back.catalogs import CatalogViewMixin
 from .filters import QuoteFilter
 from .serializers import QuoteSerializer, QuoteTranslationSerializer, QuoteCreateSerializer
 
@@ -11,10 +13,11 @@ class QuoteCreateViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.
     queryset = Quote.objects.all()
     serializer_class = QuoteCreateSerializer
 
-class QuoteViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class QuoteViewSet(CatalogViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                    mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
-    queryset = Quote.objects.all()
+    queryset = Quote.objects.prefetch_related('translations')
     serializer_class = QuoteSerializer
+    catalog_name = 'quotes'
 
     filter_backends = [DjangoFilterBackend]
     filterset_class = QuoteFilter
@@ -1,16 +1,16 @@
 from django.contrib import admin
-from .models import Repair, RepairTask, RepairStartMedia, RepairCompletionMedia, RepairDelayReason, RepairDelayMedia, TaskDelayReason, TaskDelayMedia, RepairTaskMedia
+from .models import Repair, RepairTask, RepairStartMedia, RepairCompletionMedia, RepairDelayReason, RepairDelayMedia, TaskDelayReason, TaskDelayMedia, RepairTaskMedia, RepairRollup, RepairOverdueEvent
 
 @admin.register(Repair)
 class RepairAdmin(admin.ModelAdmin):
-    list_display = ['name', 'address', 'status', 'start_date', 'end_date']
-    list_filter = ['status', 'repair_type']
+    list_display = ['name', 'address', 'status', 'start_date', 'end_date', 'is_overdue']
+    list_filter = ['status', 'repair_type', 'is_overdue']
     search_fields = ['name', 'address']
 
 @admin.register(RepairTask)
 class RepairTaskAdmin(admin.ModelAdmin):
-    list_display = ['name', 'repair', 'status', 'due_date']
-    list_filter = ['status', 'task_type']
+    list_display = ['name', 'repair', 'status', 'due_date', 'is_overdue']
+    list_filter = ['status', 'task_type', 'is_overdue']
     search_fields = ['name']
 
 admin.site.register(RepairStartMedia)
@@ -19,4 +19,16 @@ admin.site.register(RepairDelayReason)
 admin.site.register(RepairDelayMedia)
 admin.site.register(TaskDelayReason)
 admin.site.register(TaskDelayMedia)
-admin.site.register(RepairTaskMedia)
\ No newline at end of file
+admin.site.register(RepairTaskMedia)
+
+@admin.register(RepairRollup)
+class RepairRollupAdmin(admin.ModelAdmin):
+    list_display = ['month', 'region', 'oblast', 'status', 'repair_type', 'repairs', 'budget', 'completed_budget']
+    list_filter = ['status', 'repair_type', 'month']
+
+
+@admin.register(RepairOverdueEvent)
+class RepairOverdueEventAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'event', 'repair', 'task', 'deadline']
+    list_filter = ['event']
+    raw_id_fields = ['repair', 'task']
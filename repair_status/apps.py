@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RepairStatusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'repair_status'
+
+    def ready(self):
+        import repair_status.signals
@@ -0,0 +1,71 @@
+"""
+Счётчики задач на ремонте: tasks_total, tasks_completed, completed_budget и tasks_overdue.
+
+Вклад задачи — (1, 1 если завершена, бюджет если завершена, 1 если просрочена и не завершена). При сохранении задачи из счётчиков
+ремонта вычитается прежний вклад и прибавляется новый, одним UPDATE через F(); при удалении —
+вычитается. Та же разница попадает в сводку дашборда (rollups.py). recompute_counters
+пересчитывает всё по таблице задач.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Repair, RepairTask
+from .rollups import apply_task_delta
+
+COMPLETED = 'completed'
+
+
+def task_contribution(status, budget, is_overdue):
+    completed = status == COMPLETED
+    return 1, int(completed), (budget or 0) if completed else 0, int(is_overdue and not completed)
+
+
+def apply_contribution(repair_id, contribution, sign=1):
+    total, completed, budget, overdue = contribution
+    if not repair_id or not (total or completed or budget or overdue):
+        return
+    updated = Repair.objects.filter(pk=repair_id).update(
+        tasks_total=F('tasks_total') + sign * total,
+        tasks_completed=F('tasks_completed') + sign * completed,
+        completed_budget=F('completed_budget') + sign * budget,
+        tasks_overdue=F('tasks_overdue') + sign * overdue,
+    )
+    if updated:
+        apply_task_delta(repair_id, sign * total, sign * completed, sign * budget, sign * overdue)
+
+
+def apply_task_change(previous, current):
+    """previous, current — (repair_id, status, budget, is_overdue) до и после сохранения; None, если задачи не было."""
+    if previous == current:
+        return
+    if previous and current and previous[0] == current[0]:
+        before = task_contribution(*previous[1:])
+        after = task_contribution(*current[1:])
+        apply_contribution(current[0], tuple(new - old for new, old in zip(after, before)))
+        return
+    if previous:
+        apply_contribution(previous[0], task_contribution(*previous[1:]), sign=-1)
+    if current:
+        apply_contribution(current[0], task_contribution(*current[1:]))
+
+
+def recompute_counters(queryset=None):
+    """Пересчитывает счётчики ремонтов одним UPDATE по подзапросам. Возвращает число ремонтов."""
+    queryset = Repair.objects.all() if queryset is None else queryset
+    tasks = RepairTask.objects.filter(repair=OuterRef('pk')).order_by().values('repair')
+    completed = Q(status=COMPLETED)
+    return queryset.update(
+        tasks_total=Coalesce(Subquery(tasks.annotate(n=Count('pk')).values('n')), Value(0)),
+        tasks_completed=Coalesce(
+            Subquery(tasks.annotate(n=Count('pk', filter=completed)).values('n')), Value(0)),
+        completed_budget=Coalesce(
+            Subquery(tasks.annotate(n=Sum('budget', filter=completed)).values('n')), Value(0)),
+        tasks_overdue=overdue_tasks_subquery(),
+    )
+
+
+def overdue_tasks_subquery():
+    """Число просроченных незавершённых задач ремонта — для UPDATE по Repair."""
+    tasks = RepairTask.objects.filter(repair=OuterRef('pk'), is_overdue=True).exclude(
+        status=COMPLETED).order_by().values('repair')
+    return Coalesce(Subquery(tasks.annotate(n=Count('pk')).values('n')), Value(0))
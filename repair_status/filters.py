@@ -1,6 +1,10 @@
 from django_filters import rest_framework as filters
 from .models import Repair
 
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
 class RepairFilter(filters.FilterSet):
     start_date = filters.DateFromToRangeFilter()
     end_date = filters.DateFromToRangeFilter()
@@ -11,18 +15,35 @@ class RepairFilter(filters.FilterSet):
         method='filter_repair_type'  # Кастомный метод фильтрации
     )
     name = filters.CharFilter(lookup_expr='icontains')
-    region = filters.CharFilter(lookup_expr='icontains')
-    oblast = filters.CharFilter(lookup_expr='icontains')
+    # Справочники ADM: ?oblast_id=1,2 и ?city_id=5. Старые ?oblast= и ?region= принимают и id, и текст
+    oblast_id = NumberInFilter(field_name='oblast_ref_id')
+    city_id = NumberInFilter(field_name='city_ref_id')
+    region = filters.CharFilter(method='filter_location')
+    oblast = filters.CharFilter(method='filter_location')
     description = filters.CharFilter(lookup_expr='icontains')
     address = filters.CharFilter(lookup_expr='icontains')
     mol = filters.CharFilter(lookup_expr='icontains')
     description = filters.CharFilter(lookup_expr='icontains')
     address = filters.CharFilter(lookup_expr='icontains')
+    # progress_value — аннотация RepairViewSet.get_queryset по счётчикам задач
+    progress = filters.RangeFilter(field_name='progress_value')
+    tasks_total = filters.RangeFilter()
+    ordering = filters.OrderingFilter(fields=(
+        'start_date', 'end_date', 'created_at', 'budget', 'tasks_total', 'tasks_completed', 'completed_budget',
+        ('progress_value', 'progress'),
+    ))
 
     class Meta:
         model = Repair
         fields = ['name','region','oblast','description','address','mol', 'description', 'address', 'start_date', 'end_date', 'repair_type', 'floor']
 
+    def filter_location(self, queryset, name, value):
+        ids = value.split(',')
+        if all(part.strip().isdigit() for part in ids):
+            ref = 'oblast_ref_id' if name == 'oblast' else 'city_ref_id'
+            return queryset.filter(**{f'{ref}__in': [int(part) for part in ids]})
+        return queryset.filter(**{f'{name}__icontains': value})
+
     def filter_repair_type(self, queryset, name, value):
         if value:  # Фильтруем только если есть непустое значение
             return queryset.filter(repair_type__in=value)
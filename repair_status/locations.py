@@ -0,0 +1,95 @@
+"""
+Сопоставление текстовых Repair.oblast / Repair.region со справочниками ADM: область — Region,
+регион (город, район) — City.
+
+Названия сравниваются после нормализации: регистр, «ё», знаки препинания и слова вроде «обл.»,
+«г.», «район» не учитываются. Если точного совпадения нет, берётся самое похожее название
+(difflib) с похожестью не ниже MATCH_CUTOFF. Если область найдена, город ищется только среди
+её городов, чтобы oblast_ref и city_ref не противоречили друг другу; иначе — среди всех, и
+область берётся от найденного города.
+"""
+import difflib
+import re
+
+MATCH_CUTOFF = 0.8
+
+NOISE_WORDS = {
+    'область', 'обл', 'облысы', 'город', 'гор', 'г', 'қаласы', 'район', 'р', 'р-н', 'ауданы',
+    'region', 'oblast', 'city',
+}
+
+
+def normalize(name):
+    words = re.sub(r'[^\w\s-]', ' ', (name or '').lower().replace('ё', 'е')).split()
+    return ' '.join(word for word in words if word not in NOISE_WORDS)
+
+
+def best_match(name, candidates):
+    """candidates — {нормализованное название: id}. Возвращает id или None."""
+    key = normalize(name)
+    if not key or not candidates:
+        return None
+    if key in candidates:
+        return candidates[key]
+    close = difflib.get_close_matches(key, candidates, n=1, cutoff=MATCH_CUTOFF)
+    return candidates[close[0]] if close else None
+
+
+class LocationMatcher:
+    """
+    regions — пары (id, название), cities — тройки (id, название, id области).
+    Принимает и значения из исторических моделей, поэтому используется в миграции.
+    """
+
+    def __init__(self, regions, cities):
+        self.regions = {normalize(name): pk for pk, name in regions}
+        self.cities = {}
+        self.cities_by_region = {}
+        for pk, name, region_id in cities:
+            key = normalize(name)
+            self.cities.setdefault(key, pk)
+            self.cities_by_region.setdefault(region_id, {})[key] = pk
+        self.city_region = {pk: region_id for pk, _, region_id in cities}
+
+    @classmethod
+    def from_db(cls, region_model, city_model):
+        """По моделям справочников; в миграции — по историческим."""
+        return cls(region_model.objects.values_list('pk', 'name'),
+                   city_model.objects.values_list('pk', 'name', 'region_id'))
+
+    @classmethod
+    def from_reference(cls):
+        """Из справочников в памяти (ADM_back/reference.py) — без запросов к базе."""
+        from ADM_back.reference import get_reference
+
+        tables = get_reference().tables
+        return cls(((row.id, row.name) for row in tables['regions'].values()),
+                   [(row.id, row.name, row.region_id) for row in tables['cities'].values()])
+
+    def match(self, oblast, region):
+        """(id Region, id City) для текстовых области и региона; None, где не нашлось."""
+        region_id = best_match(oblast, self.regions)
+        if not region:
+            return region_id, None
+        if region_id is not None:
+            # Город из другой области не подставляется: регион считается ненайденным
+            return region_id, best_match(region, self.cities_by_region.get(region_id, {}))
+        city_id = best_match(region, self.cities)
+        return (self.city_region[city_id] if city_id is not None else None), city_id
+
+
+def match_repairs(queryset, matcher):
+    """
+    Проставляет oblast_ref и city_ref ремонтам queryset. Возвращает (сопоставлено, не найдено);
+    в «не найдено» попадают и пары, у которых нашлась только область, а регион — нет.
+    """
+    matched, missing = 0, set()
+    pairs = queryset.order_by().values_list('oblast', 'region').distinct()
+    for oblast, region in pairs:
+        region_id, city_id = matcher.match(oblast, region)
+        if city_id is None and (region_id is None or region):
+            missing.add((oblast or '', region or ''))
+        if region_id is None and city_id is None:
+            continue
+        matched += queryset.filter(oblast=oblast, region=region).update(oblast_ref_id=region_id, city_ref_id=city_id)
+    return matched, sorted(missing)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from repair_status.locations import LocationMatcher, match_repairs
+from repair_status.models import Repair
+
+
+class Command(BaseCommand):
+    help = "Сопоставляет текстовые область и регион ремонтов со справочниками Region и City."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересопоставить все ремонты. По умолчанию — только без ссылок.')
+
+    def handle(self, *args, **options):
+        queryset = Repair.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(oblast_ref__isnull=True, city_ref__isnull=True)
+        matched, missing = match_repairs(queryset, LocationMatcher.from_reference())
+        self.stdout.write(self.style.SUCCESS(f"Сопоставлено ремонтов: {matched}"))
+        for oblast, region in missing:
+            self.stdout.write(self.style.WARNING(f"Не найдено в справочниках: {oblast!r} / {region!r}"))
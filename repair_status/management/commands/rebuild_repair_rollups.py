@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from repair_status.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Пересобирает сводку показателей ремонтов для дашборда (RepairRollup)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Сводка пересобрана: {rows} строк"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from repair_status.counters import recompute_counters
+from repair_status.models import Repair
+from repair_status.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики задач и бюджета на ремонтах по таблице задач."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', type=int, action='append', dest='repairs',
+                            help='id ремонта; можно указать несколько раз. По умолчанию — все ремонты.')
+
+    def handle(self, *args, **options):
+        queryset = Repair.objects.all()
+        if options['repairs']:
+            queryset = queryset.filter(pk__in=options['repairs'])
+        with transaction.atomic():
+            updated = recompute_counters(queryset)
+            # Счётчики изменены в обход сигналов — сводка дашборда пересобирается целиком
+            rollups = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Счётчики пересчитаны: {updated} ремонтов, строк сводки: {rollups}"))
@@ -0,0 +1,150 @@
+"""
+Приём файлов ремонта: фото и видео с объекта, документы, файлы причин задержки.
+
+В запросе файл только записывается в хранилище (потоково, кусками загруженного файла), тип
+определяется по первым байтам, а строки создаются одним bulk_create. Превью для изображений
+и кадр-обложка для видео строятся фоновой задачей process_repair_media; кадр из видео
+извлекается, только если на сервере установлен ffmpeg.
+"""
+import io
+import logging
+import mimetypes
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from ADM_back.celery import delay_on_commit
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+POSTER_TIMEOUT = 60
+
+# Сигнатуры в начале файла: (смещение, байты, тип)
+SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'image'),  # JPEG
+    (0, b'\x89PNG\r\n\x1a\n', 'image'),
+    (0, b'GIF8', 'image'),
+    (8, b'WEBP', 'image'),
+    (4, b'ftypheic', 'image'),
+    (4, b'ftyp', 'video'),  # MP4, MOV, 3GP
+    (0, b'\x1a\x45\xdf\xa3', 'video'),  # WebM, MKV
+    (8, b'AVI ', 'video'),
+)
+
+
+def detect_media_type(upload):
+    """image, video или document — по сигнатуре, затем по Content-Type и расширению."""
+    upload.seek(0)
+    head = upload.read(16)
+    upload.seek(0)
+    for offset, signature, media_type in SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return media_type
+    content_type = getattr(upload, 'content_type', None) or mimetypes.guess_type(upload.name)[0] or ''
+    major = content_type.split('/')[0]
+    return major if major in ('image', 'video') else 'document'
+
+
+def file_field_name(model, media_type):
+    """Поле файла модели: у RepairTaskMedia видео хранится в video, остальное — в image."""
+    field_names = {field.name for field in model._meta.fields}
+    if 'file' in field_names:
+        return 'file'
+    return 'video' if media_type == 'video' else 'image'
+
+
+def ingest_media(model, uploads, **relation):
+    """
+    Сохраняет загруженные файлы в хранилище и создаёт строки model одной вставкой.
+    relation — внешний ключ строки, например repair=repair или task=task. Возвращает созданные объекты.
+    """
+    instances = []
+    for upload in uploads:
+        media_type = detect_media_type(upload)
+        instance = model(media_type=media_type, size=upload.size or 0, **relation)
+        field = model._meta.get_field(file_field_name(model, media_type))
+        name = field.generate_filename(instance, upload.name)
+        setattr(instance, field.attname, field.storage.save(name, upload, max_length=field.max_length))
+        instances.append(instance)
+    if not instances:
+        return []
+
+    model.objects.bulk_create(instances)
+    pks = [instance.pk for instance in instances if instance.media_type in ('image', 'video')]
+    if pks:
+        from .tasks import process_repair_media
+
+        opts = model._meta
+        delay_on_commit(process_repair_media, opts.app_label, opts.object_name, pks)
+    return instances
+
+
+def image_thumbnail(field_file):
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def video_poster(field_file):
+    """Кадр на первой секунде видео, уменьшенный до превью. None, если ffmpeg недоступен или не справился."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, 'source' + os.path.splitext(field_file.name)[1])
+        poster_path = os.path.join(directory, 'poster.jpg')
+        with field_file.open('rb') as source, open(source_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        command = [
+            ffmpeg, '-loglevel', 'error', '-y', '-ss', '1', '-i', source_path, '-frames:v', '1',
+            '-vf', f'scale={THUMBNAIL_SIZE[0]}:-2', poster_path,
+        ]
+        try:
+            subprocess.run(command, check=True, timeout=POSTER_TIMEOUT, capture_output=True)
+            if not os.path.exists(poster_path):
+                # Видео короче секунды — берём первый кадр
+                command[command.index('-ss') + 1] = '0'
+                subprocess.run(command, check=True, timeout=POSTER_TIMEOUT, capture_output=True)
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning("Не удалось получить кадр из %s: %s", field_file.name, e)
+            return None
+        if not os.path.exists(poster_path):
+            return None
+        with open(poster_path, 'rb') as poster:
+            return poster.read()
+
+
+def process_media(instance):
+    """Строит превью для файла и сохраняет его в thumbnail. Возвращает имя превью или None."""
+    field_file = getattr(instance, file_field_name(type(instance), instance.media_type))
+    if not field_file:
+        return None
+    try:
+        if instance.media_type == 'image':
+            content = image_thumbnail(field_file)
+        elif instance.media_type == 'video':
+            content = video_poster(field_file)
+        else:
+            content = None
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning("Не удалось построить превью для %s: %s", field_file.name, e)
+        return None
+    if content is None:
+        return None
+
+    thumbnail_field = instance._meta.get_field('thumbnail')
+    root = os.path.splitext(os.path.basename(field_file.name))[0]
+    name = thumbnail_field.storage.save(thumbnail_field.generate_filename(instance, f'{root}.jpg'),
+                                        ContentFile(content))
+    type(instance).objects.filter(pk=instance.pk).update(thumbnail=name)
+    return name
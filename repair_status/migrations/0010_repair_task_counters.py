@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Repair = apps.get_model('repair_status', 'Repair')
+    RepairTask = apps.get_model('repair_status', 'RepairTask')
+
+    tasks = RepairTask.objects.filter(repair=OuterRef('pk')).order_by().values('repair')
+    completed = Q(status='completed')
+    Repair.objects.update(
+        tasks_total=Coalesce(Subquery(tasks.annotate(n=Count('pk')).values('n')), Value(0)),
+        tasks_completed=Coalesce(
+            Subquery(tasks.annotate(n=Count('pk', filter=completed)).values('n')), Value(0)),
+        completed_budget=Coalesce(
+            Subquery(tasks.annotate(n=Sum('budget', filter=completed)).values('n')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_status', '0009_repair_budget_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repair',
+            name='completed_budget',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='tasks_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:26
+
+from django.db import migrations, models
+
+
+def fill_rollups(apps, schema_editor):
+    Repair = apps.get_model('repair_status', 'Repair')
+    RepairRollup = apps.get_model('repair_status', 'RepairRollup')
+
+    totals = {}
+    for repair in Repair.objects.iterator():
+        key = ((repair.region or '').strip(), (repair.oblast or '').strip(), repair.status, repair.repair_type,
+               repair.start_date.replace(day=1))
+        metrics = (1, repair.budget or 0, repair.completed_budget, repair.tasks_total, repair.tasks_completed)
+        current = totals.get(key, (0, 0, 0, 0, 0))
+        totals[key] = tuple(a + b for a, b in zip(current, metrics))
+    RepairRollup.objects.bulk_create([
+        RepairRollup(region=key[0], oblast=key[1], status=key[2], repair_type=key[3], month=key[4],
+                     repairs=metrics[0], budget=metrics[1], completed_budget=metrics[2],
+                     tasks_total=metrics[3], tasks_completed=metrics[4])
+        for key, metrics in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_status', '0010_repair_task_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepairRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(blank=True, default='', max_length=255)),
+                ('oblast', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(max_length=20)),
+                ('repair_type', models.CharField(max_length=20)),
+                ('month', models.DateField()),
+                ('repairs', models.IntegerField(default=0)),
+                ('budget', models.BigIntegerField(default=0)),
+                ('completed_budget', models.BigIntegerField(default=0)),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='repair_stat_month_712659_idx')],
+                'unique_together': {('region', 'oblast', 'status', 'repair_type', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
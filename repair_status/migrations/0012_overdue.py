@@ -0,0 +1,66 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_status', '0011_repairrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepairOverdueEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('overdue', 'Просрочен'), ('resolved', 'Просрочка снята')], max_length=10)),
+                ('deadline', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='is_overdue',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='tasks_overdue',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairrollup',
+            name='overdue_repairs',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairrollup',
+            name='tasks_overdue',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairtask',
+            name='is_overdue',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddIndex(
+            model_name='repair',
+            index=models.Index(fields=['status', 'end_date'], name='repair_stat_status_23a174_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairtask',
+            index=models.Index(fields=['status', 'due_date'], name='repair_stat_status_f0d7ef_idx'),
+        ),
+        migrations.AddField(
+            model_name='repairoverdueevent',
+            name='repair',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overdue_events', to='repair_status.repair'),
+        ),
+        migrations.AddField(
+            model_name='repairoverdueevent',
+            name='task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='overdue_events', to='repair_status.repairtask'),
+        ),
+    ]
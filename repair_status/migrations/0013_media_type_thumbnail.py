@@ -0,0 +1,111 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:29
+
+import mimetypes
+
+from django.db import migrations, models
+
+MEDIA_MODELS = {
+    'RepairStartMedia': ('file',),
+    'RepairCompletionMedia': ('file',),
+    'RepairDelayMedia': ('file',),
+    'TaskDelayMedia': ('file',),
+    'RepairTaskMedia': ('image', 'video'),
+}
+
+
+def fill_media_type(apps, schema_editor):
+    # Тип уже загруженных файлов — по расширению; содержимое не читаем
+    for model_name, fields in MEDIA_MODELS.items():
+        model = apps.get_model('repair_status', model_name)
+        for media in model.objects.iterator():
+            name = next((getattr(media, field).name for field in fields if getattr(media, field)), '')
+            content_type = mimetypes.guess_type(name)[0] or ''
+            media_type = content_type.split('/')[0] if content_type.split('/')[0] in ('image', 'video') else 'document'
+            if media_type != 'document':
+                model.objects.filter(pk=media.pk).update(media_type=media_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_status', '0012_overdue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repaircompletionmedia',
+            name='media_type',
+            field=models.CharField(choices=[('image', 'Изображение'), ('video', 'Видео'), ('document', 'Документ')], default='document', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='repaircompletionmedia',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repaircompletionmedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='repair_thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='repairdelaymedia',
+            name='media_type',
+            field=models.CharField(choices=[('image', 'Изображение'), ('video', 'Видео'), ('document', 'Документ')], default='document', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='repairdelaymedia',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairdelaymedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='repair_thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='repairstartmedia',
+            name='media_type',
+            field=models.CharField(choices=[('image', 'Изображение'), ('video', 'Видео'), ('document', 'Документ')], default='document', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='repairstartmedia',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairstartmedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='repair_thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='repairtaskmedia',
+            name='media_type',
+            field=models.CharField(choices=[('image', 'Изображение'), ('video', 'Видео'), ('document', 'Документ')], default='document', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='repairtaskmedia',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repairtaskmedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='repair_thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='taskdelaymedia',
+            name='media_type',
+            field=models.CharField(choices=[('image', 'Изображение'), ('video', 'Видео'), ('document', 'Документ')], default='document', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='taskdelaymedia',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskdelaymedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='repair_thumbnails/'),
+        ),
+        migrations.RunPython(fill_media_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from repair_status.locations import LocationMatcher, match_repairs
+
+
+def fill_location_refs(apps, schema_editor):
+    Repair = apps.get_model('repair_status', 'Repair')
+    matcher = LocationMatcher.from_db(apps.get_model('ADM', 'Region'), apps.get_model('ADM', 'City'))
+    match_repairs(Repair.objects.all(), matcher)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ADM', '0007_requesthistory_comment'),
+        ('repair_status', '0013_media_type_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repair',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='repairs', to='ADM.city', verbose_name='Регион (справочник)'),
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='oblast_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='repairs', to='ADM.region', verbose_name='Область (справочник)'),
+        ),
+        migrations.RunPython(fill_location_refs, migrations.RunPython.noop),
+    ]
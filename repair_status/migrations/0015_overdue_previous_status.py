@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_status', '0014_location_refs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repair',
+            name='status_before_overdue',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
@@ -1,4 +1,22 @@
-from django.db import models
+from django.db import models, transaction
+
+
+class MediaFile(models.Model):
+    """Общие поля файлов ремонта: тип и размер определяются при загрузке (repair_status/media.py),
+    превью строит фоновая задача."""
+    MEDIA_TYPES = [
+        ('image', 'Изображение'),
+        ('video', 'Видео'),
+        ('document', 'Документ'),
+    ]
+
+    media_type = models.CharField(max_length=10, choices=MEDIA_TYPES, default='document')
+    size = models.BigIntegerField(default=0)
+    thumbnail = models.ImageField(upload_to='repair_thumbnails/', blank=True, null=True)
+
+    class Meta:
+        abstract = True
+
 
 class Repair(models.Model):
     STATUS_CHOICES = [
@@ -14,6 +32,12 @@ class Repair(models.Model):
     name = models.CharField(max_length=255)
     region = models.CharField(max_length=255, verbose_name="Регион",blank=True, null=True)
     oblast = models.CharField(max_length=255, verbose_name="Область",blank=True, null=True)
+    # Те же область и регион ссылками на справочники ADM; при сохранении сопоставляются
+    # с текстом (repair_status/locations.py)
+    oblast_ref = models.ForeignKey('ADM.Region', on_delete=models.SET_NULL, blank=True, null=True,
+                                   related_name='repairs', verbose_name="Область (справочник)")
+    city_ref = models.ForeignKey('ADM.City', on_delete=models.SET_NULL, blank=True, null=True,
+                                 related_name='repairs', verbose_name="Регион (справочник)")
     description = models.TextField(blank=True, null=True)
     address = models.TextField(verbose_name="Адрес")
     mol = models.CharField(max_length=255, verbose_name="МОЛ", blank=True, null=True)
@@ -27,6 +51,37 @@ class Repair(models.Model):
     mol = models.CharField(max_length=255,blank=True, null=True)
     budget_type = models.CharField(max_length=10, blank=True, null=True)
 
+    # Счётчики по задачам, обновляются сигналами (repair_status/signals.py),
+    # пересчёт — команда recompute_repair_counters
+    tasks_total = models.PositiveIntegerField(default=0)
+    tasks_completed = models.PositiveIntegerField(default=0)
+    completed_budget = models.BigIntegerField(default=0)
+    tasks_overdue = models.PositiveIntegerField(default=0)
+    # Срок end_date прошёл, а ремонт не завершён; выставляется задачей detect_overdue
+    is_overdue = models.BooleanField(default=False, db_index=True)
+    # Статус до перевода в «delayed» при просрочке; возвращается, когда просрочка снята
+    status_before_overdue = models.CharField(max_length=20, blank=True, default='')
+
+    COUNTER_FIELDS = ('tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue')
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'end_date'])]
+
+    def save(self, *args, **kwargs):
+        # Счётчики меняются только через F() в сигналах задач, поэтому сохранение загруженного
+        # ремонта их не перезаписывает. Сводки (repair_status/rollups.py) обновляются в той же транзакции.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     @property
     def delay_reason(self):
         try:
@@ -36,20 +91,14 @@ class Repair(models.Model):
 
     @property
     def progress(self):
-        total_tasks = self.tasks.count()
-        completed_tasks = self.tasks.filter(status='completed').count()
-        return (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        return (self.tasks_completed / self.tasks_total * 100) if self.tasks_total > 0 else 0
 
     @property
     def budget_progress(self):
         """Процент использованного бюджета на завершенные задачи относительно бюджета ремонта."""
-        completed_task_budget = self.tasks.filter(status='completed').aggregate(
-            total_budget=models.Sum('budget')
-        )['total_budget'] or 0
-
         if self.budget is None or self.budget <= 0:
             return 0
-        return (completed_task_budget / self.budget) * 100
+        return (self.completed_budget / self.budget) * 100
 
     def __str__(self):
         return self.name
@@ -62,7 +111,7 @@ class RepairDelayReason(models.Model):
     def __str__(self):
         return f"Delay Reason for {self.repair.name}"
 
-class RepairDelayMedia(models.Model):
+class RepairDelayMedia(MediaFile):
     delay_reason = models.ForeignKey(RepairDelayReason, related_name='media', on_delete=models.CASCADE)
     file = models.FileField(upload_to='repair_delay_files/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -70,7 +119,7 @@ class RepairDelayMedia(models.Model):
     def __str__(self):
         return f"Delay Media for {self.delay_reason}"
 
-class RepairStartMedia(models.Model):
+class RepairStartMedia(MediaFile):
     repair = models.ForeignKey(Repair, related_name='start_media', on_delete=models.CASCADE)
     file = models.FileField(upload_to='repair_start_files/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -78,7 +127,7 @@ class RepairStartMedia(models.Model):
     def __str__(self):
         return f"Start file for {self.repair.name}"
 
-class RepairCompletionMedia(models.Model):
+class RepairCompletionMedia(MediaFile):
     repair = models.ForeignKey(Repair, related_name='completion_media', on_delete=models.CASCADE)
     file = models.FileField(upload_to='repair_completion_files/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -108,7 +157,20 @@ class RepairTask(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     budget = models.IntegerField(blank=True, null=True)
     mol = models.CharField(max_length=255, blank=True, null=True)
+    # Срок due_date прошёл, а задача не завершена; выставляется задачей detect_overdue
+    is_overdue = models.BooleanField(default=False, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'due_date'])]
 
+    # Сигналы обновляют счётчики ремонта в той же транзакции, что и саму задачу
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     @property
     def delay_reason(self):
@@ -128,7 +190,7 @@ class TaskDelayReason(models.Model):
     def __str__(self):
         return f"Delay Reason for {self.task.name}"
 
-class TaskDelayMedia(models.Model):
+class TaskDelayMedia(MediaFile):
     delay_reason = models.ForeignKey(TaskDelayReason, related_name='media', on_delete=models.CASCADE)
     file = models.FileField(upload_to='task_delay_files/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -136,11 +198,55 @@ class TaskDelayMedia(models.Model):
     def __str__(self):
         return f"Delay Media for {self.delay_reason}"
 
-class RepairTaskMedia(models.Model):
+class RepairTaskMedia(MediaFile):
     task = models.ForeignKey(RepairTask, related_name='media', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='repair_images/', blank=True, null=True)
     video = models.FileField(upload_to='repair_videos/', blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Media for {self.task.name}"
\ No newline at end of file
+        return f"Media for {self.task.name}"
+
+class RepairRollup(models.Model):
+    """
+    Предагрегированные показатели ремонтов по (регион, область, статус, тип, месяц начала).
+    Обновляется инкрементально (repair_status/rollups.py), пересборка — команда rebuild_repair_rollups.
+    """
+    region = models.CharField(max_length=255, blank=True, default='')
+    oblast = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=20)
+    repair_type = models.CharField(max_length=20)
+    month = models.DateField()
+
+    repairs = models.IntegerField(default=0)
+    budget = models.BigIntegerField(default=0)
+    completed_budget = models.BigIntegerField(default=0)
+    tasks_total = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    overdue_repairs = models.IntegerField(default=0)
+    tasks_overdue = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('region', 'oblast', 'status', 'repair_type', 'month')
+        indexes = [models.Index(fields=['month'])]
+
+    def __str__(self):
+        return f"{self.region} / {self.oblast} / {self.status} / {self.repair_type} / {self.month:%Y-%m}"
+
+
+class RepairOverdueEvent(models.Model):
+    """Журнал просрочек: когда ремонт или задача стали просроченными и когда просрочка снята."""
+    EVENTS = [
+        ('overdue', 'Просрочен'),
+        ('resolved', 'Просрочка снята'),
+    ]
+
+    repair = models.ForeignKey(Repair, related_name='overdue_events', on_delete=models.CASCADE)
+    task = models.ForeignKey(RepairTask, related_name='overdue_events', on_delete=models.CASCADE,
+                             blank=True, null=True)
+    event = models.CharField(max_length=10, choices=EVENTS)
+    deadline = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.get_event_display()}: {self.task or self.repair} ({self.deadline})"
@@ -0,0 +1,98 @@
+"""
+Поиск просроченных ремонтов и задач.
+
+Ремонт просрочен, если end_date прошла, а он не завершён: ему ставится is_overdue и статус
+«delayed», прежний статус запоминается в status_before_overdue. Задача просрочена, если прошла
+due_date, а она не завершена. Флаг снимается, когда объект завершён или срок перенесён; ремонту,
+который всё ещё в «delayed», возвращается прежний статус. Все изменения — несколько UPDATE по индексам
+(status, end_date) и (status, due_date); счётчики просроченных задач на ремонтах и сводка
+дашборда пересчитываются только для затронутых ремонтов. Каждое изменение флага записывается
+в RepairOverdueEvent.
+"""
+import logging
+from zoneinfo import ZoneInfo
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .counters import COMPLETED, overdue_tasks_subquery
+from .models import Repair, RepairTask, RepairOverdueEvent
+from .rollups import apply_repair_changes, repair_states
+
+logger = logging.getLogger(__name__)
+
+# Сроки считаются по дате в Казахстане, а не по UTC сервера
+OVERDUE_TIME_ZONE = ZoneInfo('Asia/Almaty')
+DELAYED = 'delayed'
+IN_PROGRESS = 'in_progress'
+
+
+def detect_overdue(today=None):
+    """Выставляет и снимает флаги просрочки. Возвращает число изменений по видам."""
+    today = today or timezone.localdate(timezone=OVERDUE_TIME_ZONE)
+    not_completed = ~Q(status=COMPLETED)
+
+    with transaction.atomic():
+        repairs_overdue = list(Repair.objects.select_for_update().filter(
+            not_completed, end_date__lt=today, is_overdue=False).values_list('pk', 'end_date'))
+        repairs_resolved = list(Repair.objects.select_for_update().filter(
+            Q(status=COMPLETED) | Q(end_date__gte=today), is_overdue=True).values_list('pk', 'end_date'))
+        tasks_overdue = list(RepairTask.objects.select_for_update().filter(
+            not_completed, due_date__lt=today, is_overdue=False).values_list('pk', 'repair_id', 'due_date'))
+        tasks_resolved = list(RepairTask.objects.select_for_update().filter(
+            Q(status=COMPLETED) | Q(due_date__gte=today), is_overdue=True).values_list('pk', 'repair_id', 'due_date'))
+
+        changed_tasks = tasks_overdue + tasks_resolved
+        affected = ({pk for pk, _ in repairs_overdue + repairs_resolved}
+                    | {repair_id for _, repair_id, _ in changed_tasks})
+        if not affected:
+            return {'repairs_overdue': 0, 'repairs_resolved': 0, 'tasks_overdue': 0, 'tasks_resolved': 0}
+        before = repair_states(affected)
+
+        if repairs_overdue:
+            # В UPDATE F('status') — значение до изменения
+            Repair.objects.filter(pk__in=[pk for pk, _ in repairs_overdue]).update(
+                is_overdue=True, status=DELAYED, status_before_overdue=F('status'))
+        if repairs_resolved:
+            # Статус, изменённый вручную во время просрочки, не трогаем
+            Repair.objects.filter(pk__in=[pk for pk, _ in repairs_resolved]).update(
+                is_overdue=False,
+                status=Case(
+                    When(status=DELAYED, status_before_overdue='', then=Value(IN_PROGRESS)),
+                    When(status=DELAYED, then=F('status_before_overdue')),
+                    default=F('status'),
+                ),
+                status_before_overdue='',
+            )
+        if tasks_overdue:
+            RepairTask.objects.filter(pk__in=[pk for pk, _, _ in tasks_overdue]).update(is_overdue=True)
+        if tasks_resolved:
+            RepairTask.objects.filter(pk__in=[pk for pk, _, _ in tasks_resolved]).update(is_overdue=False)
+        if changed_tasks:
+            Repair.objects.filter(pk__in={repair_id for _, repair_id, _ in changed_tasks}).update(
+                tasks_overdue=overdue_tasks_subquery())
+
+        after = repair_states(affected)
+        apply_repair_changes((before.get(repair_id), after.get(repair_id)) for repair_id in affected)
+
+        RepairOverdueEvent.objects.bulk_create(
+            [RepairOverdueEvent(repair_id=pk, event='overdue', deadline=deadline)
+             for pk, deadline in repairs_overdue]
+            + [RepairOverdueEvent(repair_id=pk, event='resolved', deadline=deadline)
+               for pk, deadline in repairs_resolved]
+            + [RepairOverdueEvent(repair_id=repair_id, task_id=pk, event='overdue', deadline=deadline)
+               for pk, repair_id, deadline in tasks_overdue]
+            + [RepairOverdueEvent(repair_id=repair_id, task_id=pk, event='resolved', deadline=deadline)
+               for pk, repair_id, deadline in tasks_resolved],
+            batch_size=1000,
+        )
+
+    result = {
+        'repairs_overdue': len(repairs_overdue),
+        'repairs_resolved': len(repairs_resolved),
+        'tasks_overdue': len(tasks_overdue),
+        'tasks_resolved': len(tasks_resolved),
+    }
+    logger.info("Просрочки на %s: %s", today, result)
+    return result
@@ -0,0 +1,123 @@
+"""
+План задач ремонта целиком: создание многих задач и смена статуса многих задач одним запросом.
+
+План приходит JSON-массивом или файлом CSV / XLSX с заголовками по полям задачи (name, task_type,
+due_date, status, budget, description, mol). Все строки проверяются до записи; если ошибка есть
+хоть в одной, ничего не создаётся. Задачи вставляются одним bulk_create, а массовая смена
+статуса — одним UPDATE. Сигналы при этом не срабатывают, поэтому счётчики затронутых ремонтов
+пересчитываются один раз по таблице задач, а в сводку дашборда записывается итоговая разница.
+Задачи, срок которых уже прошёл, создаются сразу просроченными, не дожидаясь detect_overdue.
+"""
+import csv
+import datetime
+import io
+import zipfile
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .counters import COMPLETED, recompute_counters
+from .models import Repair, RepairTask, RepairOverdueEvent
+from .overdue import OVERDUE_TIME_ZONE
+from .rollups import apply_repair_changes, repair_states
+
+MAX_PLAN_TASKS = 1000
+
+
+def read_csv(upload):
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        return list(csv.DictReader(text, dialect=dialect))
+    finally:
+        # Не даём обёртке закрыть загруженный файл
+        text.detach()
+
+
+def read_xlsx(upload):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ValidationError({"file": "Загрузка XLSX недоступна на сервере, используйте CSV."})
+    try:
+        # Лист читается лениво, поэтому повреждённый файл может проявиться и при чтении строк
+        return read_sheet(load_workbook(upload, read_only=True, data_only=True).active)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError):
+        raise ValidationError({"file": "Файл повреждён или не является XLSX."})
+
+
+def read_sheet(sheet):
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+    result = []
+    for values in rows:
+        row = {}
+        for name, value in zip(header, values):
+            # В ячейках с датой openpyxl отдаёт datetime
+            if isinstance(value, datetime.datetime):
+                value = value.date()
+            row[name] = value
+        result.append(row)
+    return result
+
+
+def read_plan(upload):
+    """Строки плана из файла: список словарей {поле: значение}."""
+    if upload.name.lower().endswith(('.xlsx', '.xlsm')):
+        rows = read_xlsx(upload)
+    else:
+        try:
+            rows = read_csv(upload)
+        except UnicodeDecodeError:
+            raise ValidationError({"file": "CSV должен быть в кодировке UTF-8."})
+    return [
+        {key.strip(): value for key, value in row.items() if key and value not in ('', None)}
+        for row in rows
+        if any(value not in ('', None) for value in row.values())
+    ]
+
+
+def refresh_repairs(repair_ids, change):
+    """Выполняет change() и один раз пересчитывает счётчики и сводку для repair_ids."""
+    before = repair_states(repair_ids)
+    result = change()
+    recompute_counters(Repair.objects.filter(pk__in=repair_ids))
+    after = repair_states(repair_ids)
+    apply_repair_changes((before.get(pk), after.get(pk)) for pk in repair_ids)
+    return result
+
+
+def create_tasks(repair, rows):
+    """Создаёт задачи ремонта из проверенных строк. Возвращает созданные задачи."""
+    today = timezone.localdate(timezone=OVERDUE_TIME_ZONE)
+    tasks = [RepairTask(repair=repair, **row) for row in rows]
+    for task in tasks:
+        task.is_overdue = task.due_date < today and task.status != COMPLETED
+    with transaction.atomic():
+        list(Repair.objects.select_for_update().filter(pk=repair.pk).values_list('pk'))
+        tasks = refresh_repairs([repair.pk], lambda: RepairTask.objects.bulk_create(tasks, batch_size=500))
+        RepairOverdueEvent.objects.bulk_create(
+            [RepairOverdueEvent(repair_id=repair.pk, task_id=task.pk, event='overdue', deadline=task.due_date)
+             for task in tasks if task.is_overdue],
+            batch_size=1000,
+        )
+        return tasks
+
+
+def set_tasks_status(task_ids, status):
+    """Ставит статус задачам task_ids. Возвращает число изменённых задач."""
+    with transaction.atomic():
+        queryset = RepairTask.objects.select_for_update().filter(pk__in=task_ids).exclude(status=status)
+        changed = list(queryset.values_list('pk', 'repair_id'))
+        if not changed:
+            return 0
+        repair_ids = sorted({repair_id for _, repair_id in changed})
+        return refresh_repairs(repair_ids, lambda: RepairTask.objects.filter(
+            pk__in=[pk for pk, _ in changed]).update(status=status))
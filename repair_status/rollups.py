@@ -0,0 +1,130 @@
+"""
+Сводные показатели ремонтов для дашборда (RepairRollup).
+
+Строка сводки — ключ (регион, область, статус, тип, месяц начала) и суммы по ремонтам с этим
+ключом: число ремонтов, бюджет, бюджет завершённых задач, число задач и завершённых задач,
+число просроченных ремонтов и задач.
+Вклад ремонта пересчитывается при его сохранении и удалении (repair_status/signals.py), вклад
+задач — вместе со счётчиками ремонта (repair_status/counters.py). Дашборд читает только сводку,
+поэтому время ответа не зависит от количества ремонтов.
+"""
+from django.db.models import F, Sum
+
+from .models import Repair, RepairRollup
+
+DIMENSIONS = ('region', 'oblast', 'status', 'repair_type', 'month')
+METRICS = ('repairs', 'budget', 'completed_budget', 'tasks_total', 'tasks_completed', 'overdue_repairs',
+           'tasks_overdue')
+STATE_FIELDS = ('region', 'oblast', 'status', 'repair_type', 'start_date', 'budget', 'is_overdue',
+                'tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue')
+
+
+def rollup_key(region, oblast, status, repair_type, start_date):
+    return (
+        (region or '').strip(),
+        (oblast or '').strip(),
+        status,
+        repair_type,
+        start_date.replace(day=1),
+    )
+
+
+def repair_state(region, oblast, status, repair_type, start_date, budget, is_overdue,
+                 tasks_total, tasks_completed, completed_budget, tasks_overdue):
+    """(ключ сводки, показатели) — вклад одного ремонта."""
+    key = rollup_key(region, oblast, status, repair_type, start_date)
+    overdue = int(is_overdue and status != 'completed')
+    return key, (1, budget or 0, completed_budget, tasks_total, tasks_completed, overdue, tasks_overdue)
+
+
+def stored_repair_state(repair_id):
+    """Вклад ремонта по данным в базе или None."""
+    row = Repair.objects.filter(pk=repair_id).values_list(*STATE_FIELDS).first()
+    return repair_state(*row) if row else None
+
+
+def repair_states(repair_ids):
+    """{id ремонта: вклад} по данным в базе."""
+    return {
+        row[0]: repair_state(*row[1:])
+        for row in Repair.objects.filter(pk__in=repair_ids).values_list('pk', *STATE_FIELDS)
+    }
+
+
+def instance_repair_state(repair, counters):
+    """Вклад ремонта по объекту; счётчики задач передаются отдельно, в объекте они могут устареть."""
+    return repair_state(repair.region, repair.oblast, repair.status, repair.repair_type,
+                        repair.start_date, repair.budget, repair.is_overdue, *counters)
+
+
+def apply_rollup(key, metrics, sign=1):
+    if not any(metrics):
+        return
+    rollup, _ = RepairRollup.objects.get_or_create(**dict(zip(DIMENSIONS, key)))
+    RepairRollup.objects.filter(pk=rollup.pk).update(**{
+        name: F(name) + sign * value for name, value in zip(METRICS, metrics) if value
+    })
+
+
+def apply_repair_changes(changes):
+    """
+    changes — пары (было, стало), каждое — (ключ, показатели) или None, если ремонта не было.
+    Разницы суммируются по ключам, на каждую затронутую строку сводки — один UPDATE.
+    """
+    deltas = {}
+    for previous, current in changes:
+        for state, sign in ((previous, -1), (current, 1)):
+            if state:
+                key, metrics = state
+                total = deltas.get(key, (0,) * len(METRICS))
+                deltas[key] = tuple(a + sign * b for a, b in zip(total, metrics))
+    for key, metrics in deltas.items():
+        apply_rollup(key, metrics)
+
+
+def apply_repair_change(previous, current):
+    if previous != current:
+        apply_repair_changes([(previous, current)])
+
+
+def apply_task_delta(repair_id, tasks_total, tasks_completed, completed_budget, tasks_overdue):
+    """Изменение счётчиков задач ремонта в его строке сводки."""
+    state = stored_repair_state(repair_id)
+    if state:
+        apply_rollup(state[0], (0, 0, completed_budget, tasks_total, tasks_completed, 0, tasks_overdue))
+
+
+def rebuild_rollups():
+    """Пересобирает сводку по всем ремонтам. Возвращает число строк."""
+    totals = {}
+    for row in Repair.objects.values_list(*STATE_FIELDS).iterator():
+        key, metrics = repair_state(*row)
+        current = totals.get(key, (0,) * len(METRICS))
+        totals[key] = tuple(a + b for a, b in zip(current, metrics))
+    RepairRollup.objects.all().delete()
+    RepairRollup.objects.bulk_create([
+        RepairRollup(**dict(zip(DIMENSIONS, key)), **dict(zip(METRICS, metrics)))
+        for key, metrics in totals.items()
+    ], batch_size=1000)
+    return len(totals)
+
+
+def with_ratios(row):
+    row['budget_utilization'] = round(row['completed_budget'] / row['budget'] * 100, 2) if row['budget'] > 0 else 0
+    row['progress'] = round(row['tasks_completed'] / row['tasks_total'] * 100, 2) if row['tasks_total'] > 0 else 0
+    return row
+
+
+def dashboard(group_by, filters):
+    """Показатели по выбранным измерениям и итог. filters — {измерение или month__gte/lte: значение}."""
+    queryset = RepairRollup.objects.filter(**filters)
+    sums = {name: Sum(name) for name in METRICS}
+    totals = {name: value or 0 for name, value in queryset.aggregate(**sums).items()}
+    groups = []
+    if group_by:
+        for row in queryset.values(*group_by).annotate(**sums).order_by(*group_by):
+            if row['repairs'] or row['tasks_total']:
+                if 'month' in row:
+                    row['month'] = row['month'].strftime('%Y-%m')
+                groups.append(with_ratios(row))
+    return {'totals': with_ratios(totals), 'groups': groups}
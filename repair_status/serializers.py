@@ -1,15 +1,16 @@
 from rest_framework import serializers
+from .media import ingest_media
 from .models import RepairTask, RepairTaskMedia, Repair, RepairDelayReason, RepairStartMedia, RepairCompletionMedia, TaskDelayReason, RepairDelayMedia, TaskDelayMedia
 
 class RepairTaskMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = RepairTaskMedia
-        fields = ['id', 'image', 'video', 'uploaded_at']
+        fields = ['id', 'image', 'video', 'media_type', 'size', 'thumbnail', 'uploaded_at']
 
 class TaskDelayMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = TaskDelayMedia
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'file', 'media_type', 'size', 'thumbnail', 'uploaded_at']
 
 class TaskDelayReasonSerializer(serializers.ModelSerializer):
     media = TaskDelayMediaSerializer(many=True, read_only=True)
@@ -22,32 +23,41 @@ class TaskDelayReasonSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         delay_files = validated_data.pop('delay_files', [])
         delay_reason = TaskDelayReason.objects.create(**validated_data)
-        for file in delay_files:
-            TaskDelayMedia.objects.create(delay_reason=delay_reason, file=file)
+        ingest_media(TaskDelayMedia, delay_files, delay_reason=delay_reason)
         return delay_reason
 
 class RepairTaskSerializer(serializers.ModelSerializer):
     media = RepairTaskMediaSerializer(many=True, read_only=True)
     delay_reason = TaskDelayReasonSerializer(source='taskdelayreason', read_only=True)
-    media_files = serializers.ListField(child=serializers.ImageField(), required=False, write_only=True)
+    media_files = serializers.ListField(child=serializers.FileField(), required=False, write_only=True)
 
     class Meta:
         model = RepairTask
-        fields = ['id', 'mol','repair', 'name', 'status', 'due_date', 'description', 'task_type', 'media', 'media_files', 'delay_reason']
+        fields = ['id', 'mol','repair', 'name', 'status', 'due_date', 'is_overdue', 'description', 'task_type', 'media', 'media_files', 'delay_reason']
+        read_only_fields = ['is_overdue']
 
     def update(self, instance, validated_data):
         media_files = self.context['request'].FILES.getlist('media_files')
         instance.status = validated_data.get('status', instance.status)
         instance.description = validated_data.get('description', instance.description)
         instance.save()
-        for media in media_files:
-            RepairTaskMedia.objects.create(task=instance, image=media)
+        ingest_media(RepairTaskMedia, media_files, task=instance)
         return instance
 
+class RepairTaskPlanSerializer(serializers.ModelSerializer):
+    """Строка плана задач ремонта (repair_status/planning.py)."""
+    class Meta:
+        model = RepairTask
+        fields = ['name', 'task_type', 'due_date', 'status', 'budget', 'description', 'mol']
+
+class TaskStatusBulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=RepairTask.STATUS_CHOICES)
+
 class RepairDelayMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = RepairDelayMedia
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'file', 'media_type', 'size', 'thumbnail', 'uploaded_at']
 
 class RepairDelayReasonSerializer(serializers.ModelSerializer):
     media = RepairDelayMediaSerializer(many=True, read_only=True)
@@ -60,19 +70,33 @@ class RepairDelayReasonSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         delay_files = validated_data.pop('delay_files', [])
         delay_reason = RepairDelayReason.objects.create(**validated_data)
-        for file in delay_files:
-            RepairDelayMedia.objects.create(delay_reason=delay_reason, file=file)
+        ingest_media(RepairDelayMedia, delay_files, delay_reason=delay_reason)
         return delay_reason
 
 class RepairStartMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = RepairStartMedia
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'file', 'media_type', 'size', 'thumbnail', 'uploaded_at']
 
 class RepairCompletionMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = RepairCompletionMedia
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'file', 'media_type', 'size', 'thumbnail', 'uploaded_at']
+
+class RepairSummarySerializer(serializers.ModelSerializer):
+    """Ремонт в списке: без задач и файлов, прогресс — из счётчиков."""
+    progress = serializers.ReadOnlyField()
+    budget_progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Repair
+        fields = [
+            'id', 'name', 'region', 'oblast', 'oblast_ref', 'city_ref', 'address', 'repair_type', 'status', 'start_date', 'end_date',
+            'is_overdue', 'created_at', 'budget', 'budget_type', 'budget_progress', 'progress',
+            'tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue',
+        ]
+        read_only_fields = fields
+
 
 class RepairSerializer(serializers.ModelSerializer):
     tasks = RepairTaskSerializer(many=True, read_only=True)
@@ -87,15 +111,16 @@ class RepairSerializer(serializers.ModelSerializer):
     class Meta:
         model = Repair
         fields = [
-            'id', 'name','budget_type','budget','mol','region','oblast','description','address','mol','budget_progress', 'description', 'address', 'start_date', 'end_date', 'repair_type', 'floor', 'status',
-            'created_at', 'progress', 'tasks', 'delay_reason', 'start_media', 'completion_media', 'start_files', 'completion_files'
+            'id', 'name','budget_type','budget','mol','region','oblast','oblast_ref','city_ref','description','address','mol','budget_progress', 'description', 'address', 'start_date', 'end_date', 'repair_type', 'floor', 'status',
+            'is_overdue', 'created_at', 'progress', 'tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue',
+            'tasks', 'delay_reason', 'start_media', 'completion_media', 'start_files', 'completion_files'
         ]
+        read_only_fields = ['is_overdue', 'tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue']
 
     def create(self, validated_data):
         start_files = validated_data.pop('start_files', [])
         repair = Repair.objects.create(**validated_data)
-        for file in start_files:
-            RepairStartMedia.objects.create(repair=repair, file=file)
+        ingest_media(RepairStartMedia, start_files, repair=repair)
         return repair
 
     def update(self, instance, validated_data):
@@ -104,8 +129,6 @@ class RepairSerializer(serializers.ModelSerializer):
         instance.status = validated_data.get('status', instance.status)
         instance.description = validated_data.get('description', instance.description)
         instance.save()
-        for file in start_files:
-            RepairStartMedia.objects.create(repair=instance, file=file)
-        for file in completion_files:
-            RepairCompletionMedia.objects.create(repair=instance, file=file)
+        ingest_media(RepairStartMedia, start_files, repair=instance)
+        ingest_media(RepairCompletionMedia, completion_files, repair=instance)
         return instance
\ No newline at end of file
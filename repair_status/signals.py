@@ -0,0 +1,67 @@
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver
+
+from .counters import apply_task_change
+from .locations import LocationMatcher
+from .models import Repair, RepairTask
+from .rollups import apply_repair_change, instance_repair_state, stored_repair_state
+
+
+def task_state(task):
+    return task.repair_id, task.status, task.budget, task.is_overdue
+
+
+@receiver(pre_save, sender=RepairTask)
+def remember_task_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = RepairTask.objects.filter(pk=instance.pk).values_list(
+            'repair_id', 'status', 'budget', 'is_overdue').first()
+
+
+@receiver(post_save, sender=RepairTask)
+def update_counters_on_save(sender, instance, **kwargs):
+    apply_task_change(getattr(instance, '_previous_state', None), task_state(instance))
+    instance._previous_state = task_state(instance)
+
+
+@receiver(post_delete, sender=RepairTask)
+def update_counters_on_delete(sender, instance, **kwargs):
+    apply_task_change(task_state(instance), None)
+
+
+@receiver(pre_save, sender=Repair)
+def match_locations(sender, instance, **kwargs):
+    """Сопоставляет текстовые область и регион со справочниками, если текст новый или изменился."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'oblast', 'region'} & set(update_fields):
+        return
+    if not (instance.oblast or instance.region):
+        return
+    if instance._state.adding:
+        # Ссылки, переданные явно, не перезаписываем
+        if instance.oblast_ref_id is not None or instance.city_ref_id is not None:
+            return
+    else:
+        stored = Repair.objects.filter(pk=instance.pk).values_list(
+            'oblast', 'region', 'oblast_ref_id', 'city_ref_id').first()
+        if stored is None or stored[:2] == (instance.oblast, instance.region) \
+                or stored[2:] != (instance.oblast_ref_id, instance.city_ref_id):
+            return
+    instance.oblast_ref_id, instance.city_ref_id = LocationMatcher.from_reference().match(instance.oblast, instance.region)
+
+
+@receiver(pre_save, sender=Repair)
+def remember_repair_state(sender, instance, **kwargs):
+    instance._rollup_state = None if instance._state.adding else stored_repair_state(instance.pk)
+
+
+@receiver(post_save, sender=Repair)
+def update_rollups_on_save(sender, instance, **kwargs):
+    apply_repair_change(getattr(instance, '_rollup_state', None), stored_repair_state(instance.pk))
+
+
+@receiver(post_delete, sender=Repair)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # Задачи удалены каскадом раньше ремонта и уже вычли свой вклад из сводки
+    apply_repair_change(instance_repair_state(instance, (0, 0, 0, 0)), None)
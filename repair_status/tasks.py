@@ -0,0 +1,22 @@
+from celery import shared_task
+from django.apps import apps
+
+from .media import process_media
+from .overdue import detect_overdue
+
+
+@shared_task
+def detect_overdue_repairs():
+    """Ежедневная отметка просроченных ремонтов и задач."""
+    return detect_overdue()
+
+
+@shared_task
+def process_repair_media(app_label, model_name, pks):
+    """Превью для загруженных файлов ремонта."""
+    model = apps.get_model(app_label, model_name)
+    thumbnails = 0
+    for instance in model.objects.filter(pk__in=pks):
+        if process_media(instance):
+            thumbnails += 1
+    return {'files': len(pks), 'thumbnails': thumbnails}
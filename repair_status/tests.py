@@ -1,3 +1,311 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .counters import recompute_counters
+from .locations import LocationMatcher
+from .media import detect_media_type, ingest_media
+from .models import Repair, RepairOverdueEvent, RepairRollup, RepairStartMedia, RepairTask, RepairTaskMedia
+from .overdue import detect_overdue
+from .planning import create_tasks
+from .rollups import DIMENSIONS, METRICS, rebuild_rollups
+
+
+def create_repair(**fields):
+    defaults = {
+        'name': 'Ремонт', 'address': 'Адрес', 'repair_type': 'internal',
+        'start_date': datetime.date(2026, 1, 1), 'end_date': datetime.date(2026, 3, 1),
+    }
+    return Repair.objects.create(**{**defaults, **fields})
+
+
+def create_task(repair, **fields):
+    defaults = {'name': 'Задача', 'task_type': 'painting', 'due_date': datetime.date(2026, 2, 1)}
+    return RepairTask.objects.create(repair=repair, **{**defaults, **fields})
+
+
+def counters(repair):
+    return tuple(Repair.objects.filter(pk=repair.pk).values_list(*Repair.COUNTER_FIELDS).get())
+
+
+class RepairCountersTestCase(TestCase):
+    def setUp(self):
+        self.repair = create_repair(budget=1000)
+
+    def test_counters_follow_tasks(self):
+        first = create_task(self.repair, budget=100)
+        second = create_task(self.repair, budget=50, status='completed')
+        self.assertEqual(counters(self.repair), (2, 1, 50, 0))
+
+        first.status = 'completed'
+        first.save()
+        self.assertEqual(counters(self.repair), (2, 2, 150, 0))
+
+        second.delete()
+        self.assertEqual(counters(self.repair), (1, 1, 100, 0))
+
+    def test_task_moved_to_another_repair(self):
+        other = create_repair()
+        task = create_task(self.repair, budget=30, status='completed')
+        task.repair = other
+        task.save()
+
+        self.assertEqual(counters(self.repair), (0, 0, 0, 0))
+        self.assertEqual(counters(other), (1, 1, 30, 0))
+
+    def test_saving_stale_repair_keeps_counters(self):
+        stale = Repair.objects.get(pk=self.repair.pk)
+        create_task(self.repair, status='completed', budget=10)
+        stale.name = 'Новое название'
+        stale.save()
+        self.assertEqual(counters(self.repair), (1, 1, 10, 0))
+
+    def test_recompute_matches_incremental(self):
+        for status in ('pending', 'completed', 'completed'):
+            create_task(self.repair, status=status, budget=20)
+        incremental = counters(self.repair)
+        Repair.objects.filter(pk=self.repair.pk).update(tasks_total=0, tasks_completed=0, completed_budget=0)
+
+        recompute_counters()
+        self.assertEqual(counters(self.repair), incremental)
+
+
+class RepairListTestCase(TestCase):
+    def add_repairs(self, count):
+        for _ in range(count):
+            repair = create_repair()
+            create_task(repair)
+            create_task(repair, status='completed')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()['results']
+
+    def test_summary_list(self):
+        self.add_repairs(2)
+        few, results = self.count_queries('/api/repairs/')
+        self.add_repairs(4)
+        many, results = self.count_queries('/api/repairs/')
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(results), 6)
+        self.assertNotIn('tasks', results[0])
+        self.assertEqual((results[0]['tasks_total'], results[0]['tasks_completed']), (2, 1))
+
+    def test_expanded_list(self):
+        self.add_repairs(2)
+        few, results = self.count_queries('/api/repairs/?expand=tasks')
+        self.add_repairs(4)
+        many, results = self.count_queries('/api/repairs/?expand=tasks')
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(results[0]['tasks']), 2)
+
+
+def rollup_rows():
+    return sorted(
+        tuple(row) for row in RepairRollup.objects.values_list(*DIMENSIONS, *METRICS)
+        if any(row[len(DIMENSIONS):])
+    )
+
+
+class RepairRollupTestCase(TestCase):
+    def test_incremental_rollup_matches_rebuild(self):
+        almaty = create_repair(region='Алматы', budget=500)
+        astana = create_repair(region='Астана', budget=300, start_date=datetime.date(2026, 2, 10))
+        task = create_task(almaty, budget=40)
+        create_task(astana, budget=60, status='completed')
+        task.status = 'completed'
+        task.save()
+        astana.status = 'completed'
+        astana.region = 'Алматы'
+        astana.save()
+        create_repair(region='Шымкент', budget=100).delete()
+
+        incremental = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_rows())
+
+    def test_dashboard_totals(self):
+        repair = create_repair(region='Алматы', budget=200)
+        create_task(repair, budget=50, status='completed')
+        create_task(repair, budget=50)
+        create_repair(region='Астана', budget=100)
+
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/repairs/dashboard/?group_by=region').json()
+        totals = data['totals']
+        self.assertEqual((totals['repairs'], totals['budget'], totals['completed_budget']), (2, 300, 50))
+        self.assertEqual((totals['tasks_total'], totals['tasks_completed'], totals['progress']), (2, 1, 50.0))
+        self.assertEqual([group['region'] for group in data['groups']], ['Алматы', 'Астана'])
+
+
+class DetectOverdueTestCase(TestCase):
+    def setUp(self):
+        self.deadline = datetime.date(2026, 3, 1)
+        self.after_deadline = datetime.date(2026, 3, 2)
+
+    def test_flag_and_restore_status(self):
+        repair = create_repair(end_date=self.deadline, status='in_progress')
+        task = create_task(repair, due_date=self.deadline)
+
+        result = detect_overdue(today=self.after_deadline)
+        self.assertEqual((result['repairs_overdue'], result['tasks_overdue']), (1, 1))
+        repair.refresh_from_db()
+        self.assertEqual((repair.is_overdue, repair.status, repair.status_before_overdue),
+                         (True, 'delayed', 'in_progress'))
+        self.assertEqual(repair.tasks_overdue, 1)
+
+        # Срок перенесли — просрочка снимается, статус возвращается
+        Repair.objects.filter(pk=repair.pk).update(end_date=datetime.date(2026, 4, 1))
+        RepairTask.objects.filter(pk=task.pk).update(due_date=datetime.date(2026, 4, 1))
+        result = detect_overdue(today=self.after_deadline)
+        self.assertEqual((result['repairs_resolved'], result['tasks_resolved']), (1, 1))
+        repair.refresh_from_db()
+        self.assertEqual((repair.is_overdue, repair.status, repair.status_before_overdue, repair.tasks_overdue),
+                         (False, 'in_progress', '', 0))
+        self.assertEqual(RepairOverdueEvent.objects.filter(repair=repair).count(), 4)
+
+    def test_manual_status_is_kept(self):
+        repair = create_repair(end_date=self.deadline)
+        detect_overdue(today=self.after_deadline)
+
+        repair.refresh_from_db()
+        repair.status = 'completed'
+        repair.save()
+        detect_overdue(today=self.after_deadline)
+
+        repair.refresh_from_db()
+        self.assertEqual((repair.is_overdue, repair.status), (False, 'completed'))
+
+    def test_legacy_delayed_repair_returns_to_in_progress(self):
+        # Флаг выставлен до появления status_before_overdue
+        repair = create_repair(end_date=datetime.date(2026, 4, 1))
+        Repair.objects.filter(pk=repair.pk).update(is_overdue=True, status='delayed')
+        detect_overdue(today=self.after_deadline)
+
+        repair.refresh_from_db()
+        self.assertEqual((repair.is_overdue, repair.status), (False, 'in_progress'))
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+MP4 = b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 16
+
+
+class IngestMediaTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_type_is_detected_by_content(self):
+        # Расширение и Content-Type не совпадают с содержимым
+        self.assertEqual(detect_media_type(SimpleUploadedFile('photo.bin', PNG, 'application/octet-stream')), 'image')
+        self.assertEqual(detect_media_type(SimpleUploadedFile('clip.dat', MP4)), 'video')
+        self.assertEqual(detect_media_type(SimpleUploadedFile('act.pdf', b'%PDF-1.7', 'application/pdf')), 'document')
+        self.assertEqual(detect_media_type(SimpleUploadedFile('scan', b'raw', 'image/tiff')), 'image')
+
+    def test_files_are_stored_in_matching_fields(self):
+        task = create_task(create_repair())
+        uploads = [SimpleUploadedFile('photo.png', PNG), SimpleUploadedFile('clip.mp4', MP4)]
+
+        with self.assertNumQueries(1):
+            photo, clip = ingest_media(RepairTaskMedia, uploads, task=task)
+
+        photo, clip = RepairTaskMedia.objects.get(pk=photo.pk), RepairTaskMedia.objects.get(pk=clip.pk)
+        self.assertEqual((photo.media_type, photo.size, bool(photo.image), bool(photo.video)),
+                         ('image', len(PNG), True, False))
+        self.assertEqual((clip.media_type, clip.size, bool(clip.image), bool(clip.video)),
+                         ('video', len(MP4), False, True))
+        self.assertTrue(clip.video.storage.exists(clip.video.name))
+
+    def test_document_goes_to_file_field(self):
+        repair = create_repair()
+        document, = ingest_media(RepairStartMedia, [SimpleUploadedFile('act.pdf', b'%PDF-1.7')], repair=repair)
+        self.assertEqual(RepairStartMedia.objects.get(pk=document.pk).media_type, 'document')
+
+
+class TaskPlanTestCase(TestCase):
+    def setUp(self):
+        self.repair = create_repair()
+        self.url = f'/api/repairs/{self.repair.pk}/tasks/bulk/'
+
+    def plan_row(self, **fields):
+        return {'name': 'Покраска', 'task_type': 'painting', 'due_date': '2099-01-01', 'budget': 10, **fields}
+
+    def test_invalid_row_rejects_whole_plan(self):
+        rows = [self.plan_row(), self.plan_row(task_type='unknown'), self.plan_row(), {'name': 'Без срока'}]
+        response = self.client.post(self.url, rows, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [2, 4])
+        self.assertFalse(RepairTask.objects.exists())
+        self.assertEqual(counters(self.repair), (0, 0, 0, 0))
+
+    def test_plan_is_created_with_counters(self):
+        rows = [self.plan_row(status='completed'), self.plan_row(), self.plan_row(due_date='2020-01-01')]
+        response = self.client.post(self.url, rows, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+        # Задача с прошедшим сроком сразу считается просроченной
+        self.assertEqual(counters(self.repair), (3, 1, 10, 1))
+        self.assertEqual(list(RepairTask.objects.filter(is_overdue=True).values_list('due_date', flat=True)),
+                         [datetime.date(2020, 1, 1)])
+
+    def test_failure_rolls_back_plan(self):
+        rows = [{'name': 'Покраска', 'task_type': 'painting', 'due_date': datetime.date(2099, 1, 1)}] * 3
+        with mock.patch('repair_status.planning.apply_repair_changes', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                create_tasks(self.repair, rows)
+
+        self.assertFalse(RepairTask.objects.exists())
+        self.assertEqual(counters(self.repair), (0, 0, 0, 0))
+
+    def test_csv_plan(self):
+        plan = 'name;task_type;due_date;budget\nЭлектрика;electrical;2099-01-25;5\n;;;\n'.encode('utf-8-sig')
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('plan.csv', plan)})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(counters(self.repair), (1, 0, 0, 0))
+
+    def test_corrupt_xlsx_is_rejected(self):
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('plan.xlsx', b'not a workbook')})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.json())
+
+
+class LocationMatcherTestCase(SimpleTestCase):
+    def setUp(self):
+        self.matcher = LocationMatcher(
+            [(1, 'Акмолинская область'), (2, 'Алматинская область')],
+            [(10, 'Кокшетау', 1), (20, 'Талдыкорган', 2), (21, 'Кокшетау', 2)],
+        )
+
+    def test_exact_and_noisy_names(self):
+        self.assertEqual(self.matcher.match('Акмолинская обл.', 'г. Кокшетау'), (1, 10))
+        self.assertEqual(self.matcher.match('АЛМАТИНСКАЯ', 'Кокшетау'), (2, 21))
+
+    def test_close_names(self):
+        self.assertEqual(self.matcher.match('алматинская', 'Талдыкоргн'), (2, 20))
+
+    def test_oblast_is_taken_from_city(self):
+        self.assertEqual(self.matcher.match('', 'Талдыкорган'), (2, 20))
+
+    def test_city_from_other_oblast_is_not_matched(self):
+        self.assertEqual(self.matcher.match('Акмолинская', 'Талдыкорган'), (1, None))
+
+    def test_unknown_names(self):
+        self.assertEqual(self.matcher.match('Марс', ''), (None, None))
+        self.assertEqual(self.matcher.match(None, None), (None, None))
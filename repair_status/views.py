@@ -1,32 +1,141 @@
 from rest_framework import viewsets, status
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Prefetch
+import datetime
+
+from django.db.models import Case, F, FloatField, Prefetch, Value, When
 
 from .filters import RepairFilter
-from .models import Repair, RepairTask, RepairDelayReason, RepairStartMedia, RepairCompletionMedia, TaskDelayReason, RepairTaskMedia
-from .serializers import RepairSerializer, RepairTaskSerializer, TaskDelayReasonSerializer, RepairDelayReasonSerializer
+from .media import ingest_media
+from .planning import MAX_PLAN_TASKS, create_tasks, read_plan, set_tasks_status
+from .rollups import DIMENSIONS, dashboard
+from .models import Repair, RepairTask, RepairStartMedia, RepairCompletionMedia, TaskDelayReason, RepairTaskMedia
+from .serializers import (
+    RepairSerializer, RepairSummarySerializer, RepairTaskSerializer, TaskDelayReasonSerializer, RepairDelayReasonSerializer,
+    RepairTaskPlanSerializer, TaskStatusBulkSerializer,
+)
+
+
+def task_queryset():
+    """Задачи со всем, что выводит RepairTaskSerializer: файлы, причина задержки и её файлы."""
+    return RepairTask.objects.select_related('taskdelayreason').prefetch_related('media', 'taskdelayreason__media')
+
+
+class RepairPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
 
 class RepairViewSet(viewsets.ModelViewSet):
+    """
+    Список отдаёт краткое представление ремонтов (RepairSummarySerializer) с пагинацией.
+    Полное дерево с задачами, файлами и причинами задержки — в карточке ремонта
+    или в списке с параметром ?expand=tasks.
+    """
     serializer_class = RepairSerializer
     parser_classes = [MultiPartParser, FormParser]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RepairFilter  # Только этот параметр для фильтрации
+    pagination_class = RepairPagination
+
+    def is_summary(self):
+        expand = self.request.query_params.get('expand', '')
+        return self.action in ('list', 'overdue', 'bulk_tasks') and 'tasks' not in expand.split(',')
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return RepairSummarySerializer
+        return RepairSerializer
 
     def get_queryset(self):
-        delay_reason_prefetch = Prefetch(
-            'repairdelayreason',
-            queryset=RepairDelayReason.objects.prefetch_related('media'),
-            to_attr='delay_reason_prefetched'
-        )
-        return Repair.objects.all().prefetch_related(
-            'tasks',
+        queryset = Repair.objects.annotate(
+            progress_value=Case(
+                When(tasks_total=0, then=Value(0.0)),
+                default=F('tasks_completed') * 100.0 / F('tasks_total'),
+                output_field=FloatField(),
+            )
+        ).order_by('-created_at', '-pk')
+        if self.is_summary():
+            return queryset
+        return queryset.select_related('repairdelayreason').prefetch_related(
+            Prefetch('tasks', queryset=task_queryset()),
             'start_media',
             'completion_media',
-            delay_reason_prefetch
+            'repairdelayreason__media',
         )
+
+    @action(detail=False, methods=['get'], url_path='dashboard')
+    def dashboard(self, request):
+        """
+        Показатели портфеля из сводки RepairRollup.
+        ?group_by=region,status — измерения (region, oblast, status, repair_type, month);
+        ?region=&oblast=&status=&repair_type= — фильтры, через запятую; ?month_from=2025-01&month_to=2025-12.
+        """
+        params = request.query_params
+        group_by = [name for name in params.get('group_by', '').split(',') if name]
+        unknown = set(group_by) - set(DIMENSIONS)
+        if unknown:
+            return Response({"detail": f"Неизвестные измерения: {', '.join(sorted(unknown))}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {}
+        for name in ('region', 'oblast', 'status', 'repair_type'):
+            if params.get(name):
+                filters[f'{name}__in'] = params[name].split(',')
+        for param, lookup in (('month_from', 'month__gte'), ('month_to', 'month__lte')):
+            if params.get(param):
+                try:
+                    filters[lookup] = datetime.datetime.strptime(params[param], '%Y-%m').date()
+                except ValueError:
+                    return Response({"detail": f"{param}: ожидается формат ГГГГ-ММ"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+        return Response(dashboard(group_by, filters))
+
+    @action(detail=False, methods=['get'], url_path='overdue')
+    def overdue(self, request):
+        """Просроченные ремонты (флаг выставляет задача detect_overdue_repairs), самые старые сроки сверху."""
+        queryset = self.filter_queryset(self.get_queryset().filter(is_overdue=True)).order_by('end_date', 'pk')
+        page = self.paginate_queryset(queryset)
+        serializer = RepairSummarySerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='tasks/bulk',
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk_tasks(self, request, pk=None):
+        """
+        План задач ремонта одним запросом: JSON-массив задач или файл CSV / XLSX в поле file.
+        Ошибки возвращаются по номерам строк, при ошибке ничего не создаётся.
+        """
+        repair = self.get_object()
+        if 'file' in request.FILES:
+            rows = read_plan(request.FILES['file'])
+        else:
+            rows = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"detail": "Ожидается непустой список задач или файл плана"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_PLAN_TASKS:
+            return Response({"detail": f"Не больше {MAX_PLAN_TASKS} задач за раз"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RepairTaskPlanSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = [{'row': number, 'errors': row_errors}
+                      for number, row_errors in enumerate(serializer.errors, start=1) if row_errors]
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = create_tasks(repair, serializer.validated_data)
+        repair.refresh_from_db(fields=['tasks_total', 'tasks_completed', 'completed_budget', 'tasks_overdue'])
+        return Response({
+            'created': len(tasks),
+            'ids': [task.pk for task in tasks],
+            'repair': RepairSummarySerializer(repair).data,
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'], url_path='add-delay-reason')
     def add_delay_reason(self, request, pk=None):
         repair = self.get_object()
@@ -51,8 +160,7 @@ class RepairViewSet(viewsets.ModelViewSet):
         repair.save(update_fields=['status'])
 
         completion_files = request.FILES.getlist('completion_files')
-        for file in completion_files:
-            RepairCompletionMedia.objects.create(repair=repair, file=file)
+        ingest_media(RepairCompletionMedia, completion_files, repair=repair)
 
         serializer = self.get_serializer(repair)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -66,10 +174,8 @@ class RepairViewSet(viewsets.ModelViewSet):
 
         start_files = request.FILES.getlist('start_files')
         completion_files = request.FILES.getlist('completion_files')
-        for file in start_files:
-            RepairStartMedia.objects.create(repair=repair, file=file)
-        for file in completion_files:
-            RepairCompletionMedia.objects.create(repair=repair, file=file)
+        ingest_media(RepairStartMedia, start_files, repair=repair)
+        ingest_media(RepairCompletionMedia, completion_files, repair=repair)
 
         serializer = self.get_serializer(repair)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -79,15 +185,29 @@ class RepairTaskViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        delay_reason_prefetch = Prefetch(
-            'taskdelayreason',
-            queryset=TaskDelayReason.objects.prefetch_related('media'),
-            to_attr='delay_reason_prefetched'
-        )
-        return RepairTask.objects.all().prefetch_related(
-            'media',
-            delay_reason_prefetch
-        )
+        return task_queryset()
+
+    @action(detail=False, methods=['get'], url_path='overdue')
+    def overdue(self, request):
+        """Просроченные задачи, самые старые сроки сверху."""
+        queryset = self.get_queryset().filter(is_overdue=True).order_by('due_date', 'pk')
+        paginator = RepairPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status', parser_classes=[JSONParser])
+    def bulk_status(self, request):
+        """Статус для многих задач сразу: {"ids": [1, 2, 3], "status": "completed"}."""
+        serializer = TaskStatusBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = set(RepairTask.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        missing = sorted(set(ids) - found)
+        if missing:
+            return Response({"detail": "Задачи не найдены", "ids": missing}, status=status.HTTP_404_NOT_FOUND)
+        updated = set_tasks_status(ids, serializer.validated_data['status'])
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='add-delay-reason')
     def add_delay_reason(self, request, pk=None):
@@ -109,8 +229,7 @@ class RepairTaskViewSet(viewsets.ModelViewSet):
         task.save(update_fields=['status', 'description'])
 
         media_files = request.FILES.getlist('media_files')
-        for media in media_files:
-            RepairTaskMedia.objects.create(task=task, image=media)
+        ingest_media(RepairTaskMedia, media_files, task=task)
 
         serializer = self.get_serializer(task)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -123,8 +242,7 @@ class RepairTaskViewSet(viewsets.ModelViewSet):
         task.save()
 
         media_files = request.FILES.getlist('media_files')
-        for media in media_files:
-            RepairTaskMedia.objects.create(task=task, image=media)
+        ingest_media(RepairTaskMedia, media_files, task=task)
 
         serializer = self.get_serializer(task)
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,11 +1,11 @@
 from rest_framework import serializers
 
-from language.serializers import LanguageSerializer
+from language.serializers import LanguageField
 from .models import Tag, TagTranslation
 
 
 class TagTranslationSerializer(serializers.ModelSerializer):
-    lang = LanguageSerializer(read_only=True)
+    lang = LanguageField(source='lang_id')
 
     class Meta:
         model = TagTranslation
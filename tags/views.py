@@ -1,9 +1,14 @@
 from django.shortcuts import render
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, viewsets, status
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Tag, TagTranslation
 from .serializers import TagSerializer, TagTranslationSerializer, TagCreateSerializer
 from django_filters.rest_framework import DjangoFilterBackend
+
+from ADM_back.catalogs import CatalogViewMixin, get_catalog
+from news.tag_usage import CLOUD_LIMIT, MAX_LIMIT, tag_cloud
 from .filters import TagFilter
 
 class TagCreateViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
@@ -11,13 +16,42 @@ class TagCreateViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Re
     queryset = Tag.objects.all()
     serializer_class = TagCreateSerializer
 
-class TagViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class TagViewSet(CatalogViewMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                  mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
-    queryset = Tag.objects.all()
+    queryset = Tag.objects.prefetch_related('translations')
     serializer_class = TagSerializer
+    catalog_name = 'tags'
     filter_backends = [DjangoFilterBackend]
     filterset_class = TagFilter
 
+    def usage_params(self, default_limit):
+        params = self.request.query_params
+        key = get_catalog('tags').language_key(params.get('lang'))
+        try:
+            limit = min(max(int(params.get('limit', default_limit)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = default_limit
+        return key, params.get('scope') != 'all', limit
+
+    @action(detail=False, methods=['get'], url_path='cloud')
+    def cloud(self, request):
+        """
+        Облако тегов: ?lang=ru (код или id), ?scope=all — по всем новостям, по умолчанию по опубликованным,
+        ?limit=. Теги по алфавиту, weight — размер от 1 до 5.
+        """
+        key, published, limit = self.usage_params(CLOUD_LIMIT)
+        if key is None:
+            return Response({"detail": "Неизвестный язык"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(sorted(tag_cloud(key, published, limit), key=lambda tag: tag['name'].lower()))
+
+    @action(detail=False, methods=['get'], url_path='top')
+    def top(self, request):
+        """Самые используемые теги по убыванию числа новостей; параметры как у cloud, limit по умолчанию 10."""
+        key, published, limit = self.usage_params(10)
+        if key is None:
+            return Response({"detail": "Неизвестный язык"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(tag_cloud(key, published, limit))
+
 
 class TagTranslationViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                             mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
@@ -1,18 +1,108 @@
 # adm/ad_client.py
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+DEFAULT_AD_BASE_URL = "http://10.8.27.97:8056/api/active-directory/1.0.12"
+AD_TIMEOUT = 5
+AD_POOL_SIZE = 16
+# Форматы логина, которые принимает AD: Kasymov.Dlt, TELECOM\Kasymov.Dlt, Kasymov.Dlt@telecom.kz
+LOGIN_VARIANTS = ("{login}", "TELECOM\\{login}", "{login}@telecom.kz")
+VARIANT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+AUTH_OK, AUTH_DENIED, AUTH_ERROR = 'ok', 'denied', 'error'
+
 
 class AdClient:
-    BASE_URL = "http://10.8.27.97:8056/api/active-directory/1.0.12"
+    """
+    Клиент сервиса Active Directory. Все запросы идут через одну сессию с пулом соединений,
+    варианты логина проверяются параллельно, а сработавший запоминается для этого логина.
+    """
+    _session = None
+    _executor = ThreadPoolExecutor(max_workers=AD_POOL_SIZE, thread_name_prefix='ad-client')
+
+    @classmethod
+    def base_url(cls):
+        return getattr(settings, 'AD_BASE_URL', DEFAULT_AD_BASE_URL).rstrip("/")
+
+    @classmethod
+    def session(cls):
+        if cls._session is None:
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=AD_POOL_SIZE))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=AD_POOL_SIZE))
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def attempt(cls, account: str, password: str, timeout=AD_TIMEOUT):
+        """
+        Одна попытка авторизации: (AUTH_OK, ответ AD), (AUTH_DENIED, None), если AD отказал
+        (ответ 4xx), или (AUTH_ERROR, None) при ошибке соединения, таймауте или 5xx.
+        """
+        url = f"{cls.base_url()}/account/{account}/authorization"
+        try:
+            response = cls.session().post(url, json={"password": password}, timeout=timeout)
+        except requests.RequestException:
+            return AUTH_ERROR, None
+        if response.status_code == 200:
+            return AUTH_OK, response.json()
+        if 400 <= response.status_code < 500:
+            return AUTH_DENIED, None
+        return AUTH_ERROR, None
+
+    @classmethod
+    def authorize(cls, account: str, password: str, timeout=AD_TIMEOUT):
+        """Возвращает ответ AD при успешной авторизации, иначе None."""
+        return cls.attempt(account, password, timeout)[1]
+
+    @staticmethod
+    def variant_cache_key(login):
+        return f'user:ad:variant:{login.lower()}'
+
+    @classmethod
+    def login(cls, login: str, password: str):
+        """
+        Авторизует пользователя в AD. Возвращает (сработавший вариант логина, ответ AD) или (None, None).
+        Сначала пробуется запомненный для логина вариант. Если AD отказал по нему (неверный пароль),
+        остальные варианты не пробуются: лишние неудачные попытки приближают блокировку учётной записи.
+        Иначе остальные варианты проверяются одновременно, первый успех завершает проверку,
+        не дожидаясь остальных запросов.
+        """
+        remembered = cache.get(cls.variant_cache_key(login))
+        variants = [template.format(login=login) for template in LOGIN_VARIANTS]
+        if remembered is not None and remembered < len(variants):
+            result, ad_response = cls.attempt(variants[remembered], password)
+            if result == AUTH_OK:
+                return variants[remembered], ad_response
+            if result == AUTH_DENIED:
+                return None, None
+
+        pending = {
+            cls._executor.submit(cls.authorize, variant, password): index
+            for index, variant in enumerate(variants) if index != remembered
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                ad_response = future.result()
+                if ad_response is not None:
+                    # Отменяются только запросы, ещё не начатые в пуле; начатые завершатся сами
+                    for other in pending:
+                        other.cancel()
+                    cache.set(cls.variant_cache_key(login), index, VARIANT_CACHE_TIMEOUT)
+                    return variants[index], ad_response
+        return None, None
 
     @classmethod
     def get_refresh_token(cls, email: str, password: str):
-        url = f"{cls.BASE_URL}/account/{email}/authorization"
-        print(email + password)
+        url = f"{cls.base_url()}/account/{email}/authorization"
         try:
-            response = requests.post(url, json={"password": password}, timeout=10)
+            response = cls.session().post(url, json={"password": password}, timeout=10)
             response.raise_for_status()
-            print(response.json())
             return response.json()  # { "token": "...", "expiresIn": ... }
         except requests.exceptions.RequestException as e:
             raise Exception(f"AD authorization error: {str(e)}")
@@ -4,7 +4,7 @@ from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
 from django.core.exceptions import ValidationError
-from .models import Department, Position, Organization
+from .models import Department, Position, Organization, HRSyncRun, HRSyncCheckpoint
 
 
 from .models import User
@@ -65,3 +65,18 @@ class CustomUserAdmin(admin.ModelAdmin):
 admin.site.register(Department)
 admin.site.register(Position)
 admin.site.register(Organization)
+
+
+class HRSyncCheckpointInline(admin.TabularInline):
+    model = HRSyncCheckpoint
+    extra = 0
+    can_delete = False
+    readonly_fields = ('organization', 'status', 'employees', 'counts', 'seconds', 'error_class', 'finished_at')
+
+
+@admin.register(HRSyncRun)
+class HRSyncRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'full', 'started_at', 'finished_at', 'error_class')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'full', 'started_at', 'finished_at', 'summary', 'error_class')
+    inlines = [HRSyncCheckpointInline]
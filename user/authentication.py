@@ -0,0 +1,113 @@
+"""
+Аутентификация по JWT и Token без запросов к базе в установившемся режиме.
+
+По id пользователя кешируется строка таблицы (CACHED_FIELDS: все поля, кроме пароля и кода
+подтверждения), токен — как ключ -> id пользователя, с коротким TTL. Сохранение и удаление
+пользователя, удаление токена сбрасывают кеш (user/signals.py). Для чтения (GET, HEAD, OPTIONS)
+пользователь собирается из кеша, так что users/me и сериализаторы пользователя не дочитывают поля
+по одному; для изменяющих запросов он всегда читается из базы целиком, чтобы view не сохраняли
+неполную копию.
+"""
+from django.core.cache import cache
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+AUTH_CACHE_TIMEOUT = 60
+# Пароль и код подтверждения в кеш не попадают: они читаются только при смене пароля и проверке
+# кода, то есть в изменяющих запросах
+UNCACHED_FIELDS = ('password', 'confirmation_code')
+CACHED_FIELDS = tuple(field.attname for field in User._meta.concrete_fields
+                      if field.name not in UNCACHED_FIELDS)
+
+
+def user_cache_key(user_id):
+    return f'user:auth:user:{user_id}'
+
+
+def token_cache_key(key):
+    return f'user:auth:token:{key}'
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def cached_value(user, attname):
+    value = getattr(user, attname)
+    # Файл хранится в строке таблицы своим именем
+    if isinstance(value, models.fields.files.FieldFile):
+        return value.name
+    return value
+
+
+def get_cached_user(user_id, fresh=False):
+    """
+    Пользователь по id: из кеша — с полями CACHED_FIELDS, отложены только пароль и код
+    подтверждения; fresh=True — из базы целиком с обновлением кеша. None, если его нет.
+    """
+    key = user_cache_key(user_id)
+    values = None if fresh else cache.get(key)
+    if values is not None:
+        return User.from_db('default', CACHED_FIELDS, values)
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return None
+    cache.set(key, tuple(cached_value(user, field) for field in CACHED_FIELDS), AUTH_CACHE_TIMEOUT)
+    return user
+
+
+class CachedUserMixin:
+    fresh = False
+
+    def authenticate(self, request):
+        self.fresh = request.method not in SAFE_METHODS
+        return super().authenticate(request)
+
+
+class CachedJWTAuthentication(CachedUserMixin, JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id, self.fresh)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise exceptions.AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
+
+
+class CachedTokenAuthentication(CachedUserMixin, TokenAuthentication):
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        user_id = cache.get(token_cache_key(key))
+        if user_id is None:
+            user_id = model.objects.filter(key=key).values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(token_cache_key(key), user_id, AUTH_CACHE_TIMEOUT)
+
+        user = get_cached_user(user_id, self.fresh)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return user, model(key=key, user=user)
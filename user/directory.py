@@ -0,0 +1,171 @@
+"""
+Поиск по справочнику сотрудников для автодополнения.
+
+Индекс — отсортированный массив терминов (слова ФИО, логин, email, ИИН, телефон) с рангом поля
+и id пользователя; поиск по префиксу — бинарный поиск и проход по соседним элементам. Термины
+и запрос нормализуются одинаково: нижний регистр, кириллица (включая казахские буквы) в латиницу,
+поэтому «Касымов», «kasymov» и «Kasimov» находят одного человека.
+
+Индекс живёт в памяти процесса и пересобирается, когда меняется версия в общем кеше: её
+увеличивают синхронизация с HR и (после коммита) сохранение пользователя, должности или
+департамента. Если изменение прошло мимо сигналов, индекс всё равно пересобирается не реже
+раза в INDEX_MAX_AGE секунд.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import User
+
+DIRECTORY_VERSION_KEY = 'user:directory:version'
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+INDEX_MAX_AGE = 60 * 10
+
+# Поля, по которым ищем, в порядке важности (меньше — выше в выдаче)
+FIELD_RANKS = {
+    'login': 0,
+    'last_name': 1,
+    'first_name': 2,
+    'middle_name': 3,
+    'email': 4,
+    'iin': 5,
+    'phone_number': 6,
+}
+# Поля, изменение которых требует пересборки индекса
+DIRECTORY_FIELDS = set(FIELD_RANKS) | {'is_active', 'position', 'department'}
+
+TRANSLIT = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ә': 'a', 'ғ': 'g', 'қ': 'k', 'ң': 'n', 'ө': 'o', 'ұ': 'u', 'ү': 'u', 'һ': 'h', 'і': 'i',
+}
+TRANSLIT_TABLE = str.maketrans(TRANSLIT)
+# Латинские варианты, которые пишут по-разному: Kasymov/Kasimov, Khamitov/Hamitov
+LATIN_FOLDS = (('kh', 'h'), ('y', 'i'))
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    text = (text or '').lower().translate(TRANSLIT_TABLE)
+    for source, target in LATIN_FOLDS:
+        text = text.replace(source, target)
+    return text
+
+
+def tokenize(text):
+    return WORD_RE.findall(normalize(text))
+
+
+def field_terms(field, value):
+    if not value:
+        return []
+    if field == 'email':
+        value = value.split('@')[0]
+    if field == 'phone_number':
+        digits = re.sub(r'\D', '', value)
+        # +7 701 ... и 8 701 ... ищутся и без кода страны
+        return [digits, digits[-10:]] if len(digits) > 10 else [digits]
+    words = tokenize(value)
+    if len(words) > 1:
+        words.append(''.join(words))  # kasymov.d -> kasymovd
+    return words
+
+
+def get_directory_version():
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(DIRECTORY_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_directory():
+    """Помечает индекс устаревшим: каждый процесс пересоберёт его при следующем поиске."""
+    try:
+        cache.incr(DIRECTORY_VERSION_KEY)
+    except ValueError:
+        cache.set(DIRECTORY_VERSION_KEY, 2, None)
+
+
+class DirectoryIndex:
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.users = {}
+        entries = []
+        rows = User.objects.filter(is_active=True).values(
+            'id', 'first_name', 'last_name', 'middle_name', 'login', 'email', 'iin', 'phone_number',
+            'position__name', 'department__name',
+        )
+        for row in rows.iterator():
+            user_id = row['id']
+            self.users[user_id] = {
+                'id': user_id,
+                'full_name': ' '.join(filter(None, (row['last_name'], row['first_name'], row['middle_name']))),
+                'login': row['login'],
+                'email': row['email'],
+                'position': row['position__name'],
+                'department': row['department__name'],
+            }
+            for field, rank in FIELD_RANKS.items():
+                for term in set(field_terms(field, row[field])):
+                    entries.append((term, rank, user_id))
+        entries.sort()
+        self.terms = [term for term, _, _ in entries]
+        self.postings = [(rank, user_id) for _, rank, user_id in entries]
+
+    def match(self, prefix):
+        """{user_id: очки} для одного слова запроса: ранг поля, точное совпадение выше префиксного."""
+        scores = {}
+        i = bisect_left(self.terms, prefix)
+        while i < len(self.terms) and self.terms[i].startswith(prefix):
+            rank, user_id = self.postings[i]
+            score = rank * 2 + (self.terms[i] != prefix)
+            if score < scores.get(user_id, score + 1):
+                scores[user_id] = score
+            i += 1
+        return scores
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        words = tokenize(query)
+        if not words:
+            return []
+        # Каждое слово запроса должно совпасть с началом какого-нибудь термина пользователя
+        scores = self.match(words[0])
+        for word in words[1:]:
+            if not scores:
+                break
+            word_scores = self.match(word)
+            scores = {user_id: score + word_scores[user_id]
+                      for user_id, score in scores.items() if user_id in word_scores}
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (item[1], self.users[item[0]]['full_name']))
+        return [self.users[user_id] for user_id, _ in best]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def is_fresh(index, version):
+    return index is not None and index.version == version and time.monotonic() - index.built_at < INDEX_MAX_AGE
+
+
+def get_index():
+    global _index
+    version = get_directory_version()
+    if not is_fresh(_index, version):
+        with _lock:
+            if not is_fresh(_index, version):
+                _index = DirectoryIndex(version)
+    return _index
+
+
+def search_directory(query, limit=DEFAULT_LIMIT):
+    return get_index().search(query, min(max(limit, 1), MAX_LIMIT))
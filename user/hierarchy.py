@@ -0,0 +1,114 @@
+"""
+Иерархия департаментов в виде таблицы замыкания (DepartmentClosure).
+
+Для каждого департамента хранятся строки (предок, потомок, глубина), включая строку на самого
+себя с глубиной 0, поэтому поддерево любого узла выбирается одним запросом по индексу ancestor.
+Таблица обновляется инкрементально: новые департаменты добавляются, перенесённые — перевешиваются
+вместе с поддеревом. Полная пересборка — команда build_department_closure.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Department, DepartmentClosure
+
+
+def closure_rows(parents):
+    """Строки (предок, потомок, глубина) для дерева, заданного словарём {id: parent_id}."""
+    rows = []
+    for node_id in parents:
+        current, depth, seen = node_id, 0, set()
+        while current in parents and current not in seen:
+            seen.add(current)
+            rows.append((current, node_id, depth))
+            current = parents[current]
+            depth += 1
+    return rows
+
+
+def rebuild_closure():
+    parents = dict(Department.objects.values_list('id', 'parent_id_id'))
+    rows = [
+        DepartmentClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+        for ancestor_id, descendant_id, depth in closure_rows(parents)
+    ]
+    with transaction.atomic():
+        DepartmentClosure.objects.all().delete()
+        DepartmentClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def add_departments(nodes):
+    """Добавляет в замыкание новые департаменты. nodes — [(id, parent_id)], родители раньше детей."""
+    ancestors = defaultdict(list)
+    parent_ids = {parent_id for _, parent_id in nodes if parent_id}
+    for ancestor_id, descendant_id, depth in DepartmentClosure.objects.filter(
+            descendant_id__in=parent_ids).values_list('ancestor_id', 'descendant_id', 'depth'):
+        ancestors[descendant_id].append((ancestor_id, depth))
+
+    rows = []
+    for node_id, parent_id in nodes:
+        chain = [(node_id, 0)] + [(ancestor_id, depth + 1) for ancestor_id, depth in ancestors.get(parent_id, ())]
+        ancestors[node_id] = chain
+        rows.extend(DepartmentClosure(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth)
+                    for ancestor_id, depth in chain)
+    DepartmentClosure.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+def move_department(node_id, parent_id):
+    """Перевешивает поддерево node_id под parent_id (None — в корень)."""
+    subtree = list(DepartmentClosure.objects.filter(ancestor_id=node_id).values_list('descendant_id', 'depth'))
+    if not subtree:
+        add_departments([(node_id, parent_id)])
+        return
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    if parent_id in subtree_ids:
+        raise ValueError(f'Департамент {parent_id} находится внутри {node_id}')
+
+    with transaction.atomic():
+        DepartmentClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if parent_id:
+            parent_chain = DepartmentClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+            DepartmentClosure.objects.bulk_create([
+                DepartmentClosure(ancestor_id=ancestor_id, descendant_id=descendant_id,
+                                  depth=parent_depth + 1 + depth)
+                for ancestor_id, parent_depth in parent_chain
+                for descendant_id, depth in subtree
+            ], batch_size=1000)
+
+
+def department_tree(department_id):
+    """
+    Поддерево департамента с численностью: сам узел, потомки и активные сотрудники выбираются
+    одним запросом по замыканию. headcount — сотрудники узла, total_headcount — вместе с потомками.
+    """
+    rows = DepartmentClosure.objects.filter(ancestor_id=department_id).values(
+        'descendant_id', 'descendant__name', 'descendant__parent_id_id', 'depth',
+    ).annotate(
+        headcount=Count('descendant__user', filter=Q(descendant__user__is_active=True)),
+    ).order_by('depth', 'descendant__name')
+
+    nodes = {}
+    root = None
+    for row in rows:
+        node = nodes[row['descendant_id']] = {
+            'id': row['descendant_id'],
+            'name': row['descendant__name'],
+            'depth': row['depth'],
+            'headcount': row['headcount'],
+            'total_headcount': row['headcount'],
+            'children': [],
+        }
+        if row['depth'] == 0:
+            root = node
+        else:
+            # Узел, чей родитель не попал в выборку (замыкание разошлось с parent_id), вешается на корень
+            parent = nodes.get(row['descendant__parent_id_id']) or root
+            parent['children'].append(node)
+
+    # Суммы снизу вверх: от самых глубоких узлов к корню
+    for node in sorted(nodes.values(), key=lambda item: -item['depth']):
+        for child in node['children']:
+            node['total_headcount'] += child['total_headcount']
+    return root
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Полностью пересобирает таблицу замыкания департаментов по полю parent_id."
+
+    def handle(self, *args, **options):
+        rows = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Записано связей департаментов: {rows}"))
@@ -1,18 +1,31 @@
 import base64
+import codecs
+import hashlib
 import json
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction, connection
-from django.db.utils import IntegrityError, OperationalError
-from user.models import User, Department, Position, Organization, Status
+from django.db.models import Q
+from django.db.utils import OperationalError
+from django.utils import timezone
+from user.directory import invalidate_directory
+from user.summaries import invalidate_summaries
+from user.hierarchy import add_departments, move_department
+from user.models import User, Department, Position, Organization, Status, HRSyncRun, HRSyncCheckpoint
 from django.contrib.auth.hashers import make_password
 from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
 
-# Настройка логирования в файл
-logging.basicConfig(filename='load_employees.log', level=logging.INFO, format='%(asctime)s %(message)s')
+logger = logging.getLogger(__name__)
 
 API_BASE_URL = "https://toolssed.telecom.kz/API/HR-api.nsf/api.xsp"
 EMPLOYEES_ENDPOINT = f"{API_BASE_URL}/1.3/empl/empl"
@@ -20,12 +33,133 @@ ORG_ENDPOINT = f"{API_BASE_URL}/1.2/org-structure"
 USERNAME = "pot bsf"
 PASSWORD = "potbsf"
 DEFAULT_PASSWORD_HASH = make_password("123456")  # Предварительно вычисленный хеш пароля
+DEFAULT_FETCH_WORKERS = 6
+DEFAULT_FETCH_RETRIES = 3
+USER_BATCH_SIZE = 1000
+FETCH_QUEUE_SIZE = 500  # сколько сотрудников одной организации может ждать обработки
+STREAM_CHUNK_SIZE = 64 * 1024
+HR_SYNC_LOCK_KEY = 'user:hr-sync:lock'
+HR_SYNC_LOCK_TIMEOUT = 60 * 60 * 6
+
+# Поля пользователя, которые приходят из HR и сравниваются при синхронизации
+SYNC_FIELDS = (
+    'login', 'last_name', 'first_name', 'middle_name', 'iin', 'email', 'personnel_number',
+    'birth_date', 'is_mol', 'server', 'department_id', 'position_id', 'status_id',
+    'organization_id', 'is_active',
+)
+
+# Справочники сотрудника: поле пользователя, модель, подпись для отчёта
+DIMENSIONS = (
+    ('department_id', Department, 'департаментов'),
+    ('position_id', Position, 'должностей'),
+    ('status_id', Status, 'статусов'),
+)
+
+
+# Поля, значения которых не должны повторяться у разных пользователей
+UNIQUE_FIELDS = ('login', 'email', 'iin')
+
+
+def unique_value(field, value):
+    """Значение для сравнения на уникальность: логин и email без учёта регистра."""
+    if not value:
+        return ''
+    return value.lower() if field in ('login', 'email') else value
+
+
+def employee_key(record):
+    """Стабильный ключ сотрудника: ИИН, иначе табельный номер, иначе логин."""
+    if record.get('iin'):
+        return f"iin:{record['iin']}"
+    if record.get('personnel_number'):
+        return f"pn:{record['personnel_number']}"
+    return f"login:{record['login']}"
+
+
+def record_hash(record):
+    payload = json.dumps({field: record[field] for field in SYNC_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def iter_json_array(chunks):
+    """
+    Отдаёт элементы JSON-массива верхнего уровня по мере поступления байтов, не собирая
+    ответ целиком. Ответ вида {"data": [...]} разбирается обычным способом.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    started = wrapped = False
+    for chunk in chunks:
+        buffer = buffer[pos:] + text.decode(chunk)
+        pos = 0
+        if wrapped:
+            continue
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ',')):
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] == '{':
+                    wrapped = True
+                    break
+                if buffer[pos] != '[':
+                    raise ValueError(f"Ожидался JSON-массив, получено: {buffer[pos:pos + 50]!r}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # элемент пришёл не полностью — ждём следующий кусок
+            yield item
+
+    buffer = buffer[pos:] + text.decode(b'', final=True)
+    if wrapped:
+        data = json.loads(buffer)
+        if isinstance(data, dict) and isinstance(data.get('data'), list):
+            yield from data['data']
+        return
+    if started or buffer.strip():
+        raise ValueError("JSON-массив оборвался")
+
+
+class SyncAlreadyRunning(CommandError):
+    """Синхронизацию уже выполняет другой процесс."""
+
+
+class FetchCancelled(Exception):
+    """Основной поток прервал загрузку."""
+
+
+def normalize_value(value):
+    """Приводит значения из базы и из API к общему виду: None и '' равны, даты — строки."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
 
 class Command(BaseCommand):
-    help = "Загружает сотрудников из внешней системы. Используйте --full для принудительной перезагрузки."
+    help = (
+        "Синхронизирует сотрудников с внешней системой: создаёт новых, обновляет изменившиеся поля "
+        "и деактивирует уволенных. Используйте --full, чтобы сравнить все записи без учёта хешей."
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument('--full', action='store_true', help='Игнорировать существующих сотрудников и перезагружаем всех.')
+        parser.add_argument('--full', action='store_true',
+                            help='Сравнить все поля всех сотрудников, не доверяя сохранённым хешам.')
+        parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS,
+                            help='Сколько организаций загружать из API одновременно.')
+        parser.add_argument('--retries', type=int, default=DEFAULT_FETCH_RETRIES,
+                            help='Количество повторов запроса к API для одной организации.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить незавершённый запуск, пропустив уже обработанные организации.')
 
     def optimize_sqlite(self):
         """Оптимизация настроек SQLite для ускорения транзакций."""
@@ -33,7 +167,7 @@ class Command(BaseCommand):
             with connection.cursor() as cursor:
                 cursor.execute("PRAGMA synchronous = OFF;")
                 cursor.execute("PRAGMA journal_mode = WAL;")
-                logging.info("SQLite оптимизирован: synchronous=OFF, journal_mode=WAL")
+                logger.info("SQLite оптимизирован: synchronous=OFF, journal_mode=WAL")
 
     def check_tables(self):
         """Проверяет наличие необходимых таблиц в базе данных."""
@@ -48,7 +182,7 @@ class Command(BaseCommand):
                         raise CommandError(f"Таблица {table} отсутствует. Выполните 'python manage.py migrate'.")
         except OperationalError as e:
             self.stdout.write(self.style.ERROR(f"❌ Ошибка проверки таблиц: {e}"))
-            logging.error(f"Ошибка проверки таблиц: {e}")
+            logger.error(f"Ошибка проверки таблиц: {e}")
             raise CommandError("Не удалось проверить таблицы. Убедитесь, что база данных настроена.")
 
     def get_auth_headers(self):
@@ -59,29 +193,31 @@ class Command(BaseCommand):
             "Accept": "application/json"
         }
 
-    def create_session(self):
-        """Создаёт сессию с повторными попытками при таймаутах."""
+    def create_session(self, pool_size, retries):
+        """
+        Создаёт одну сессию на весь запуск: пул соединений рассчитан на pool_size потоков,
+        повторы при таймаутах и 5xx выполняются отдельно для каждого запроса (организации).
+        """
         session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        session.mount('https://', HTTPAdapter(max_retries=retries))
+        retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        session.mount('https://', HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=pool_size))
+        session.headers.update(self.get_auth_headers())
         return session
 
     def fetch_organizations(self):
-        headers = self.get_auth_headers()
-        session = self.create_session()
         try:
-            response = session.get(ORG_ENDPOINT, headers=headers, timeout=60)
+            response = self.session.get(ORG_ENDPOINT, timeout=60)
             self.stdout.write(f"Статус код API организаций: {response.status_code}")
-            logging.info(f"Статус код API организаций: {response.status_code}")
+            logger.debug(f"Статус код API организаций: {response.status_code}")
             if response.status_code != 200:
                 self.stdout.write(f"Сырой ответ API организаций: {response.text[:500]}")
-                logging.info(f"Сырой ответ API организаций: {response.text[:500]}")
+                logger.debug(f"Сырой ответ API организаций: {response.text[:500]}")
             response.raise_for_status()
 
             content_type = response.headers.get("Content-Type", "")
             if "application/json" not in content_type:
                 self.stdout.write(self.style.ERROR(f"❌ Неверный Content-Type для организаций: {content_type}"))
-                logging.error(f"Неверный Content-Type для организаций: {content_type}")
+                logger.error(f"Неверный Content-Type для организаций: {content_type}")
                 return []
 
             data = response.json()
@@ -89,61 +225,97 @@ class Command(BaseCommand):
                 data = data['data']
             org_list = data if isinstance(data, list) else []
             self.stdout.write(f"Загружено организаций из API: {len(org_list)}")
-            logging.info(f"Загружено организаций из API: {len(org_list)}")
+            logger.info(f"Загружено организаций из API: {len(org_list)}")
             return org_list
 
         except Exception as ex:
             self.stdout.write(self.style.ERROR(f"❌ Ошибка при загрузке организаций: {ex}"))
-            logging.error(f"Ошибка при загрузке организаций: {ex}")
+            logger.error(f"Ошибка при загрузке организаций: {ex}")
             return []
 
-    def fetch_employees(self, organization_id):
-        """Загружает сотрудников для указанной организации без пагинации."""
+    def stream_employees(self, organization_id):
+        """Отдаёт сотрудников организации по одному по мере чтения ответа API (без пагинации)."""
         url = f"{EMPLOYEES_ENDPOINT}?OrganizationId={organization_id}"
-        headers = self.get_auth_headers()
-        session = self.create_session()
-        try:
-            response = session.get(url, headers=headers, timeout=120)
+        with self.session.get(url, timeout=120, stream=True) as response:
             self.stdout.write(f"Статус код API для орг {organization_id}: {response.status_code}")
-            logging.info(f"Статус код API для орг {organization_id}: {response.status_code}")
+            logger.debug(f"Статус код API для орг {organization_id}: {response.status_code}")
             if response.status_code != 200:
                 self.stdout.write(f"Сырой ответ API для орг {organization_id}: {response.text[:500]}")
-                logging.info(f"Сырой ответ API для орг {organization_id}: {response.text[:500]}")
+                logger.debug(f"Сырой ответ API для орг {organization_id}: {response.text[:500]}")
             response.raise_for_status()
 
             content_type = response.headers.get("Content-Type", "")
             if "application/json" not in content_type:
-                self.stdout.write(self.style.ERROR(f"❌ [{organization_id}] Неверный Content-Type: {content_type}"))
-                logging.error(f"[{organization_id}] Неверный Content-Type: {content_type}")
-                return []
+                raise ValueError(f"Неверный Content-Type: {content_type}")
 
-            data = response.json()
-            if isinstance(data, dict) and 'data' in data:
-                data = data['data']
-            emp_list = data if isinstance(data, list) else []
-            self.stdout.write(f"Загружено сотрудников для орг {organization_id}: {len(emp_list)}")
-            logging.info(f"Загружено сотрудников для орг {organization_id}: {len(emp_list)}")
-            return emp_list
+            yield from iter_json_array(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
 
+    def put_cancellable(self, out, item):
+        while not self.cancelled.is_set():
+            try:
+                out.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise FetchCancelled
+
+    def fetch_employees(self, organization_id, out):
+        """
+        Фоновый поток: складывает сотрудников организации в ограниченную очередь out и в конце кладёт None.
+        Если основной поток не успевает, загрузка ждёт — в памяти не больше FETCH_QUEUE_SIZE записей на организацию.
+        Время, количество, успешность и класс ошибки загрузки сохраняются в self.fetch_metrics.
+        """
+        started = time.monotonic()
+        count = 0
+        ok = False
+        error = ''
+        try:
+            for emp in self.stream_employees(organization_id):
+                self.put_cancellable(out, emp)
+                count += 1
+            ok = True
+            self.stdout.write(f"Загружено сотрудников для орг {organization_id}: {count}")
+            logger.info(f"Загружено сотрудников для орг {organization_id}: {count}")
+        except FetchCancelled:
+            return
         except requests.exceptions.Timeout as timeout_err:
+            error = type(timeout_err).__name__
             self.stdout.write(self.style.ERROR(f"❌ Таймаут при загрузке сотрудников для орг {organization_id}: {timeout_err}"))
-            logging.error(f"Таймаут при загрузке сотрудников для орг {organization_id}: {timeout_err}")
-            return []
+            logger.error(f"Таймаут при загрузке сотрудников для орг {organization_id}: {timeout_err}")
         except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 404:
+            error = type(http_err).__name__
+            if http_err.response is not None and http_err.response.status_code == 404:
                 self.stdout.write(self.style.WARNING(f"⚠️ Сотрудники для организации {organization_id} не найдены (404)"))
-                logging.warning(f"Сотрудники для организации {organization_id} не найдены (404)")
-                return []
-            self.stdout.write(self.style.ERROR(f"❌ HTTP ошибка при загрузке сотрудников для организации {organization_id}: {http_err}"))
-            logging.error(f"HTTP ошибка при загрузке сотрудников для организации {organization_id}: {http_err}")
-            return []
+                logger.warning(f"Сотрудники для организации {organization_id} не найдены (404)")
+            else:
+                self.stdout.write(self.style.ERROR(f"❌ HTTP ошибка при загрузке сотрудников для организации {organization_id}: {http_err}"))
+                logger.error(f"HTTP ошибка при загрузке сотрудников для организации {organization_id}: {http_err}")
         except Exception as ex:
+            error = type(ex).__name__
             self.stdout.write(self.style.ERROR(f"❌ Ошибка при загрузке сотрудников для организации {organization_id}: {ex}"))
-            logging.error(f"Ошибка при загрузке сотрудников для организации {organization_id}: {ex}")
-            return []
+            logger.error(f"Ошибка при загрузке сотрудников для организации {organization_id}: {ex}")
 
-    def process_departments(self, departments):
-        """Обрабатывает департаменты без иерархии."""
+        self.fetch_metrics[organization_id] = {
+            'seconds': round(time.monotonic() - started, 2),
+            'employees': count,
+            'ok': ok,
+            'error': error,
+        }
+        try:
+            self.put_cancellable(out, None)
+        except FetchCancelled:
+            pass
+
+    def report_fetch_metrics(self, total_seconds):
+        for org_id, metrics in sorted(self.fetch_metrics.items(), key=lambda item: -item[1]['seconds']):
+            self.stdout.write(f"⏱ Орг {org_id}: {metrics['seconds']} с, сотрудников {metrics['employees']}")
+            logger.info(f"Орг {org_id}: {metrics['seconds']} с, сотрудников {metrics['employees']}")
+        sequential = sum(metrics['seconds'] for metrics in self.fetch_metrics.values())
+        self.stdout.write(f"⏱ Загрузка из API: {total_seconds:.1f} с (последовательно было бы {sequential:.1f} с)")
+        logger.info(f"Загрузка из API: {total_seconds:.1f} с (последовательно было бы {sequential:.1f} с)")
+
+    def process_departments(self, departments, parent_id=None):
+        """Разворачивает дерево департаментов в список с родителями (родитель всегда раньше детей)."""
         new_departments = []
         for dept in departments:
             dept_id = dept.get('UNID')
@@ -151,12 +323,52 @@ class Command(BaseCommand):
             if dept_id and dept_name:
                 new_departments.append({
                     'id': dept_id,
-                    'name': dept_name
+                    'name': dept_name,
+                    'parent_id_id': parent_id,
                 })
                 if 'department' in dept and isinstance(dept.get('department'), list):
-                    new_departments.extend(self.process_departments(dept['department']))
+                    new_departments.extend(self.process_departments(dept['department'], dept_id))
         return new_departments
 
+    def sync_department_tree(self, rows):
+        """
+        Сохраняет дерево департаментов организации: новые создаются, у существующих обновляются
+        название и родитель. Таблица замыкания меняется только для новых и перенесённых.
+        """
+        unique = {}
+        for row in rows:
+            unique.setdefault(row['id'], row)
+        existing = Department.objects.in_bulk(list(unique))
+        created, changed, moved = [], [], []
+        for row in unique.values():
+            dept = existing.get(row['id'])
+            if dept is None:
+                created.append(Department(**row))
+                continue
+            if dept.parent_id_id != row['parent_id_id']:
+                moved.append((dept, dept.parent_id_id))
+            if dept.name != row['name'] or dept.parent_id_id != row['parent_id_id']:
+                dept.name = row['name']
+                dept.parent_id_id = row['parent_id_id']
+                changed.append(dept)
+
+        with transaction.atomic():
+            Department.objects.bulk_create(created, ignore_conflicts=True)
+            add_departments([(dept.id, dept.parent_id_id) for dept in created])
+            for dept, old_parent_id in moved:
+                try:
+                    move_department(dept.id, dept.parent_id_id)
+                except ValueError as e:
+                    # Родитель остаётся прежним, чтобы parent_id не расходился с таблицей замыкания
+                    dept.parent_id_id = old_parent_id
+                    self.stdout.write(self.style.WARNING(f"⚠️ Перенос департамента {dept.id} пропущен: {e}"))
+                    logger.warning(f"Перенос департамента {dept.id} пропущен: {e}")
+            Department.objects.bulk_update(changed, ['name', 'parent_id'])
+        self.lookups['department_id'].update(unique)
+        if created or changed:
+            self.stdout.write(f"Департаменты: новых {len(created)}, изменено {len(changed)}, перенесено {len(moved)}")
+            logger.info(f"Департаменты: новых {len(created)}, изменено {len(changed)}, перенесено {len(moved)}")
+
     def convert_date_format(self, date_str):
         """Преобразует дату из формата DD.MM.YYYY в YYYY-MM-DD."""
         if not date_str:
@@ -166,68 +378,385 @@ class Command(BaseCommand):
             return parsed_date.strftime("%Y-%m-%d")
         except ValueError as e:
             self.stdout.write(self.style.WARNING(f"⚠️ Некорректный формат даты: {date_str}, ошибка: {e}"))
-            logging.warning(f"Некорректный формат даты: {date_str}, ошибка: {e}")
+            logger.debug(f"Некорректный формат даты: {date_str}, ошибка: {e}")
             return None
 
-    def validate_user_data(self, emp, departments, positions, statuses, full_mode=False):
-        """Проверяет данные пользователя. В full_mode пропускает проверки уникальности."""
+    def validate_user_data(self, emp, lookups, user=None):
+        """
+        Проверяет данные пользователя по заранее загруженным справочникам (без запросов к базе).
+        Логин, email и ИИН не должны принадлежать другому пользователю; у существующего user
+        проверяются только изменившиеся значения.
+        """
         login = emp.get('login')
-        department_id = emp.get('department_id')
-        position_id = emp.get('position_id')
-        status_id = emp.get('status_id')
-        email = emp.get('email')
-        iin = emp.get('iin')
-
-        if not full_mode:  # Проверки уникальности только в обычном режиме
-            if User.objects.filter(login__iexact=login).exists():
-                self.stdout.write(self.style.WARNING(f"⚠️ Логин {login} уже существует, пропуск"))
-                logging.warning(f"Логин {login} уже существует, пропуск")
-                return False, 'existing_user'
-            if email and User.objects.filter(email__iexact=email).exists():
-                self.stdout.write(self.style.WARNING(f"⚠️ Email {email} уже существует, пропуск"))
-                logging.warning(f"Email {email} уже существует, пропуск")
-                return False, 'existing_user'
-            if iin and User.objects.filter(iin=iin).exists():
-                self.stdout.write(self.style.WARNING(f"⚠️ IIN {iin} уже существует, пропуск"))
-                logging.warning(f"IIN {iin} уже существует, пропуск")
-                return False, 'existing_user'
-
-        # Проверка внешних ключей (лог, но не пропуск в full_mode)
-        if department_id and not departments.filter(id=department_id).exists():
-            self.stdout.write(self.style.WARNING(f"⚠️ Некорректный department_id {department_id} для {login}"))
-            logging.warning(f"Некорректный department_id {department_id} для {login}")
-            if not full_mode:
-                return False, 'invalid_fk'
-        if position_id and not positions.filter(id=position_id).exists():
-            self.stdout.write(self.style.WARNING(f"⚠️ Некорректный position_id {position_id} для {login}"))
-            logging.warning(f"Некорректный position_id {position_id} для {login}")
-            if not full_mode:
-                return False, 'invalid_fk'
-        if status_id and not statuses.filter(id=status_id).exists():
-            self.stdout.write(self.style.WARNING(f"⚠️ Некорректный status_id {status_id} для {login}"))
-            logging.warning(f"Некорректный status_id {status_id} для {login}")
-            if not full_mode:
+
+        for field, label in (('login', 'Логин'), ('email', 'Email'), ('iin', 'IIN')):
+            value = unique_value(field, emp.get(field))
+            if not value or value not in lookups[field]:
+                continue
+            if user is not None and (value == unique_value(field, getattr(user, field))
+                                     or lookups[field][value] == user.pk):
+                continue
+            self.stdout.write(self.style.WARNING(f"⚠️ {label} {emp.get(field)} уже существует, пропуск"))
+            logger.debug(f"{label} {emp.get(field)} уже существует, пропуск")
+            return False, 'existing_user'
+
+        for field in ('department_id', 'position_id', 'status_id'):
+            value = emp.get(field)
+            if value and value not in lookups[field]:
+                self.stdout.write(self.style.WARNING(f"⚠️ Некорректный {field} {value} для {login}"))
+                logger.debug(f"Некорректный {field} {value} для {login}")
                 return False, 'invalid_fk'
 
         return True, None
 
+    def claim_unique_values(self, record, user):
+        """Отмечает логин, email и ИИН записи занятыми пользователем user (None — новым)."""
+        for field in UNIQUE_FIELDS:
+            value = unique_value(field, record[field])
+            if user is not None:
+                old = unique_value(field, getattr(user, field))
+                if old != value and self.lookups[field].get(old) == user.pk:
+                    del self.lookups[field][old]
+            if value:
+                self.lookups[field].setdefault(value, user.pk if user else None)
+
+    def count(self, org_id, name, n=1):
+        """Увеличивает общий счётчик и счётчик организации."""
+        self.result[name] += n
+        self.org_counts[org_id][name] += n
+
+    def skip(self, org_id, reason, n=1):
+        self.skipped_reasons[reason] += n
+        self.count(org_id, 'skipped', n)
+
+    def add_dimension(self, field, row):
+        if row['id'] not in self.lookups[field]:
+            self.pending_dimensions[field].setdefault(row['id'], row)
+
+    def flush_dimensions(self):
+        """Сохраняет накопленные новые департаменты, должности и статусы (перед каждой пачкой сотрудников)."""
+        for field, model, label in DIMENSIONS:
+            pending = self.pending_dimensions[field]
+            if not pending:
+                continue
+            self.stdout.write(f"Добавление {len(pending)} новых {label}")
+            logger.info(f"Добавление {len(pending)} новых {label}")
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([model(**row) for row in pending.values()], ignore_conflicts=True)
+                    if model is Department:
+                        # Департамент известен только из карточки сотрудника — пока без родителя
+                        add_departments([(dept_id, None) for dept_id in pending])
+                self.lookups[field].update(pending)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Ошибка {label}: {e}"))
+                logger.error(f"Ошибка {label}: {e}")
+            pending.clear()
+
+    def load_lookups(self):
+        """
+        Занятые логины, email и ИИН ({значение: id пользователя}) и существующие ID справочников —
+        для проверок без запросов к базе.
+        """
+        lookups = {field: {} for field in UNIQUE_FIELDS}
+        for user_id, *values in User.objects.values_list('id', *UNIQUE_FIELDS).iterator():
+            for field, value in zip(UNIQUE_FIELDS, values):
+                value = unique_value(field, value)
+                if value:
+                    lookups[field].setdefault(value, user_id)
+        for field, model, _ in DIMENSIONS:
+            lookups[field] = set(model.objects.values_list('id', flat=True))
+        return lookups
+
+    def load_batch_users(self, keyed):
+        """
+        Пользователи для пачки (ключ, запись). Уже синхронизированные находятся по hr_key,
+        остальные (созданные до появления ключа или с прежним ключом) — по ИИН, табельному номеру
+        или логину записи; hr_key таких пользователей перезаписывается.
+        """
+        matched = {user.hr_key: user for user in User.objects.filter(hr_key__in=[key for key, _ in keyed])}
+        matched_ids = {user.pk for user in matched.values()}
+        wanted = {}  # (вид, значение) -> ключ записи
+        for key, record in keyed:
+            if key in matched:
+                continue
+            for ident in (('iin', record['iin']), ('pn', record['personnel_number']), ('login', record['login'])):
+                if ident[1]:
+                    wanted.setdefault(ident, key)
+        if not wanted:
+            return matched
+
+        values = {'iin': [], 'pn': [], 'login': []}
+        for kind, value in wanted:
+            values[kind].append(value)
+        # Ключ меняется, когда в HR появляются ИИН или табельный номер, поэтому ищем среди всех
+        # пользователей, кроме уже сопоставленных записям этого запуска по своему ключу
+        candidates = User.objects.filter(
+            Q(iin__in=values['iin']) | Q(personnel_number__in=values['pn']) | Q(login__in=values['login'])
+        ).order_by('id')
+        for user in candidates:
+            if user.pk in matched_ids or (user.hr_key and user.hr_key in self.seen_keys):
+                continue
+            for ident in (('iin', user.iin), ('pn', user.personnel_number), ('login', user.login.lower())):
+                key = wanted.get(ident)
+                if key and key not in matched:
+                    matched[key] = user
+                    matched_ids.add(user.pk)
+                    break
+        return matched
+
+    def normalize_employees(self, org, employees):
+        """Превращает сырые записи API в словари полей пользователя; новые справочники откладываются в pending."""
+        for emp in employees:
+            self.count(org.id, 'all')
+            if not isinstance(emp, dict):
+                self.stdout.write(self.style.WARNING(f"Пропуск некорректных данных сотрудника: {emp} (тип: {type(emp)})"))
+                logger.debug(f"Пропуск некорректных данных сотрудника: {emp} (тип: {type(emp)})")
+                self.skip(org.id, 'api_error')
+                continue
+
+            login = emp.get("Login", "").split("@")[0].lower()
+            if not login:
+                self.stdout.write(self.style.WARNING(f"Пропуск сотрудника с пустым логином"))
+                logger.debug(f"Пропуск сотрудника с пустым логином")
+                self.skip(org.id, 'empty_login')
+                continue
+
+            department = emp.get("Department")
+            position = emp.get("Position")
+            status = emp.get("Status")
+            emails = emp.get("Email", [])
+            corporate_email = next((e['address'] for e in emails if e.get('type') == 'corporate'), f"{login}@example.com")
+
+            # Добавляем новые департаменты, должности, статусы
+            if department and isinstance(department, dict) and department.get("id"):
+                self.add_dimension('department_id', {'id': department["id"], 'name': department.get('name', 'Unknown')})
+
+            if position and isinstance(position, dict) and position.get("name"):
+                self.add_dimension('position_id', {'id': position.get("id") or position["name"], 'name': position["name"]})
+
+            if status and isinstance(status, dict) and status.get("id"):
+                self.add_dimension('status_id', {'id': status["id"], 'name': status.get('name', 'Unknown')})
+
+            try:
+                birth_date = emp.get("BirthDate", "")
+                formatted_birth_date = self.convert_date_format(birth_date)
+
+                yield {
+                    'login': login,
+                    'last_name': emp.get("LastName", ""),
+                    'first_name': emp.get("FirstName", ""),
+                    'middle_name': emp.get("MiddleName", ""),
+                    'iin': emp.get("IIN", ""),
+                    'email': corporate_email,
+                    'personnel_number': emp.get("PersonnelNumber", ""),
+                    'birth_date': formatted_birth_date,
+                    'is_mol': emp.get("isMOL", False),
+                    'server': emp.get("Server", ""),
+                    'department_id': department.get("id") if department else None,
+                    'position_id': position.get("id") or position.get("name") if position else None,
+                    'status_id': status.get("id") if status else None,
+                    'organization_id': org.id,
+                    'is_active': True,
+                }
+            except Exception as save_err:
+                self.stdout.write(self.style.ERROR(f"❌ Ошибка подготовки данных для {login}: {save_err}"))
+                logger.debug(f"Ошибка подготовки данных для {login}: {save_err}")
+                self.skip(org.id, 'api_error')
+
+    def iter_queue(self, out):
+        while True:
+            emp = out.get()
+            if emp is None:
+                return
+            yield emp
+
+    def process_organization(self, org, out, org_index):
+        """Обрабатывает сотрудников одной организации пачками по мере их загрузки фоновым потоком."""
+        self.stdout.write(f"🔍 Загружается организация {org.id} ({org.name})")
+        logger.info(f"Загружается организация {org.id} ({org.name})")
+        org_from_api = org_index.get(org.id)
+        if org_from_api and 'department' in org_from_api:
+            self.sync_department_tree(self.process_departments(org_from_api['department']))
+
+        # Пачки не пересекают границы организаций, поэтому после последней пачки организация целиком в базе
+        batch = []
+        for record in self.normalize_employees(org, self.iter_queue(out)):
+            batch.append(record)
+            if len(batch) >= USER_BATCH_SIZE:
+                self.sync_batch(org.id, batch)
+                batch = []
+        if batch:
+            self.sync_batch(org.id, batch)
+        self.flush_dimensions()
+
+    def save_checkpoint(self, org, seconds):
+        """Записывает итог организации и текущую сводку запуска — после сбоя с этого места продолжит --resume."""
+        metrics = self.fetch_metrics.get(org.id, {})
+        fetched = bool(metrics.get('ok') and metrics['employees'])
+        if fetched:
+            self.fetched_org_ids.add(org.id)
+        else:
+            self.skipped_reasons['api_error'] += 1
+        HRSyncCheckpoint.objects.update_or_create(
+            run=self.run,
+            organization=org,
+            defaults={
+                'status': HRSyncCheckpoint.STATUSES.COMPLETED if fetched else HRSyncCheckpoint.STATUSES.FAILED,
+                'employees': metrics.get('employees', 0),
+                'counts': dict(self.org_counts[org.id]),
+                'seconds': round(seconds, 2),
+                'error_class': '' if fetched else metrics.get('error') or 'EmptyResponse',
+            },
+        )
+        HRSyncRun.objects.filter(pk=self.run.pk).update(summary=self.build_summary())
+
+    def build_summary(self):
+        return {
+            'result': self.result,
+            'skipped_reasons': self.skipped_reasons,
+            'field_changes': dict(self.field_changes),
+        }
+
+    def start_run(self, resume, full_mode):
+        """
+        Новый запуск или, с --resume, продолжение последнего запуска вместе с накопленной сводкой —
+        только если он не завершён. Старые незавершённые запуски, после которых уже был успешный,
+        не продолжаются: их контрольные точки устарели.
+        """
+        run = HRSyncRun.objects.order_by('-id').first() if resume else None
+        if run is None or run.status == HRSyncRun.STATUSES.COMPLETED:
+            return HRSyncRun.objects.create(full=full_mode)
+
+        done = run.checkpoints.filter(status=HRSyncCheckpoint.STATUSES.COMPLETED).count()
+        self.stdout.write(f"Продолжаем запуск #{run.pk}, уже обработано организаций: {done}")
+        logger.info(f"Продолжаем запуск #{run.pk}, уже обработано организаций: {done}")
+        for name, value in run.summary.get('result', {}).items():
+            self.result[name] = value
+        for reason, value in run.summary.get('skipped_reasons', {}).items():
+            self.skipped_reasons[reason] = value
+        self.field_changes.update(run.summary.get('field_changes', {}))
+        run.status = HRSyncRun.STATUSES.RUNNING
+        run.full = run.full or full_mode
+        run.error_class = ''
+        run.save(update_fields=['status', 'full', 'error_class'])
+        return run
+
+    def finish_run(self, status, error_class=''):
+        self.run.status = status
+        self.run.error_class = error_class
+        self.run.finished_at = timezone.now()
+        self.run.summary = self.build_summary()
+        self.run.save(update_fields=['status', 'error_class', 'finished_at', 'summary'])
+
+    def sync_batch(self, org_id, records):
+        """
+        Сверяет пачку записей с базой: новых создаёт, у изменившихся обновляет только отличающиеся поля.
+        Пачка пишется одной транзакцией, при ошибке теряется только она.
+        """
+        self.flush_dimensions()
+
+        keyed = []
+        for record in records:
+            key = employee_key(record)
+            if key in self.seen_keys:
+                self.skip(org_id, 'duplicate')
+                continue
+            self.seen_keys.add(key)
+            keyed.append((key, record))
+        users = self.load_batch_users(keyed)
+
+        new_users = []
+        updates = {}  # tuple(изменённые поля) -> [пользователи]
+        field_changes = Counter()
+        for key, record in keyed:
+            digest = record_hash(record)
+            user = users.get(key)
+
+            if user is None:
+                is_valid, reason = self.validate_user_data(record, self.lookups)
+                if not is_valid:
+                    self.skip(org_id, reason)
+                    continue
+                # Повтор логина, email или ИИН дальше в этой же выгрузке — тоже конфликт
+                self.claim_unique_values(record, None)
+                new_users.append(User(
+                    **record,
+                    hr_key=key,
+                    hr_hash=digest,
+                    role=User.ROLES.GUEST,
+                    password=DEFAULT_PASSWORD_HASH,  # Используем предварительно вычисленный хеш
+                ))
+                continue
+
+            if not self.full_mode and user.hr_key == key and user.hr_hash == digest:
+                self.count(org_id, 'unchanged')
+                continue
+
+            changed = [field for field in SYNC_FIELDS
+                       if normalize_value(getattr(user, field)) != normalize_value(record[field])]
+            if changed:
+                is_valid, reason = self.validate_user_data(record, self.lookups, user=user)
+                if not is_valid:
+                    self.skip(org_id, reason)
+                    continue
+                self.claim_unique_values(record, user)
+            for field in changed:
+                setattr(user, field, record[field])
+            field_changes.update(changed)
+            if user.hr_key != key:
+                changed.append('hr_key')
+                user.hr_key = key
+            user.hr_hash = digest
+            updates.setdefault(tuple(changed) + ('hr_hash',), []).append(user)
+
+        updated = sum(len(group) for group in updates.values())
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(new_users)
+                for fields, group in updates.items():
+                    User.objects.bulk_update(group, fields)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"❌ Ошибка записи пачки ({len(new_users) + updated} сотрудников): {e}"))
+            logger.error(f"Ошибка записи пачки ({len(new_users) + updated} сотрудников): {e}")
+            self.skip(org_id, 'batch_error', len(new_users) + updated)
+            return
+
+        self.count(org_id, 'new', len(new_users))
+        for fields, group in updates.items():
+            # Пользователь, у которого изменились только hr_key/hr_hash, считается неизменным
+            self.count(org_id, 'updated' if set(fields) - {'hr_key', 'hr_hash'} else 'unchanged', len(group))
+        self.field_changes.update(field_changes)
+        self.stdout.write(f"Записана пачка: новых {len(new_users)}, обновлено {updated}")
+        logger.debug(f"Записана пачка: новых {len(new_users)}, обновлено {updated}")
+
+    def deactivate_missing(self):
+        """Деактивирует ранее синхронизированных сотрудников загруженных организаций, которых нет в выгрузке."""
+        candidates = User.objects.filter(
+            organization_id__in=self.fetched_org_ids, is_active=True, hr_key__isnull=False,
+        ).values_list('id', 'hr_key')
+        to_deactivate = [user_id for user_id, key in candidates.iterator() if key not in self.seen_keys]
+        # hr_hash сбрасывается, чтобы при возвращении сотрудника запись сравнилась заново
+        for i in range(0, len(to_deactivate), USER_BATCH_SIZE):
+            User.objects.filter(id__in=to_deactivate[i:i + USER_BATCH_SIZE]).update(is_active=False, hr_hash='')
+        self.result['deactivated'] += len(to_deactivate)
+
     def handle(self, *args, **options):
+        # Блокировка в общем кеше (Redis): ночная задача и ручной запуск не импортируют одновременно
+        token = uuid.uuid4().hex
+        if not cache.add(HR_SYNC_LOCK_KEY, token, HR_SYNC_LOCK_TIMEOUT):
+            raise SyncAlreadyRunning("Синхронизация с HR уже выполняется в другом процессе.")
+        try:
+            self.synchronize(options)
+        finally:
+            if cache.get(HR_SYNC_LOCK_KEY) == token:
+                cache.delete(HR_SYNC_LOCK_KEY)
+
+    def synchronize(self, options):
         full_mode = options['full']
         if full_mode:
-            self.stdout.write(self.style.WARNING("⚠️ Режим --full: Игнорируем существующих сотрудников и перезагружаем всех!"))
-            logging.warning("Режим --full: Игнорируем существующих сотрудников и перезагружаем всех!")
-            try:
-                self.stdout.write("Очистка существующих данных...")
-                logging.info("Очистка существующих данных...")
-                User.objects.all().delete()
-                Department.objects.all().delete()
-                Position.objects.all().delete()
-                Status.objects.all().delete()
-                Organization.objects.all().delete()
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Ошибка при очистке базы: {e}"))
-                logging.error(f"Ошибка при очистке базы: {e}")
-                raise CommandError("Не удалось очистить базу данных.")
+            self.stdout.write(self.style.WARNING("⚠️ Режим --full: сравниваем все поля всех сотрудников без учёта хешей"))
+            logger.warning("Режим --full: сравниваем все поля всех сотрудников без учёта хешей")
 
         # Оптимизация SQLite
         self.optimize_sqlite()
@@ -235,15 +764,39 @@ class Command(BaseCommand):
         # Проверка таблиц
         self.check_tables()
 
-        result = {'all': 0, 'new': 0, 'skipped': 0}
-        skipped_reasons = {'existing_user': 0, 'invalid_fk': 0, 'empty_login': 0, 'api_error': 0}
+        self.result = Counter({'all': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'deactivated': 0, 'skipped': 0})
+        self.skipped_reasons = Counter({'existing_user': 0, 'invalid_fk': 0, 'empty_login': 0, 'api_error': 0,
+                                        'duplicate': 0, 'batch_error': 0})
+        self.field_changes = Counter()
+        self.org_counts = defaultdict(Counter)
+        self.seen_keys = set()
+        self.fetched_org_ids = set()
+        self.run = self.start_run(options['resume'], full_mode)
+        self.full_mode = self.run.full
+
+        try:
+            self.sync(options)
+        except Exception as e:
+            self.finish_run(HRSyncRun.STATUSES.FAILED, type(e).__name__)
+            raise
+        finally:
+            # Пачки пишутся в обход сигналов, поэтому справочник и сводки сбрасываются здесь
+            invalidate_directory()
+            invalidate_summaries()
+        self.finish_run(HRSyncRun.STATUSES.COMPLETED)
+        self.report()
+
+    def sync(self, options):
+        workers = max(1, options['workers'])
+        self.session = self.create_session(pool_size=workers, retries=options['retries'])
+        self.fetch_metrics = {}
 
         # Загружаем организации из API
         org_data = self.fetch_organizations()
         if not org_data:
             self.stdout.write(self.style.ERROR("❌ Не удалось загрузить данные об организациях. Завершение работы."))
-            logging.error("Не удалось загрузить данные об организациях. Завершение работы.")
-            return
+            logger.error("Не удалось загрузить данные об организациях. Завершение работы.")
+            raise CommandError("Не удалось загрузить данные об организациях.")
 
         with transaction.atomic():
             for org in org_data:
@@ -254,14 +807,12 @@ class Command(BaseCommand):
                         Organization.objects.get_or_create(id=org_id, defaults={'name': org_name})
                     except Exception as e:
                         self.stdout.write(self.style.ERROR(f"❌ Ошибка сохранения организации {org_id}: {e}"))
-                        logging.error(f"Ошибка сохранения организации {org_id}: {e}")
-            self.stdout.write(f"Сохраненные организации: {list(Organization.objects.values('id', 'name'))}")
-            logging.info(f"Сохраненные организации: {list(Organization.objects.values('id', 'name'))}")
+                        logger.error(f"Ошибка сохранения организации {org_id}: {e}")
 
         # Проверяем наличие организаций
         organizations = Organization.objects.all()
         self.stdout.write(f"Найдено организаций в базе: {organizations.count()}")
-        logging.info(f"Найдено организаций в базе: {organizations.count()}")
+        logger.info(f"Найдено организаций в базе: {organizations.count()}")
 
         # Список исключённых организаций
         excluded_org_ids = [
@@ -273,207 +824,69 @@ class Command(BaseCommand):
         ]
         organizations = organizations.exclude(id__in=excluded_org_ids)
         self.stdout.write(f"Организации после исключения: {organizations.count()}")
-        logging.info(f"Организации после исключения: {organizations.count()}")
+        logger.info(f"Организации после исключения: {organizations.count()}")
 
-        # Загружаем существующие данные из базы
-        db_employees = User.objects.all()
-        self.stdout.write(f"Существующих сотрудников в базе: {db_employees.count()}")
-        logging.info(f"Существующих сотрудников в базе: {db_employees.count()}")
-        departments = Department.objects.all()
-        positions = Position.objects.all()
-        statuses = Status.objects.all()
-
-        # Получаем существующие ID для оптимизации
-        existing_dept_ids = set(departments.values_list('id', flat=True))
-        existing_pos_ids = set(positions.values_list('id', flat=True))
-        existing_status_ids = set(statuses.values_list('id', flat=True))
-        new_departments = []
-        new_positions = []
-        new_statuses = []
-        all_new_employees = []
+        # При продолжении запуска уже обработанные организации пропускаются
+        done_ids = set(self.run.checkpoints.filter(status=HRSyncCheckpoint.STATUSES.COMPLETED)
+                       .values_list('organization_id', flat=True))
+        organizations = [org for org in organizations if org.id not in done_ids]
 
+        # Загружаем существующие данные из базы
+        users_count = User.objects.count()
+        self.stdout.write(f"Существующих сотрудников в базе: {users_count}")
+        logger.info(f"Существующих сотрудников в базе: {users_count}")
+
+        # Занятые логины/email/ИИН и ID справочников; новые справочники копятся до следующей пачки
+        self.lookups = self.load_lookups()
+        self.pending_dimensions = {field: {} for field, _, _ in DIMENSIONS}
+
+        # Организации из API по UNID и BIN
+        org_index = {}
+        for o in org_data:
+            for field in ('UNID', 'BIN'):
+                if o.get(field):
+                    org_index.setdefault(o[field], o)
+
+        # Загрузка из API идёт параллельно в ограниченные очереди, а обработка — строго по порядку
+        # организаций в основном потоке, с контрольной точкой после каждой организации
+        queues = {org.id: queue.Queue(maxsize=FETCH_QUEUE_SIZE) for org in organizations}
+        self.cancelled = threading.Event()
+        fetch_started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=workers)
         for org in organizations:
-            self.stdout.write(f"🔍 Загружается организация {org.id} ({org.name})")
-            logging.info(f"Загружается организация {org.id} ({org.name})")
-            org_from_api = next((o for o in org_data if o.get('UNID') == org.id or o.get('BIN') == org.id), None)
-            if org_from_api and 'department' in org_from_api:
-                new_depts = self.process_departments(org_from_api['department'])
-                new_departments.extend([d for d in new_depts if d['id'] not in existing_dept_ids])
-
-            employees = self.fetch_employees(org.id)
-            if not employees:
-                skipped_reasons['api_error'] += 1
-                continue
-
-            for emp in employees:
-                result['all'] += 1
-                if not isinstance(emp, dict):
-                    self.stdout.write(self.style.WARNING(f"Пропуск некорректных данных сотрудника: {emp} (тип: {type(emp)})"))
-                    logging.warning(f"Пропуск некорректных данных сотрудника: {emp} (тип: {type(emp)})")
-                    skipped_reasons['api_error'] += 1
-                    result['skipped'] += 1
-                    continue
-
-                login = emp.get("Login", "").split("@")[0].lower()
-                if not login:
-                    self.stdout.write(self.style.WARNING(f"Пропуск сотрудника с пустым логином"))
-                    logging.warning(f"Пропуск сотрудника с пустым логином")
-                    skipped_reasons['empty_login'] += 1
-                    result['skipped'] += 1
-                    continue
-
-                department = emp.get("Department")
-                position = emp.get("Position")
-                status = emp.get("Status")
-                emails = emp.get("Email", [])
-                corporate_email = next((e['address'] for e in emails if e.get('type') == 'corporate'), f"{login}@example.com")
-
-                # Добавляем новые департаменты, должности, статусы
-                if department and isinstance(department, dict) and department.get("id"):
-                    dept_id = department["id"]
-                    if dept_id not in existing_dept_ids and not any(d['id'] == dept_id for d in new_departments):
-                        new_departments.append({'id': dept_id, 'name': department.get('name', 'Unknown')})
-
-                if position and isinstance(position, dict) and position.get("name"):
-                    pos_name = position["name"]
-                    pos_id = position.get("id") or pos_name
-                    if pos_id not in existing_pos_ids and not any(p['id'] == pos_id for p in new_positions):
-                        new_positions.append({'id': pos_id, 'name': pos_name})
-
-                if status and isinstance(status, dict) and status.get("id"):
-                    status_id = status["id"]
-                    if status_id not in existing_status_ids and not any(s['id'] == status_id for s in new_statuses):
-                        new_statuses.append({'id': status_id, 'name': status.get('name', 'Unknown')})
+            executor.submit(self.fetch_employees, org.id, queues[org.id])
 
-                try:
-                    birth_date = emp.get("BirthDate", "")
-                    formatted_birth_date = self.convert_date_format(birth_date)
-
-                    new_user = {
-                        'login': login,
-                        'last_name': emp.get("LastName", ""),
-                        'first_name': emp.get("FirstName", ""),
-                        'middle_name': emp.get("MiddleName", ""),
-                        'iin': emp.get("IIN", ""),
-                        'email': corporate_email,
-                        'personnel_number': emp.get("PersonnelNumber", ""),
-                        'birth_date': formatted_birth_date,
-                        'is_mol': emp.get("isMOL", False),
-                        'server': emp.get("Server", ""),
-                        'department_id': department.get("id") if department else None,
-                        'position_id': position.get("id") or position.get("name") if position else None,
-                        'status_id': status.get("id") if status else None,
-                        'organization': org,
-                        'role': User.ROLES.GUEST,
-                    }
-
-                    is_valid, reason = self.validate_user_data(new_user, departments, positions, statuses, full_mode)
-                    if is_valid:
-                        all_new_employees.append(new_user)
-                    else:
-                        skipped_reasons[reason] += 1
-                        result['skipped'] += 1
-                except Exception as save_err:
-                    self.stdout.write(self.style.ERROR(f"❌ Ошибка подготовки данных для {login}: {save_err}"))
-                    logging.error(f"Ошибка подготовки данных для {login}: {save_err}")
-                    skipped_reasons['api_error'] += 1
-                    result['skipped'] += 1
-
-        # Сохранение новых департаментов, должностей, статусов
-        with transaction.atomic():
-            if new_departments:
-                self.stdout.write(f"Добавление {len(new_departments)} новых департаментов")
-                logging.info(f"Добавление {len(new_departments)} новых департаментов")
-                try:
-                    Department.objects.bulk_create([Department(**dept) for dept in new_departments], ignore_conflicts=True)
-                    existing_dept_ids.update([d['id'] for d in new_departments])
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Ошибка департаментов: {e}"))
-                    logging.error(f"Ошибка департаментов: {e}")
-
-            if new_positions:
-                self.stdout.write(f"Добавление {len(new_positions)} новых должностей")
-                logging.info(f"Добавление {len(new_positions)} новых должностей")
-                try:
-                    Position.objects.bulk_create([Position(**pos) for pos in new_positions], ignore_conflicts=True)
-                    existing_pos_ids.update([p['id'] for p in new_positions])
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Ошибка должностей: {e}"))
-                    logging.error(f"Ошибка должностей: {e}")
-
-            if new_statuses:
-                self.stdout.write(f"Добавление {len(new_statuses)} новых статусов")
-                logging.info(f"Добавление {len(new_statuses)} новых статусов")
-                try:
-                    Status.objects.bulk_create([Status(**status) for status in new_statuses], ignore_conflicts=True)
-                    existing_status_ids.update([s['id'] for s in new_statuses])
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Ошибка статусов: {e}"))
-                    logging.error(f"Ошибка статусов: {e}")
-
-        # Обновляем списки
-        departments = Department.objects.all()
-        positions = Position.objects.all()
-        statuses = Status.objects.all()
-
-        # Создание пользователей (по батчам по 1000 для скорости)
-        new_users = []
-        batch_size = 1000
-        with transaction.atomic():
-            for i, emp in enumerate(all_new_employees):
-                try:
-                    user = User(
-                        login=emp['login'],
-                        last_name=emp['last_name'],
-                        first_name=emp['first_name'],
-                        middle_name=emp['middle_name'],
-                        iin=emp['iin'],
-                        email=emp['email'],
-                        personnel_number=emp['personnel_number'],
-                        birth_date=emp['birth_date'],
-                        is_mol=emp['is_mol'],
-                        server=emp['server'],
-                        department_id=emp['department_id'],
-                        position_id=emp['position_id'],
-                        status_id=emp['status_id'],
-                        organization=emp['organization'],
-                        role=emp['role'],
-                        password=DEFAULT_PASSWORD_HASH,  # Используем предварительно вычисленный хеш
-                    )
-                    new_users.append(user)
-                    result['new'] += 1
-
-                    # Создаём батч
-                    if len(new_users) >= batch_size or i == len(all_new_employees) - 1:
-                        try:
-                            User.objects.bulk_create(new_users, ignore_conflicts=not full_mode)
-                            self.stdout.write(f"Успешно добавлено батч: {len(new_users)} пользователей")
-                            logging.info(f"Успешно добавлено батч: {len(new_users)} пользователей")
-                            new_users = []
-                        except IntegrityError as e:
-                            self.stdout.write(self.style.ERROR(f"❌ Ошибка батча (дубликаты): {e}"))
-                            logging.error(f"Ошибка батча (дубликаты): {e}")
-                            if full_mode:
-                                for u in new_users:
-                                    try:
-                                        u.save()
-                                    except Exception as ue:
-                                        self.stdout.write(self.style.WARNING(f"⚠️ Пропуск пользователя {u.login}: {ue}"))
-                                        logging.warning(f"Пропуск пользователя {u.login}: {ue}")
-                                        result['skipped'] += 1
-                                        skipped_reasons['invalid_data'] += 1
-                            new_users = []
-                except Exception as save_err:
-                    self.stdout.write(self.style.ERROR(f"❌ Ошибка подготовки {emp['login']}: {save_err}"))
-                    logging.error(f"Ошибка подготовки {emp['login']}: {save_err}")
-                    result['skipped'] += 1
-                    skipped_reasons['invalid_data'] += 1
-
-        # Итоговый отчёт
-        self.stdout.write(f"ИТОГО: Обработано {result['all']}, Добавлено {result['new']}, Пропущено {result['skipped']}")
-        logging.info(f"ИТОГО: Обработано {result['all']}, Добавлено {result['new']}, Пропущено {result['skipped']}")
-        self.stdout.write(f"Причины пропусков: existing_user={skipped_reasons['existing_user']}, invalid_fk={skipped_reasons['invalid_fk']}, empty_login={skipped_reasons['empty_login']}, api_error={skipped_reasons['api_error']}")
-        logging.info(f"Причины пропусков: existing_user={skipped_reasons['existing_user']}, invalid_fk={skipped_reasons['invalid_fk']}, empty_login={skipped_reasons['empty_login']}, api_error={skipped_reasons['api_error']}")
-        if result['new'] < result['all'] * 0.8:
+        try:
+            for org in organizations:
+                started = time.monotonic()
+                self.process_organization(org, queues.pop(org.id), org_index)
+                self.save_checkpoint(org, time.monotonic() - started)
+        finally:
+            self.cancelled.set()
+            executor.shutdown(cancel_futures=True)
+        self.report_fetch_metrics(time.monotonic() - fetch_started)
+
+        # Уволенные — только среди организаций, загруженных в этом запуске
+        self.deactivate_missing()
+
+    def report(self):
+        result = self.result
+        summary = (f"ИТОГО: Обработано {result['all']}, Добавлено {result['new']}, Обновлено {result['updated']}, "
+                   f"Без изменений {result['unchanged']}, Деактивировано {result['deactivated']}, "
+                   f"Пропущено {result['skipped']}")
+        self.stdout.write(summary)
+        logger.info(summary)
+        reasons = ", ".join(f"{reason}={count}" for reason, count in self.skipped_reasons.items())
+        self.stdout.write(f"Причины пропусков: {reasons}")
+        logger.info(f"Причины пропусков: {reasons}")
+        if self.field_changes:
+            changes = ", ".join(f"{field}={count}" for field, count in self.field_changes.most_common())
+            self.stdout.write(f"Изменённые поля: {changes}")
+            logger.info(f"Изменённые поля: {changes}")
+        failed = self.run.checkpoints.filter(status=HRSyncCheckpoint.STATUSES.FAILED)
+        for checkpoint in failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ Орг {checkpoint.organization_id}: {checkpoint.error_class}"))
+        processed = result['new'] + result['updated'] + result['unchanged']
+        if processed < result['all'] * 0.8:
             self.stdout.write(self.style.ERROR("❌ Обработано менее 80% — проверьте логи пропусков!"))
-            logging.error("Обработано менее 80% — проверьте логи пропусков!")
\ No newline at end of file
+            logger.error("Обработано менее 80% — проверьте логи пропусков!")
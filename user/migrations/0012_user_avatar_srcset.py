@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_srcset',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_user_avatar_srcset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='hr_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='hr_key',
+            field=models.CharField(blank=True, max_length=120, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0013_user_hr_key_hr_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HRSyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('completed', 'Завершён'), ('failed', 'Ошибка')], default='running', max_length=20)),
+                ('full', models.BooleanField(default=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('error_class', models.CharField(blank=True, default='', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Синхронизация с HR',
+                'verbose_name_plural': 'Синхронизации с HR',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HRSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('completed', 'Обработана'), ('failed', 'Ошибка')], max_length=20)),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('counts', models.JSONField(blank=True, default=dict)),
+                ('seconds', models.FloatField(default=0)),
+                ('error_class', models.CharField(blank=True, default='', max_length=100)),
+                ('finished_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_checkpoints', to='user.organization')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='user.hrsyncrun')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка синхронизации',
+                'verbose_name_plural': 'Контрольные точки синхронизации',
+                'unique_together': {('run', 'organization')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Department = apps.get_model('user', 'Department')
+    DepartmentClosure = apps.get_model('user', 'DepartmentClosure')
+    parents = dict(Department.objects.values_list('id', 'parent_id_id'))
+    rows = []
+    for node_id in parents:
+        current, depth, seen = node_id, 0, set()
+        while current in parents and current not in seen:
+            seen.add(current)
+            rows.append(DepartmentClosure(ancestor_id=current, descendant_id=node_id, depth=depth))
+            current = parents[current]
+            depth += 1
+    DepartmentClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0014_hrsyncrun_hrsynccheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='user.department')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='user.department')),
+            ],
+            options={
+                'verbose_name': 'Связь департаментов',
+                'verbose_name_plural': 'Связи департаментов',
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
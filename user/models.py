@@ -62,6 +62,21 @@ class Department(models.Model):
         verbose_name_plural = 'Департаменты'
 
 
+# Замыкание иерархии департаментов: строка на каждую пару (предок, потомок), включая (d, d, 0)
+class DepartmentClosure(models.Model):
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f'{self.ancestor_id} → {self.descendant_id} ({self.depth})'
+
+    class Meta:
+        verbose_name = 'Связь департаментов'
+        verbose_name_plural = 'Связи департаментов'
+        unique_together = ('ancestor', 'descendant')
+
+
 # Position Model
 class Position(models.Model):
     id = models.CharField(max_length=100, primary_key=True)
@@ -104,6 +119,7 @@ class User(AbstractBaseUser):
         )
 
     avatar = models.ImageField(upload_to='avatars/%Y', blank=True, null=True)
+    avatar_srcset = models.JSONField(default=dict, blank=True)
     first_name = models.CharField(max_length=100, blank=True, default='')
     last_name = models.CharField(max_length=100, blank=True, default='')
     middle_name = models.CharField(max_length=100, blank=True, null=True)
@@ -120,6 +136,10 @@ class User(AbstractBaseUser):
     is_mol = models.BooleanField(default=False)  # Materially responsible person
     server = models.CharField(max_length=100, blank=True, null=True)
 
+    # Синхронизация с HR: стабильный ключ сотрудника и хеш последней загруженной записи
+    hr_key = models.CharField(max_length=120, unique=True, blank=True, null=True)
+    hr_hash = models.CharField(max_length=64, blank=True, default='')
+
     # Foreign keys to related models
     organization = models.ForeignKey(Organization, on_delete=models.SET_NULL, null=True, blank=True)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
@@ -171,4 +191,62 @@ class User(AbstractBaseUser):
 
     class Meta:
         verbose_name = 'Пользователь'
-        verbose_name_plural = 'Пользователи'
\ No newline at end of file
+        verbose_name_plural = 'Пользователи'
+
+# Запуск синхронизации сотрудников с HR
+class HRSyncRun(models.Model):
+    class STATUSES:
+        RUNNING = 'running'
+        COMPLETED = 'completed'
+        FAILED = 'failed'
+
+        STATUS_CHOICES = (
+            (RUNNING, 'Выполняется'),
+            (COMPLETED, 'Завершён'),
+            (FAILED, 'Ошибка'),
+        )
+
+    status = models.CharField(max_length=20, choices=STATUSES.STATUS_CHOICES, default=STATUSES.RUNNING)
+    full = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Итоги: счётчики, причины пропусков, изменённые поля, время загрузки
+    summary = models.JSONField(default=dict, blank=True)
+    error_class = models.CharField(max_length=100, blank=True, default='')
+
+    def __str__(self):
+        return f'{self.started_at:%Y-%m-%d %H:%M} — {self.status}'
+
+    class Meta:
+        verbose_name = 'Синхронизация с HR'
+        verbose_name_plural = 'Синхронизации с HR'
+        ordering = ['-id']
+
+
+# Контрольная точка: организация, обработанная в рамках запуска
+class HRSyncCheckpoint(models.Model):
+    class STATUSES:
+        COMPLETED = 'completed'
+        FAILED = 'failed'
+
+        STATUS_CHOICES = (
+            (COMPLETED, 'Обработана'),
+            (FAILED, 'Ошибка'),
+        )
+
+    run = models.ForeignKey(HRSyncRun, on_delete=models.CASCADE, related_name='checkpoints')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='sync_checkpoints')
+    status = models.CharField(max_length=20, choices=STATUSES.STATUS_CHOICES)
+    employees = models.PositiveIntegerField(default=0)
+    counts = models.JSONField(default=dict, blank=True)
+    seconds = models.FloatField(default=0)
+    error_class = models.CharField(max_length=100, blank=True, default='')
+    finished_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.run_id}: {self.organization_id} — {self.status}'
+
+    class Meta:
+        verbose_name = 'Контрольная точка синхронизации'
+        verbose_name_plural = 'Контрольные точки синхронизации'
+        unique_together = ('run', 'organization')
@@ -1,6 +1,7 @@
 from djoser.serializers import TokenSerializer
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from news.images import ImageSrcsetField
 from news.models import News
 from django.db.models import Sum
 
@@ -35,6 +36,25 @@ class UserDepartmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
+class DepartmentSerializer(serializers.ModelSerializer):
+    parent = serializers.CharField(source='parent_id_id', read_only=True)
+
+    class Meta:
+        model = Department
+        fields = ['id', 'name', 'parent']
+
+
+class DepartmentEmployeeSerializer(serializers.ModelSerializer):
+    """Сотрудник в оргструктуре: без персональных данных (ИИН, даты рождения, телефона, email)."""
+    position = UserPositionSerializer(read_only=True)
+    department = UserDepartmentSerializer(read_only=True)
+    avatar_srcset = ImageSrcsetField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name', 'middle_name', 'avatar', 'avatar_srcset', 'position', 'department']
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -66,11 +86,12 @@ class UserSerializer(serializers.ModelSerializer):
     position = UserPositionSerializer(read_only=True)
     organization = UserOrganizationSerializer(read_only=True)
     department = UserDepartmentSerializer(read_only=True)
+    avatar_srcset = ImageSrcsetField()
 
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 'middle_name', 'login', 'iin', 'birth_date', 'department',
             'phone_number', 'role',
-            'avatar', 'is_active', 'is_staff', 'is_admin', 'is_superuser', 'groups', 'position', 'organization'
+            'avatar', 'avatar_srcset', 'is_active', 'is_staff', 'is_admin', 'is_superuser', 'groups', 'position', 'organization'
         ]
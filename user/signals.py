@@ -1,9 +1,21 @@
 from django.conf import settings
 from twilio.rest import Client
 from djoser.signals import user_registered
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
 from django.dispatch import receiver
 import random
 
+from rest_framework.authtoken.models import Token
+
+from ADM.models import UserGroup, Region, City
+from news.images import schedule_derivatives
+from .authentication import invalidate_token, invalidate_user
+from .directory import DIRECTORY_FIELDS, invalidate_directory
+from .hierarchy import add_departments, move_department
+from .models import User, Department, Position, Organization
+from .summaries import SUMMARY_FIELDS, invalidate_summaries, invalidate_user_summaries
+
 
 @receiver(user_registered)
 def handle_user_registered(sender, user, request, **kwargs):
@@ -20,6 +32,102 @@ def handle_user_registered(sender, user, request, **kwargs):
             profile.is_staff = True
 
 
+@receiver(post_save, sender=User)
+def build_avatar_derivatives(sender, instance, **kwargs):
+    schedule_derivatives(instance, 'avatar')
+
+
+@receiver(post_save, sender=User)
+def invalidate_directory_on_save(sender, instance, update_fields=None, **kwargs):
+    # Обновление last_login при каждом входе индекс не трогает. Версия меняется после коммита,
+    # иначе другой процесс успеет собрать индекс из старых строк под новой версией
+    if update_fields is None or DIRECTORY_FIELDS & set(update_fields):
+        transaction.on_commit(invalidate_directory)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_directory_on_change(sender, **kwargs):
+    # В выдаче поиска есть названия должности и департамента
+    transaction.on_commit(invalidate_directory)
+
+
+@receiver(post_save, sender=User)
+def invalidate_summaries_on_save(sender, instance, update_fields=None, **kwargs):
+    # Обновление last_login при входе сводку не меняет
+    if update_fields is None or SUMMARY_FIELDS & set(update_fields):
+        transaction.on_commit(lambda: invalidate_user_summaries([instance.pk]))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_summaries_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_user_summaries([instance.pk]))
+
+
+@receiver(post_save, sender=UserGroup)
+@receiver(post_delete, sender=UserGroup)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_summaries_on_change(sender, **kwargs):
+    # Названия групп, должностей, организаций, департаментов, областей и городов есть в сводках многих
+    transaction.on_commit(invalidate_summaries)
+
+
+@receiver(m2m_changed, sender=UserGroup.users.through)
+def invalidate_summaries_on_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    # Сводка содержит группы пользователя и регион/город первой группы
+    if action in ('post_add', 'post_remove'):
+        user_ids = [instance.pk] if reverse else list(pk_set)
+        transaction.on_commit(lambda: invalidate_user_summaries(user_ids))
+    elif action == 'post_clear':
+        transaction.on_commit(invalidate_summaries)
+
+
+@receiver(m2m_changed, sender=UserGroup.regions.through)
+@receiver(m2m_changed, sender=UserGroup.cities.through)
+def invalidate_summaries_on_group_location(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(invalidate_summaries)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_auth_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(pre_save, sender=Department)
+def remember_department_parent(sender, instance, **kwargs):
+    instance._previous_parent = (
+        Department.objects.filter(pk=instance.pk).values_list('parent_id_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Department)
+def update_department_closure(sender, instance, created, **kwargs):
+    # Импорт из HR пишет департаменты пачками и обновляет замыкание сам; здесь — правки через админку
+    if created:
+        add_departments([(instance.pk, instance.parent_id_id)])
+    elif instance._previous_parent != instance.parent_id_id:
+        move_department(instance.pk, instance.parent_id_id)
+
+
 def send_confirmation_code(phone_number, confirmation_code):
     account_sid = settings.TWILIO_ACCOUNT_SID
     auth_token = settings.TWILIO_AUTH_TOKEN
@@ -0,0 +1,286 @@
+"""
+Краткие сведения о пользователях для вложенных сериализаторов (автор новости, комментатор,
+участники заявки).
+
+Сводка пользователя — словарь с полями UserSerializer, группами, должностью, организацией,
+департаментом и регионом/городом первой группы. Сводки для набора id загружаются четырьмя
+запросами, хранятся в LRU процесса и в кеше Redis, общем для всех процессов, под ключом с двумя
+версиями: общей и версией пользователя. Версию пользователя увеличивают его сохранение и
+изменение его групп, общую — правки групп, должностей, организаций, департаментов, областей
+и городов (user/signals.py) и синхронизация с HR. Версии меняются после коммита.
+"""
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from news.images import srcset_urls
+from .models import User
+
+SUMMARY_VERSION_KEY = 'user:summary:version'
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+LOCAL_CACHE_SIZE = 4096
+
+# Поля пользователя, изменение которых меняет сводку
+SUMMARY_FIELDS = {
+    'email', 'first_name', 'last_name', 'middle_name', 'login', 'iin', 'birth_date', 'phone_number', 'role',
+    'avatar', 'avatar_srcset', 'is_active', 'is_staff', 'is_admin', 'is_superuser',
+    'position', 'organization', 'department',
+}
+
+# Наборы полей, которые отдают вложенные сериализаторы
+SHAPES = {
+    # как UserSerializer
+    'full': (
+        'id', 'email', 'first_name', 'last_name', 'middle_name', 'login', 'iin', 'birth_date', 'department',
+        'phone_number', 'role', 'avatar', 'avatar_srcset', 'is_active', 'is_staff', 'is_admin', 'is_superuser',
+        'groups', 'position', 'organization',
+    ),
+    # как ADM.serializers.UserShortSerializer
+    'short': ('id', 'first_name', 'last_name', 'email', 'phone_number', 'region', 'city'),
+    # автор комментария в ветке
+    'brief': ('id', 'first_name', 'last_name', 'avatar'),
+}
+
+
+def get_summary_version():
+    version = cache.get(SUMMARY_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(SUMMARY_VERSION_KEY, version, None)
+    return version
+
+
+def user_version_key(user_id):
+    return f'user:summary:version:{user_id}'
+
+
+def bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def invalidate_summaries():
+    """Помечает устаревшими сводки всех пользователей."""
+    bump(SUMMARY_VERSION_KEY)
+
+
+def invalidate_user_summaries(user_ids):
+    """Помечает устаревшими сводки пользователей user_ids."""
+    for user_id in user_ids:
+        bump(user_version_key(user_id))
+
+
+def get_summary_versions(user_ids):
+    """{id: (общая версия, версия пользователя)} одним обращением к кешу."""
+    keys = {user_version_key(user_id): user_id for user_id in user_ids}
+    values = cache.get_many([SUMMARY_VERSION_KEY, *keys])
+    version = values.get(SUMMARY_VERSION_KEY)
+    if version is None:
+        version = get_summary_version()
+    return {user_id: (version, values.get(key, 1)) for key, user_id in keys.items()}
+
+
+def summary_cache_key(version, user_id):
+    return 'user:summary:%s:%s:%s' % (*version, user_id)
+
+
+def related(row, name):
+    return {'id': row[f'{name}_id'], 'name': row[f'{name}__name']} if row[f'{name}_id'] is not None else None
+
+
+def load_summaries(user_ids):
+    """Сводки пользователей из базы: {id: сводка}, четыре запроса на любой набор id."""
+    from ADM.models import UserGroup
+
+    rows = User.objects.filter(pk__in=user_ids).values(
+        'id', 'email', 'first_name', 'last_name', 'middle_name', 'login', 'iin', 'birth_date', 'phone_number',
+        'role', 'avatar', 'avatar_srcset', 'is_active', 'is_staff', 'is_admin', 'is_superuser',
+        'position_id', 'position__name', 'organization_id', 'organization__name',
+        'department_id', 'department__name',
+    )
+    summaries = {}
+    for row in rows:
+        summaries[row['id']] = {
+            'id': row['id'],
+            'email': row['email'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'middle_name': row['middle_name'],
+            'login': row['login'],
+            'iin': row['iin'],
+            'birth_date': row['birth_date'].isoformat() if row['birth_date'] else None,
+            'phone_number': row['phone_number'],
+            'role': row['role'],
+            'avatar': row['avatar'] or None,
+            'avatar_srcset': row['avatar_srcset'],
+            'is_active': row['is_active'],
+            'is_staff': row['is_staff'],
+            'is_admin': row['is_admin'],
+            'is_superuser': row['is_superuser'],
+            'position': related(row, 'position'),
+            'organization': related(row, 'organization'),
+            'department': related(row, 'department'),
+            'groups': [],
+            'region': None,
+            'city': None,
+        }
+    if not summaries:
+        return summaries
+
+    memberships = UserGroup.users.through.objects.filter(user_id__in=summaries).values_list(
+        'user_id', 'usergroup_id', 'usergroup__name').order_by('usergroup_id')
+    for user_id, group_id, group_name in memberships:
+        summaries[user_id]['groups'].append({'id': group_id, 'name': group_name})
+
+    # Регион и город — первые (по id) у первой группы пользователя: при обходе по убыванию id
+    # последним записывается наименьший
+    first_groups = {summary['groups'][0]['id'] for summary in summaries.values() if summary['groups']}
+    regions, cities = {}, {}
+    for group_id, name in UserGroup.regions.through.objects.filter(usergroup_id__in=first_groups).values_list(
+            'usergroup_id', 'region__name').order_by('-region_id'):
+        regions[group_id] = name
+    for group_id, name in UserGroup.cities.through.objects.filter(usergroup_id__in=first_groups).values_list(
+            'usergroup_id', 'city__name').order_by('-city_id'):
+        cities[group_id] = name
+    for summary in summaries.values():
+        if summary['groups']:
+            summary['region'] = regions.get(summary['groups'][0]['id'])
+            summary['city'] = cities.get(summary['groups'][0]['id'])
+    return summaries
+
+
+class SummaryLRU:
+    """LRU сводок процесса: {id: (версии, сводка)}; сводка с другими версиями считается устаревшей."""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, versions):
+        with self.lock:
+            found = {}
+            for user_id, version in versions.items():
+                item = self.items.get(user_id)
+                if item is not None and item[0] == version:
+                    self.items.move_to_end(user_id)
+                    found[user_id] = item[1]
+            return found
+
+    def set_many(self, versions, summaries):
+        with self.lock:
+            for user_id, summary in summaries.items():
+                self.items[user_id] = (versions[user_id], summary)
+                self.items.move_to_end(user_id)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+
+_local = SummaryLRU(LOCAL_CACHE_SIZE)
+
+
+def get_user_summaries(user_ids):
+    """{id: сводка} для набора id: LRU процесса, затем общий кеш, затем одна пачка запросов к базе."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return {}
+    versions = get_summary_versions(user_ids)
+    summaries = _local.get_many(versions)
+    missing = user_ids - summaries.keys()
+    if missing:
+        cached = cache.get_many([summary_cache_key(versions[user_id], user_id) for user_id in missing])
+        found = {summary['id']: summary for summary in cached.values()}
+        missing -= found.keys()
+        if missing:
+            loaded = load_summaries(missing)
+            cache.set_many({summary_cache_key(versions[user_id], user_id): summary
+                            for user_id, summary in loaded.items()}, SUMMARY_CACHE_TIMEOUT)
+            found.update(loaded)
+        _local.set_many(versions, found)
+        summaries.update(found)
+    return summaries
+
+
+def loaded_related(instance, field):
+    """Вложенные объекты поля-сериализатора, уже загруженные вместе с instance (prefetch_related,
+    select_related); незагруженные не читаются, чтобы не делать лишних запросов."""
+    if instance is None or len(field.source_attrs) != 1:
+        return []
+    if isinstance(field, serializers.ListSerializer):
+        prefetched = getattr(instance, '_prefetched_objects_cache', {}).get(field.source)
+        return list(prefetched) if prefetched is not None else []
+    state = getattr(instance, '_state', None)
+    related = state.fields_cache.get(field.source) if state is not None else None
+    return [related] if related is not None else []
+
+
+def collect_user_ids(serializer, instances):
+    """id пользователей во всех полях-сводках serializer и вложенных в него сериализаторов."""
+    user_ids = set()
+    for field in serializer.fields.values():
+        if isinstance(field, UserSummaryField):
+            user_ids.update(getattr(instance, field.source, None) for instance in instances)
+        elif isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.Serializer):
+            nested = [obj for instance in instances for obj in loaded_related(instance, field)]
+            user_ids |= collect_user_ids(field.child, nested)
+        elif isinstance(field, serializers.Serializer):
+            nested = [obj for instance in instances for obj in loaded_related(instance, field)]
+            user_ids |= collect_user_ids(field, nested)
+    return user_ids
+
+
+class UserSummaryField(serializers.Field):
+    """
+    Вложенный пользователь из сводок. source указывает на id пользователя (author_id, user_id_id),
+    поэтому сам объект User не загружается. При первом обращении сводки загружаются одной пачкой
+    для всех полей-сводок выдачи, включая вложенные сериализаторы, чьи объекты загружены через
+    prefetch_related/select_related.
+    """
+
+    def __init__(self, shape='full', **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.shape = shape
+
+    def get_summaries(self):
+        root = self.root
+        if not hasattr(root, '_user_summaries'):
+            root._user_summaries = {}
+            self.load(root, self.tree_user_ids(root))
+        return root._user_summaries
+
+    def tree_user_ids(self, root):
+        """id пользователей во всём дереве сериализаторов, начиная с корня."""
+        if isinstance(root, serializers.ListSerializer):
+            return collect_user_ids(root.child, root.instance or [])
+        if isinstance(root, serializers.Serializer) and root.instance is not None:
+            return collect_user_ids(root, [root.instance])
+        return set()
+
+    def load(self, root, user_ids):
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        # Отсутствующие пользователи запоминаются как None, чтобы не запрашивать их повторно
+        root._user_summaries.update(dict.fromkeys(user_ids))
+        root._user_summaries.update(get_user_summaries(user_ids))
+
+    def to_representation(self, user_id):
+        summaries = self.get_summaries()
+        if user_id not in summaries:
+            self.load(self.root, {user_id})
+        summary = summaries.get(user_id)
+        if summary is None:
+            return None
+
+        request = self.context.get('request')
+        data = {name: summary[name] for name in SHAPES[self.shape]}
+        if data.get('avatar'):
+            url = default_storage.url(data['avatar'])
+            data['avatar'] = request.build_absolute_uri(url) if request else url
+        if 'avatar_srcset' in data:
+            data['avatar_srcset'] = srcset_urls(data['avatar_srcset'], request)
+        return data
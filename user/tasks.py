@@ -1,3 +1,21 @@
+from celery import shared_task
+from django.core.management import call_command
+
+from .management.commands.load_employees import SyncAlreadyRunning
+from .models import HRSyncRun
+
+
+@shared_task
+def sync_employees():
+    """Плановая синхронизация сотрудников с HR. Незавершённый прошлый запуск продолжается с контрольной точки."""
+    try:
+        call_command('load_employees', resume=True)
+    except SyncAlreadyRunning:
+        return None
+    run = HRSyncRun.objects.order_by('-id').first()
+    return {'run': run.pk, 'status': run.status, **run.summary.get('result', {})}
+
+
 # from celery import shared_task
 # from django.core.mail import send_mail
 #
@@ -12,4 +30,4 @@
 #
 #     subject = f'New Post: {post.title}'
 #     message = f'Check out our new post: {post.title}\n\n{post.content}'
-#     send_mail(subject, message, 'your_email@example.com', emails)
\ No newline at end of file
+#     send_mail(subject, message, 'your_email@example.com', emails)
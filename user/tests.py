@@ -1,3 +1,82 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .ad_client import AdClient
+
+
+class FakeAdHandler(BaseHTTPRequestHandler):
+    """Заглушка сервиса AD: принимает только TELECOM\\<логин>, остальные варианты отвечают медленно."""
+    accounts = {'TELECOM\\Kasymov.Dlt': 'secret'}
+    delay = 0.5
+    calls = []
+
+    def do_POST(self):
+        account = unquote(self.path.split('/account/', 1)[1].rsplit('/authorization', 1)[0])
+        password = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['password']
+        self.calls.append(account)
+        if self.accounts.get(account) == password:
+            status, body = 200, {'token': 'ad-token', 'expiresIn': 3600}
+        else:
+            time.sleep(self.delay)
+            status, body = 401, {'detail': 'unauthorized'}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class AdClientTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAdHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(AD_BASE_URL=f'http://127.0.0.1:{cls.server.server_port}/api')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        FakeAdHandler.calls.clear()
+
+    def test_variants_are_probed_concurrently_and_remembered(self):
+        started = time.monotonic()
+        variant, ad_response = AdClient.login('Kasymov.Dlt', 'secret')
+        self.assertEqual(variant, 'TELECOM\\Kasymov.Dlt')
+        self.assertEqual(ad_response['token'], 'ad-token')
+        # Не ждём медленный отказ первого варианта
+        self.assertLess(time.monotonic() - started, FakeAdHandler.delay)
+
+        time.sleep(FakeAdHandler.delay * 2)  # дожидаемся брошенных запросов
+        FakeAdHandler.calls.clear()
+        variant, _ = AdClient.login('Kasymov.Dlt', 'secret')
+        self.assertEqual(variant, 'TELECOM\\Kasymov.Dlt')
+        self.assertEqual(FakeAdHandler.calls, ['TELECOM\\Kasymov.Dlt'])
+
+    def test_wrong_password_takes_one_timeout(self):
+        started = time.monotonic()
+        self.assertEqual(AdClient.login('Kasymov.Dlt', 'wrong'), (None, None))
+        self.assertLess(time.monotonic() - started, FakeAdHandler.delay * 2)
+        self.assertEqual(len(FakeAdHandler.calls), 3)
+
+    def test_wrong_password_for_remembered_variant_is_not_fanned_out(self):
+        cache.set(AdClient.variant_cache_key('Kasymov.Dlt'), 1)
+        self.assertEqual(AdClient.login('Kasymov.Dlt', 'wrong'), (None, None))
+        self.assertEqual(FakeAdHandler.calls, ['TELECOM\\Kasymov.Dlt'])
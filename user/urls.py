@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import UserRegistrationView, ConfirmCodeView, AdLoginView
 from rest_framework.routers import DefaultRouter
-from .views import CustomUserViewSet
+from .views import CustomUserViewSet, DepartmentViewSet
 
 router = DefaultRouter()
 router.register(r'users', CustomUserViewSet, basename='user')
+router.register(r'departments', DepartmentViewSet, basename='department')
 
 urlpatterns = [
     path("auth/ad-login/", AdLoginView.as_view(), name="ad-login"),
@@ -8,10 +8,16 @@ from .serializers import UserRegistrationSerializer, ConfirmCodeSerializer
 import random
 from django.conf import settings
 from twilio.rest import Client
-import requests
-from .serializers import UserSerializer
+from .serializers import UserSerializer, DepartmentSerializer, DepartmentEmployeeSerializer
 from djoser.views import UserViewSet
-from rest_framework import filters
+from rest_framework import filters, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from .ad_client import AdClient
+from .directory import search_directory, DEFAULT_LIMIT
+from .hierarchy import department_tree
+from .models import Department
 
 User = get_user_model()
 
@@ -23,6 +29,62 @@ class CustomUserViewSet(UserViewSet):
     def get_serializer_class(self):
         return UserSerializer
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def autocomplete(self, request):
+        """
+        Быстрый поиск сотрудника для выбора подписанта/исполнителя: ?q=<начало ФИО, логина, email, ИИН
+        или телефона>&limit=10. Регистр и раскладка (кириллица/латиница) не важны.
+        """
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        return Response(search_directory(request.query_params.get('q', ''), limit))
+
+
+class DepartmentPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Оргструктура. ?parent=<id> — дочерние департаменты, ?parent=null — корневые.
+    """
+    queryset = Department.objects.order_by('name')
+    serializer_class = DepartmentSerializer
+    pagination_class = DepartmentPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        parent = self.request.query_params.get('parent')
+        if parent in ('null', ''):
+            queryset = queryset.filter(parent_id__isnull=True)
+        elif parent:
+            queryset = queryset.filter(parent_id=parent)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def tree(self, request, pk=None):
+        """Поддерево департамента с численностью каждого узла и всего поддерева."""
+        tree = department_tree(pk)
+        if tree is None:
+            return Response({"detail": "Департамент не найден"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(tree)
+
+    @action(detail=True, methods=['get'])
+    def employees(self, request, pk=None):
+        """Активные сотрудники департамента и всех его подразделений."""
+        department = self.get_object()
+        queryset = User.objects.filter(
+            department__ancestor_links__ancestor=department, is_active=True,
+        ).select_related('department', 'position').order_by('last_name', 'first_name')
+        page = self.paginate_queryset(queryset)
+        serializer = DepartmentEmployeeSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
 
 class AdLoginView(APIView):
     """
@@ -35,35 +97,8 @@ class AdLoginView(APIView):
 
         if not login or not password:
             return Response({"detail": "Введите логин и пароль"}, status=status.HTTP_400_BAD_REQUEST)
-        BASE_URL = "http://10.8.27.97:8056/api/active-directory/1.0.12/"
-        # Базовый URL АД (обрежем лишние / если есть)
-        base_url = BASE_URL.rstrip("/")
-
-        # Форматы логинов, которые будем проверять
-        login_variants = [
-            login,  # просто Kasymov.Dlt
-            f"TELECOM\\{login}",  # DOMAIN\username
-            f"{login}@telecom.kz",  # username@telecom.kz
-        ]
-
-        success = False
-        ad_response = None
-        final_login = None
-
-        for variant in login_variants:
-            try:
-                url = f"{base_url}/account/{variant}/authorization"
-                resp = requests.post(url, json={"password": password}, timeout=5)
-
-                if resp.status_code == 200:
-                    success = True
-                    ad_response = resp.json()
-                    final_login = variant
-                    break
-            except requests.RequestException as e:
-                continue
-
-        if not success:
+        final_login, ad_response = AdClient.login(login, password)
+        if final_login is None:
             return Response({"detail": "Неверный логин или пароль"}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Создаём или берём пользователя